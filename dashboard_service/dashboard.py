@@ -1,12 +1,23 @@
 from __future__ import annotations
-from flask import Flask, jsonify, request, render_template, redirect, url_for, session, flash
-from datetime import datetime
+from flask import Flask, Response, jsonify, request, render_template, redirect, url_for, session, flash
+from datetime import datetime, timedelta
 from functools import wraps
+from collections import OrderedDict
+from contextlib import ExitStack
 import os
+import json
+import threading
+import time
+import zlib
+import atexit
 import pymysql
 from dotenv import load_dotenv
 from werkzeug.security import check_password_hash
 
+from ingest_buffer import IngestBuffer
+from event_bus import EventBus
+from db_pool import ConnectionPool, PoolTimeout
+
 load_dotenv()
 
 app = Flask(__name__, static_url_path='/static')
@@ -28,8 +39,37 @@ DB_NAME = os.getenv("DB_NAME", "lpr_system")
 # Optional shared token to protect ingest routes
 SHARED_INGEST_TOKEN = os.getenv("SHARED_INGEST_TOKEN", "")
 
+# Bulk ingest limits (offline-queue replay from the vehicles)
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "5000"))
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", str(16 << 20)))  # after decompression
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "50000"))
+
+# Live GPS points are buffered and written in multi-row batches
+GPS_FLUSH_ROWS = int(os.getenv("GPS_FLUSH_ROWS", "200"))
+GPS_FLUSH_INTERVAL = float(os.getenv("GPS_FLUSH_INTERVAL", "1.0"))
+GPS_MAX_BACKLOG = int(os.getenv("GPS_MAX_BACKLOG", "20000"))
+GPS_SPLIT_AFTER = int(os.getenv("GPS_SPLIT_AFTER", "3"))  # failed flushes before a batch is bisected
+GPS_DEAD_LETTER_FILE = os.getenv("GPS_DEAD_LETTER_FILE", "gps_dead_letter.ndjson")
+
+# /api/received-plates paging
+PLATES_PAGE_MAX = int(os.getenv("PLATES_PAGE_MAX", "1000"))
+PLATES_STREAM_CHUNK = int(os.getenv("PLATES_STREAM_CHUNK", "200"))  # rows per streamed write
+
+# Live push (/events, Server-Sent Events). Each open stream holds one server
+# thread, so EVENTS_MAX_CLIENTS must stay below the WSGI server's thread count.
+EVENTS_REPLAY = int(os.getenv("EVENTS_REPLAY", "1000"))
+EVENTS_MAX_CLIENTS = int(os.getenv("EVENTS_MAX_CLIENTS", "8"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+
+# DB connection pool
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "3600"))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "10"))
+
 # ── DB helper ───────────────────────────────────────────────────────────────
-def get_db():
+def _connect_db():
     return pymysql.connect(
         host=DB_HOST,
         user=DB_USER,
@@ -39,6 +79,16 @@ def get_db():
         cursorclass=pymysql.cursors.DictCursor
     )
 
+db_pool = ConnectionPool(_connect_db, min_size=DB_POOL_MIN, max_size=DB_POOL_MAX,
+                         max_lifetime=DB_POOL_MAX_LIFETIME, acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT).warm()
+atexit.register(db_pool.close)
+
+def get_db():
+    # usage: `with get_db() as conn:` — the connection always goes back to the pool
+    return db_pool.connection()
+
+events = EventBus(replay=EVENTS_REPLAY, max_subscribers=EVENTS_MAX_CLIENTS)
+
 # ── Decorators ──────────────────────────────────────────────────────────────
 def login_required(view):
     @wraps(view)
@@ -66,6 +116,88 @@ def ingest_token_required(view):
         return view(*args, **kwargs)
     return wrapped
 
+# ── Bulk ingest helpers ─────────────────────────────────────────────────────
+class BulkBodyError(ValueError):
+    pass
+
+def parse_bulk_body():
+    # Accepts a JSON array, {"items": [...]}, or NDJSON; optionally gzip-encoded.
+    raw = request.get_data(cache=False)
+    if "gzip" in request.headers.get("Content-Encoding", "").lower():
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            raw = inflater.decompress(raw, BULK_MAX_BYTES + 1)
+        except zlib.error:
+            raise BulkBodyError("invalid gzip body")
+        if len(raw) > BULK_MAX_BYTES or inflater.unconsumed_tail:
+            raise BulkBodyError("body too large")
+    elif len(raw) > BULK_MAX_BYTES:
+        raise BulkBodyError("body too large")
+
+    try:
+        if "ndjson" in (request.content_type or ""):
+            items = [json.loads(line) for line in raw.splitlines() if line.strip()]
+        else:
+            items = json.loads(raw or b"[]")
+            if isinstance(items, dict):
+                items = items.get("items", [])
+    except ValueError:
+        raise BulkBodyError("invalid JSON")
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        raise BulkBodyError("expected a list of objects")
+    if len(items) > BULK_MAX_ITEMS:
+        raise BulkBodyError(f"at most {BULK_MAX_ITEMS} items per request")
+    return items
+
+class IdempotencyKeys:
+    # Remembers recently applied Idempotency-Key values (and their response)
+    # so a replayed batch is acknowledged without being inserted twice.
+    def __init__(self, ttl, max_keys):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if not key:
+            return None
+        with self._lock:
+            entry = self._keys.get(key)
+            if entry and entry[0] > time.time():
+                return entry[1]
+            self._keys.pop(key, None)
+            return None
+
+    def put(self, key, result):
+        if not key:
+            return
+        with self._lock:
+            self._keys[key] = (time.time() + self.ttl, result)
+            self._keys.move_to_end(key)
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+
+idempotency_keys = IdempotencyKeys(IDEMPOTENCY_TTL, IDEMPOTENCY_MAX_KEYS)
+
+def bulk_ingest(store_items):
+    # Shared body of the /bulk routes: parse, dedupe on Idempotency-Key, store.
+    key = request.headers.get("Idempotency-Key", "")
+    cached = idempotency_keys.get(key)
+    if cached is not None:
+        return jsonify(dict(cached, duplicate=True)), 200
+    try:
+        items = parse_bulk_body()
+    except BulkBodyError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        stored = store_items(items)
+    except Exception as e:
+        print("Bulk ingest failed:", e)
+        return jsonify({"error": "storage failed"}), 503
+    result = {"status": "success", "received": len(items), "stored": stored}
+    idempotency_keys.put(key, result)
+    return jsonify(result), 200
+
 # ── Auth ────────────────────────────────────────────────────────────────────
 @app.route("/login", methods=["GET", "POST"])
 def login():
@@ -74,18 +206,12 @@ def login():
         password = request.form.get("password","")
 
         try:
-            conn = get_db()
-            with conn.cursor() as cursor:
+            with get_db() as conn, conn.cursor() as cursor:
                 cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
                 user = cursor.fetchone()
         except Exception as e:
             print("DB error during login:", e)
             user = None
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
 
         ok = False
         if user:
@@ -127,6 +253,50 @@ def gps_tracking():
         return jsonify(GPS_LOGS[-1])
     return jsonify({"error": "No GPS data"}), 404
 
+def normalize_plate_text(plate):
+    # must match the plate_norm generated column (migrations/0001)
+    return plate.replace(" ", "").upper()
+
+# GPS history by plate. The fast form needs the plate_norm column from
+# migrations/0001; on a database that has not been migrated yet the legacy
+# query is used instead (once we have seen the column missing).
+GPS_HISTORY_SQL = """
+    SELECT plate, latitude, longitude, speed, time AS timestamp
+    FROM gps_logs
+    WHERE plate_norm = %s AND time >= %s AND time < %s
+    ORDER BY time ASC
+"""
+GPS_HISTORY_SQL_LEGACY = """
+    SELECT plate, latitude, longitude, speed, time AS timestamp
+    FROM gps_logs
+    WHERE UPPER(REPLACE(plate, ' ', '')) = %s AND time >= %s AND time < %s
+    ORDER BY time ASC
+"""
+_gps_plate_norm = True
+
+def query_gps_history(cursor, plate, start_datetime, end_datetime):
+    global _gps_plate_norm
+    params = (normalize_plate_text(plate), start_datetime, end_datetime)
+    if _gps_plate_norm:
+        try:
+            cursor.execute(GPS_HISTORY_SQL, params)
+            return cursor.fetchall()
+        except pymysql.err.OperationalError as e:
+            if e.args[0] != 1054:  # ER_BAD_FIELD_ERROR: unknown column
+                raise
+            _gps_plate_norm = False
+            print("gps_logs has no plate_norm column; run `python migrate.py` "
+                  "(live_detection_service) for indexed GPS history. Using the slow query meanwhile.")
+    cursor.execute(GPS_HISTORY_SQL_LEGACY, params)
+    return cursor.fetchall()
+
+def day_range(start, end):
+    # [start 00:00, day after end 00:00) — a sargable replacement for
+    # DATE(time) BETWEEN start AND end
+    start_day = datetime.strptime(start, "%Y-%m-%d")
+    end_day = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1)
+    return start_day.strftime("%Y-%m-%d %H:%M:%S"), end_day.strftime("%Y-%m-%d %H:%M:%S")
+
 @app.route("/gps-tracking-history")
 @api_login_required
 def gps_tracking_history():
@@ -143,137 +313,302 @@ def gps_tracking_history():
             start = datetime.strptime(start, "%d/%m/%Y").strftime("%Y-%m-%d")
             end = datetime.strptime(end, "%d/%m/%Y").strftime("%Y-%m-%d")
 
-        start_datetime = f"{start} 00:00:00"
-        end_datetime = f"{end} 23:59:59"
+        start_datetime, end_datetime = day_range(start, end)
 
-        conn = get_db()
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT plate, latitude, longitude, speed, time AS timestamp
-                FROM gps_logs
-                WHERE UPPER(plate) = UPPER(%s) AND time BETWEEN %s AND %s
-                ORDER BY time ASC
-            """, (plate, start_datetime, end_datetime))
-            results = cursor.fetchall()
-        conn.close()
+        # plate_norm + half-open time range hit idx_gps_logs_plate_time and
+        # let MariaDB prune to the matching monthly partitions
+        with get_db() as conn, conn.cursor() as cursor:
+            results = query_gps_history(cursor, plate, start_datetime, end_datetime)
 
         return jsonify(results)
     except Exception as e:
         print("Error fetching GPS history:", e)
         return jsonify({"error": str(e)}), 500
 
+def normalize_gps(data):
+    # If plate/time missing, inject defaults
+    data["plate"] = data.get("plate") or os.getenv("SCAN_CAR_PLATE", "VMD9454")
+    data["time"] = data.get("time") or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return data
+
+def remember_gps(points):
+    global GPS_LOGS
+    GPS_LOGS.extend(points)
+    if len(GPS_LOGS) > 1000:
+        GPS_LOGS = GPS_LOGS[-1000:]
+
+def gps_row(data):
+    return (data.get("plate"), data.get("latitude"), data.get("longitude"), data.get("speed", 0), data.get("time"))
+
+def insert_gps_rows(rows):
+    # pymysql rewrites this executemany into one multi-row INSERT statement
+    with get_db() as conn, conn.cursor() as cursor:
+        cursor.executemany("""
+            INSERT INTO gps_logs (plate, latitude, longitude, speed, time)
+            VALUES (%s, %s, %s, %s, %s)
+        """, rows)
+
+# MySQL error codes that mean the server is unreachable or refusing work, not
+# that a row is bad: access denied, too many connections, lock wait timeout,
+# deadlock, can't connect, server gone away, lost connection
+DB_OUTAGE_CODES = {1044, 1045, 1040, 1205, 1213, 2002, 2003, 2006, 2013, 2055}
+
+def db_outage(exc):
+    # the GPS buffer retries these with backoff instead of bisecting the batch
+    if isinstance(exc, (PoolTimeout, pymysql.err.InterfaceError, OSError)):
+        return True
+    return (isinstance(exc, pymysql.err.OperationalError)
+            and bool(exc.args) and exc.args[0] in DB_OUTAGE_CODES)
+
+gps_buffer = IngestBuffer(insert_gps_rows, flush_rows=GPS_FLUSH_ROWS,
+                          flush_interval=GPS_FLUSH_INTERVAL, max_backlog=GPS_MAX_BACKLOG,
+                          split_after=GPS_SPLIT_AFTER, dead_letter=GPS_DEAD_LETTER_FILE,
+                          is_outage=db_outage).start()
+atexit.register(gps_buffer.stop)
+
+def busy_response():
+    resp = jsonify({"error": "ingest backlog full, retry later"})
+    resp.headers["Retry-After"] = "2"
+    return resp, 503
+
 @app.route("/api/gps", methods=["POST"])
 @ingest_token_required
 def receive_gps():
-    global GPS_LOGS
+    # 200 means "accepted into the write buffer", not "in the database": the
+    # row is written within GPS_FLUSH_INTERVAL, and rows the DB keeps refusing
+    # end up in GPS_DEAD_LETTER_FILE. The vehicles treat any non-200 as "keep
+    # it in the offline queue", so the status stays 200 for compatibility.
+    # Callers that need a durable write use /api/gps/bulk.
     data = request.json
     if not data:
         return jsonify({"error": "no data"}), 400
 
-    # If plate/time missing, inject defaults
-    data["plate"] = data.get("plate") or os.getenv("SCAN_CAR_PLATE", "VMD9454")
-    data["time"] = data.get("time") or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    GPS_LOGS.append(data)
-    if len(GPS_LOGS) > 1000:
-        GPS_LOGS = GPS_LOGS[-1000:]
+    normalize_gps(data)
+    if not gps_buffer.offer([gps_row(data)]):
+        return busy_response()
+    remember_gps([data])
+    events.publish("gps", data)
+    return jsonify({"status": "received"}), 200
 
-    try:
-        conn = get_db()
-        with conn.cursor() as cursor:
-            cursor.execute("""
+def store_gps_batch(items):
+    # Bulk replays are already batched: write them straight through so the
+    # vehicle only drops its copy once the rows are in the database.
+    points = [normalize_gps(p) for p in items]
+    if points:
+        with get_db() as conn, conn.cursor() as cursor:
+            cursor.executemany("""
                 INSERT INTO gps_logs (plate, latitude, longitude, speed, time)
                 VALUES (%s, %s, %s, %s, %s)
-            """, (
-                data.get("plate"),
-                data.get("latitude"),
-                data.get("longitude"),
-                data.get("speed", 0),
-                data.get("time")
-            ))
-        conn.close()
-    except Exception as e:
-        print("Failed to insert GPS:", e)
+            """, [gps_row(p) for p in points])
+        remember_gps(points)
+        events.publish("gps", points[-1])
+    return len(points)
 
-    return jsonify({"status": "received"}), 200
+@app.route("/api/ingest-stats", methods=["GET"])
+@api_login_required
+def ingest_stats():
+    return jsonify({"gps": gps_buffer.stats(), "db_pool": db_pool.stats(), "events": events.stats()})
 
-# ── Plate ingest / query ────────────────────────────────────────────────────
-@app.route("/api/receive-plate", methods=["POST"])
+@app.route("/api/gps/bulk", methods=["POST"])
 @ingest_token_required
-def receive_plate():
-    data = request.get_json() or {}
-    if not data:
-        return jsonify({"error": "No data received"}), 400
+def receive_gps_bulk():
+    return bulk_ingest(store_gps_batch)
 
+# ── Plate ingest / query ────────────────────────────────────────────────────
+def normalize_plate(data):
     # Derive status for scofflaw, ensure snapshot URL
     if data.get("summons") and isinstance(data["summons"], list) and len(data["summons"]) > 0:
         data["status"] = data.get("status") or "Scofflaw"
 
-    snapshot = data.get("snapshot", "")
+    snapshot = data.get("snapshot") or ""
     if not snapshot.startswith("http"):
         data["snapshot"] = "static/default-car.png"
+    return data
+
+def plate_row(data):
+    return (
+        data.get("plate"),
+        data.get("status"),
+        data.get("snapshot"),
+        data.get("time"),
+        data.get("latitude"),
+        data.get("longitude"),
+        data.get("officer_id")
+    )
+
+@app.route("/api/receive-plate", methods=["POST"])
+@ingest_token_required
+def receive_plate():
+    data = request.get_json() or {}
+    if not data:
+        return jsonify({"error": "No data received"}), 400
+
+    normalize_plate(data)
 
     try:
-        conn = get_db()
-        with conn.cursor() as cursor:
+        with get_db() as conn, conn.cursor() as cursor:
             cursor.execute("""
                 INSERT INTO dashboard_plates (plate, status, snapshot, time, latitude, longitude, officer_id)
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                data.get("plate"),
-                data.get("status"),
-                data.get("snapshot"),
-                data.get("time"),
-                data.get("latitude"),
-                data.get("longitude"),
-                data.get("officer_id")
-            ))
-        conn.close()
+            """, plate_row(data))
+            plate_id = cursor.lastrowid
+        events.publish("plate", dict(data, id=plate_id))
     except Exception as e:
         print("Failed to insert into dashboard_plates:", e)
 
     return jsonify({"status": "success"}), 200
 
+def store_plate_batch(items):
+    plates = [normalize_plate(p) for p in items if p.get("plate")]
+    if plates:
+        with get_db() as conn, conn.cursor() as cursor:
+            cursor.executemany("""
+                INSERT INTO dashboard_plates (plate, status, snapshot, time, latitude, longitude, officer_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, [plate_row(p) for p in plates])
+        events.publish("plates", {"count": len(plates)})
+    return len(plates)
+
+@app.route("/api/receive-plate/bulk", methods=["POST"])
+@ingest_token_required
+def receive_plate_bulk():
+    return bulk_ingest(store_plate_batch)
+
+def plate_json(row):
+    time_value = row["time"]
+    formatted_time = time_value if isinstance(time_value, str) else (
+        time_value.strftime("%Y-%m-%d %H:%M:%S") if time_value else ""
+    )
+    return {
+        "id": row["id"],
+        "plate": row["plate"],
+        "status": row["status"],
+        "snapshot": row["snapshot"],
+        "time": formatted_time,
+        "latitude": row["latitude"],
+        "longitude": row["longitude"],
+        "officer_id": row["officer_id"]
+    }
+
+def _int_arg(name):
+    value = request.args.get(name)
+    if value in (None, ""):
+        return None
+    return int(value)
+
 @app.route("/api/received-plates", methods=["GET"])
 @api_login_required
 def get_received_plates():
+    # Modes:
+    #   ?since_id=N[&limit=]        rows with id > N, oldest first (cheap poll for new plates)
+    #   ?limit=L[&after_id=N]       one page, newest first; X-Next-Cursor holds the
+    #                               after_id of the next page (keyset, no OFFSET)
+    #   (neither)                   every matching row, streamed from a server-side cursor
+    # start/end (YYYY-MM-DD) filter all modes.
     start = request.args.get("start")
     end = request.args.get("end")
+    try:
+        since_id = _int_arg("since_id")
+        after_id = _int_arg("after_id")
+        limit = _int_arg("limit")
+    except ValueError:
+        return jsonify({"error": "since_id, after_id and limit must be integers"}), 400
+
+    where, params = [], []
+    if start and end:
+        try:
+            params.extend(day_range(start, end))
+        except ValueError:
+            return jsonify({"error": "start and end must be dates (YYYY-MM-DD)"}), 400
+        where.append("time >= %s AND time < %s")
+
+    if since_id is None and limit is None and after_id is None:
+        return stream_received_plates(where, params)
+
+    limit = max(1, min(limit or PLATES_PAGE_MAX, PLATES_PAGE_MAX))
+    if since_id is not None:
+        where.append("id > %s")
+        params.append(since_id)
+        order = "ASC"
+    else:
+        if after_id is not None:
+            where.append("id < %s")
+            params.append(after_id)
+        order = "DESC"
+    query = "SELECT * FROM dashboard_plates"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += f" ORDER BY id {order} LIMIT %s"
+    params.append(limit)
 
     try:
-        conn = get_db()
-        with conn.cursor() as cursor:
-            params = []
-            query = "SELECT * FROM dashboard_plates"
-            if start and end:
-                query += " WHERE DATE(time) BETWEEN %s AND %s"
-                params = [start, end]
-            query += " ORDER BY id DESC"
+        with get_db() as conn, conn.cursor() as cursor:
             cursor.execute(query, params)
-            rows = cursor.fetchall()
-        conn.close()
-
-        plates = []
-        for row in rows:
-            time_value = row["time"]
-            formatted_time = time_value if isinstance(time_value, str) else (
-                time_value.strftime("%Y-%m-%d %H:%M:%S") if time_value else ""
-            )
-            plates.append({
-                "plate": row["plate"],
-                "status": row["status"],
-                "snapshot": row["snapshot"],
-                "time": formatted_time,
-                "latitude": row["latitude"],
-                "longitude": row["longitude"],
-                "officer_id": row["officer_id"]
-            })
-
-        return jsonify(plates)
+            plates = [plate_json(row) for row in cursor.fetchall()]
     except Exception as e:
         print("Error retrieving plates:", e)
         return jsonify({"error": str(e)}), 500
 
+    response = jsonify(plates)
+    if since_id is not None:
+        response.headers["X-Last-Id"] = str(plates[-1]["id"] if plates else since_id)
+    elif len(plates) == limit:
+        response.headers["X-Next-Cursor"] = str(plates[-1]["id"])
+    return response
+
+def stream_received_plates(where, params):
+    # SSDictCursor reads rows off the socket as they are sent, so memory stays
+    # flat however large the table is. The pooled connection is held until
+    # the response finishes (or the client goes away) and then released.
+    query = "SELECT * FROM dashboard_plates"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY id DESC"
+
+    stack = ExitStack()
+    try:
+        conn = stack.enter_context(get_db())
+        cursor = stack.enter_context(conn.cursor(pymysql.cursors.SSDictCursor))
+        cursor.execute(query, params)
+    except Exception as e:
+        stack.close()
+        print("Error retrieving plates:", e)
+        return jsonify({"error": str(e)}), 500
+
+    def generate():
+        with stack:
+            yield "["
+            sep = ""
+            while True:
+                rows = cursor.fetchmany(PLATES_STREAM_CHUNK)
+                if not rows:
+                    break
+                chunk = ",".join(json.dumps(plate_json(row), default=str) for row in rows)
+                yield sep + chunk
+                sep = ","
+            yield "]"
+
+    response = Response(generate(), mimetype="application/json")
+    response.call_on_close(stack.close)
+    return response
+
+# ── Live push ───────────────────────────────────────────────────────────────
+@app.route("/events")
+@api_login_required
+def event_stream():
+    # Events: gps (latest point), plate (one new row, with id), plates (a bulk
+    # replay landed: refetch with since_id), reset (replay window missed:
+    # reload everything). Clients fall back to polling on 503.
+    if not events.try_subscribe():
+        return jsonify({"error": "too many live clients, poll instead"}), 503
+    last_event_id = request.headers.get("Last-Event-ID", type=int)
+    response = Response(events.stream(last_event_id, heartbeat=EVENTS_HEARTBEAT),
+                        mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.call_on_close(events.unsubscribe)
+    return response
+
 # ── Main ─────────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
     port = int(os.getenv("PORT", "5002"))
@@ -0,0 +1,203 @@
+from __future__ import annotations
+import json
+import threading
+import time
+from collections import deque
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Buffered, batched row ingest
+# ──────────────────────────────────────────────────────────────────────────────
+def _is_outage(exc) -> bool:
+    # socket-level failures; callers pass a driver-aware check as is_outage
+    return isinstance(exc, OSError)
+
+class IngestBuffer:
+    # Rows are queued in memory and written by one background thread with a
+    # single flush_fn(rows) call (an executemany) whenever flush_rows rows
+    # are waiting or flush_interval seconds have passed. The backlog is
+    # bounded: offer() returns False when it is full so the route can push
+    # back on the sender instead of growing without limit. A failed flush
+    # keeps its rows at the front of the backlog and is retried.
+    #
+    # One bad row (say an invalid datetime under strict SQL mode) fails every
+    # batch it is in, so after split_after failures in a row the batch is
+    # bisected: the good halves are written and the rows that still fail on
+    # their own (a lone row included) go to the dead-letter file, one JSON
+    # line each, instead of blocking ingest forever. Errors for which
+    # is_outage(exc) is true (connection refused, pool timeout) say nothing
+    # about the rows: they never count towards split_after, and one during a
+    # bisect stops it and puts the unwritten rows back, so an outage costs
+    # one flush_fn call per retry rather than one per row.
+    def __init__(self, flush_fn, flush_rows=200, flush_interval=1.0, max_backlog=20000, retry_delay=2.0,
+                 split_after=3, dead_letter=None, is_outage=None):
+        self.flush_fn = flush_fn
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+        self.retry_delay = retry_delay
+        self.split_after = max(1, split_after)
+        self.dead_letter = dead_letter  # path of the JSON-lines file; None = log only
+        self.is_outage = is_outage or _is_outage
+        self._failures = 0              # consecutive failed flushes caused by the rows
+        self._rows = deque()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+        self._flush_lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.rows_flushed = 0
+        self.dead_lettered = 0
+        self.max_rows_per_flush = 0
+        self.flush_time = 0.0
+        self.max_flush_time = 0.0
+        self.last_flush = None
+
+    def offer(self, rows) -> bool:
+        with self._cond:
+            if len(self._rows) + len(rows) > self.max_backlog:
+                self.rejected += len(rows)
+                return False
+            self._rows.extend(rows)
+            self.accepted += len(rows)
+            if len(self._rows) >= self.flush_rows:
+                self._cond.notify()
+            return True
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        # Drains the whole backlog (one flush only writes flush_rows) until
+        # `timeout`; whatever still cannot be written goes to the dead-letter
+        # file rather than vanishing with the process.
+        deadline = time.time() + timeout
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+        while self._rows and time.time() < deadline:
+            if not self.flush():
+                time.sleep(min(self.retry_delay, max(0.0, deadline - time.time())))
+        with self._cond:
+            left = list(self._rows)
+            self._rows.clear()
+        if left:
+            self._dead_letter([(row, "unwritten at shutdown") for row in left])
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.time() + self.flush_interval
+                while not self._stop and len(self._rows) < self.flush_rows:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stop:
+                    return
+            if not self.flush():
+                time.sleep(self.retry_delay)
+
+    def flush(self) -> bool:
+        with self._flush_lock:
+            with self._cond:
+                batch = [self._rows.popleft() for _ in range(min(len(self._rows), self.flush_rows))]
+            if not batch:
+                return True
+            started = time.time()
+            try:
+                self.flush_fn(batch)
+                written, poison, unwritten = len(batch), [], []
+            except Exception as e:
+                print(f"Ingest flush of {len(batch)} rows failed:", e)
+                self.failed_flushes += 1
+                if self.is_outage(e):
+                    # the database is unreachable, not the rows: retry as is
+                    self._requeue(batch)
+                    return False
+                self._failures += 1
+                if self._failures < self.split_after:
+                    self._requeue(batch)
+                    return False
+                written, poison, unwritten = self._split(batch, e)
+                self._requeue(unwritten)
+            if not unwritten:
+                self._failures = 0
+            if poison:
+                self._dead_letter(poison)
+            if written:
+                elapsed = time.time() - started
+                self.flushes += 1
+                self.rows_flushed += written
+                self.max_rows_per_flush = max(self.max_rows_per_flush, written)
+                self.flush_time += elapsed
+                self.max_flush_time = max(self.max_flush_time, elapsed)
+                self.last_flush = time.time()
+            return not unwritten
+
+    def _requeue(self, rows):
+        if rows:
+            with self._cond:
+                self._rows.extendleft(reversed(rows))
+
+    # caller holds self._flush_lock
+    def _split(self, batch, error):
+        # Bisects a batch that failed with `error`. Returns (rows written,
+        # [(row, error)] for rows that fail on their own, rows left unwritten
+        # because the database went away part way through).
+        todo = deque([(batch, error)])
+        written, poison = 0, []
+        while todo:
+            part, error = todo.popleft()
+            if error is None:
+                try:
+                    self.flush_fn(part)
+                    written += len(part)
+                    continue
+                except Exception as e:
+                    if self.is_outage(e):
+                        return written, poison, part + [row for rest, _ in todo for row in rest]
+                    error = e
+            if len(part) == 1:
+                poison.append((part[0], error))
+            else:
+                mid = len(part) // 2
+                todo.extendleft([(part[mid:], None), (part[:mid], None)])
+        return written, poison, []
+
+    def _dead_letter(self, failed):
+        self.dead_lettered += len(failed)
+        print(f"Ingest dead-lettered {len(failed)} rows:", failed[0][1])
+        if not self.dead_letter:
+            return
+        try:
+            with open(self.dead_letter, "a") as f:
+                for row, error in failed:
+                    f.write(json.dumps({"time": time.time(), "error": str(error), "row": row}, default=str) + "\n")
+        except OSError as e:
+            print("Could not write the dead-letter file:", e)
+
+    def stats(self) -> dict:
+        flushes = self.flushes
+        return {
+            "backlog": len(self._rows),
+            "max_backlog": self.max_backlog,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "flushes": flushes,
+            "failed_flushes": self.failed_flushes,
+            "rows_flushed": self.rows_flushed,
+            "dead_lettered": self.dead_lettered,
+            "avg_rows_per_flush": round(self.rows_flushed / flushes, 1) if flushes else 0.0,
+            "max_rows_per_flush": self.max_rows_per_flush,
+            "avg_flush_ms": round(1000 * self.flush_time / flushes, 1) if flushes else 0.0,
+            "max_flush_ms": round(1000 * self.max_flush_time, 1),
+            "last_flush": self.last_flush,
+        }
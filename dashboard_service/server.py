@@ -1,5 +1,7 @@
+import os
 from waitress import serve
 from dashboard import app  # Change to match your main Flask file name
 
 if __name__ == "__main__":
-    serve(app, host="0.0.0.0", port=5002)
+    # Each open /events stream holds a thread; keep this above EVENTS_MAX_CLIENTS
+    serve(app, host="0.0.0.0", port=5002, threads=int(os.getenv("WAITRESS_THREADS", "16")))
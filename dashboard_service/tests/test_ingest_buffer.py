@@ -0,0 +1,163 @@
+import json
+import time
+
+from ingest_buffer import IngestBuffer
+
+
+class FakeDb:
+    # flush_fn stand-in: rows in `poison` fail any batch they are in, and
+    # `down` fails everything with a connection error (database unreachable).
+    # `down_after` takes the database away after that many calls.
+    def __init__(self, poison=()):
+        self.poison = set(poison)
+        self.down = False
+        self.down_after = None
+        self.rows = []
+        self.calls = 0
+
+    def __call__(self, rows):
+        self.calls += 1
+        if self.down or (self.down_after is not None and self.calls > self.down_after):
+            raise ConnectionRefusedError("Can't connect to MySQL server")
+        if self.poison.intersection(rows):
+            raise ValueError("Incorrect datetime value")
+        self.rows.extend(rows)
+
+
+def test_offer_respects_backlog_limit():
+    buf = IngestBuffer(FakeDb(), max_backlog=3)
+    assert buf.offer([1, 2])
+    assert not buf.offer([3, 4])
+    assert buf.offer([3])
+    stats = buf.stats()
+    assert stats["backlog"] == 3
+    assert stats["accepted"] == 3
+    assert stats["rejected"] == 2
+
+
+def test_flush_writes_at_most_flush_rows_in_order():
+    db = FakeDb()
+    buf = IngestBuffer(db, flush_rows=2)
+    buf.offer([1, 2, 3])
+    assert buf.flush()
+    assert db.rows == [1, 2]
+    assert buf.flush()
+    assert db.rows == [1, 2, 3]
+
+
+def test_failed_flush_keeps_rows_at_front():
+    db = FakeDb()
+    buf = IngestBuffer(db, flush_rows=10, split_after=100)
+    buf.offer([1, 2, 3])
+    db.down = True
+    assert not buf.flush()
+    buf.offer([4])
+    db.down = False
+    assert buf.flush()
+    assert db.rows == [1, 2, 3, 4]
+
+
+def test_poison_row_is_isolated_and_dead_lettered(tmp_path):
+    dead = tmp_path / "dead.ndjson"
+    db = FakeDb(poison={"bad"})
+    buf = IngestBuffer(db, flush_rows=10, split_after=2, dead_letter=str(dead))
+    buf.offer([1, 2, "bad", 3, 4])
+    assert not buf.flush()
+    # second failure in a row: bisect, write the good rows, park the bad one
+    assert buf.flush()
+    assert sorted(map(str, db.rows)) == ["1", "2", "3", "4"]
+    assert buf.stats()["backlog"] == 0
+    assert buf.stats()["dead_lettered"] == 1
+    lines = [json.loads(line) for line in dead.read_text().splitlines()]
+    assert [line["row"] for line in lines] == ["bad"]
+    assert "datetime" in lines[0]["error"]
+    # ingest keeps flowing afterwards
+    buf.offer([5])
+    assert buf.flush()
+    assert db.rows[-1] == 5
+
+
+def test_outage_does_not_dead_letter(tmp_path):
+    dead = tmp_path / "dead.ndjson"
+    db = FakeDb()
+    db.down = True
+    buf = IngestBuffer(db, flush_rows=10, split_after=1, dead_letter=str(dead))
+    buf.offer([1, 2, 3, 4])
+    for _ in range(3):
+        assert not buf.flush()
+    assert buf.stats()["backlog"] == 4
+    assert buf.stats()["dead_lettered"] == 0
+    assert not dead.exists()
+    db.down = False
+    assert buf.flush()
+    assert db.rows == [1, 2, 3, 4]
+
+
+def test_outage_costs_one_call_per_retry():
+    db = FakeDb()
+    db.down = True
+    buf = IngestBuffer(db, flush_rows=200, split_after=1)
+    buf.offer(list(range(200)))
+    for _ in range(5):
+        assert not buf.flush()
+    assert db.calls == 5
+    assert buf.stats()["backlog"] == 200
+
+
+def test_outage_during_bisect_stops_it_and_keeps_rows():
+    db = FakeDb(poison={"bad"})
+    buf = IngestBuffer(db, flush_rows=10, split_after=1)
+    buf.offer([1, 2, 3, 4, "bad", 5, 6, 7])
+    db.down_after = 2  # the first half goes in, then the server goes away
+    assert not buf.flush()
+    assert db.calls == 3
+    assert db.rows == [1, 2, 3, 4]
+    assert buf.stats()["backlog"] == 4
+    assert buf.stats()["dead_lettered"] == 0
+    db.down_after = None
+    assert buf.flush()
+    assert db.rows == [1, 2, 3, 4, 5, 6, 7]
+    assert buf.stats()["dead_lettered"] == 1
+
+
+def test_lone_bad_row_is_dead_lettered(tmp_path):
+    dead = tmp_path / "dead.ndjson"
+    db = FakeDb(poison={"bad"})
+    buf = IngestBuffer(db, flush_rows=10, split_after=2, dead_letter=str(dead))
+    buf.offer(["bad"])
+    assert not buf.flush()
+    assert buf.flush()
+    assert buf.stats()["backlog"] == 0
+    assert [json.loads(line)["row"] for line in dead.read_text().splitlines()] == ["bad"]
+
+
+def test_stop_drains_whole_backlog():
+    db = FakeDb()
+    buf = IngestBuffer(db, flush_rows=200, flush_interval=60).start()
+    buf.offer(list(range(1000)))
+    buf.stop(timeout=5)
+    assert db.rows == list(range(1000))
+    assert buf.stats()["backlog"] == 0
+
+
+def test_stop_dead_letters_what_cannot_be_written(tmp_path):
+    dead = tmp_path / "dead.ndjson"
+    db = FakeDb()
+    db.down = True
+    buf = IngestBuffer(db, flush_rows=10, flush_interval=60, retry_delay=0.05, dead_letter=str(dead))
+    buf.offer([1, 2, 3])
+    started = time.time()
+    buf.stop(timeout=0.3)
+    assert time.time() - started < 2
+    assert [json.loads(line)["row"] for line in dead.read_text().splitlines()] == [1, 2, 3]
+
+
+def test_background_thread_flushes_on_interval():
+    db = FakeDb()
+    buf = IngestBuffer(db, flush_rows=100, flush_interval=0.05).start()
+    buf.offer([1])
+    deadline = time.time() + 2
+    while not db.rows and time.time() < deadline:
+        time.sleep(0.01)
+    buf.stop(timeout=1)
+    assert db.rows == [1]
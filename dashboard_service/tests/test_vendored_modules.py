@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(os.path.dirname(HERE), "live_detection_service")
+
+# modules shared with live_detection_service, which holds the source copy
+VENDORED = ["db_pool.py", "event_bus.py"]
+
+
+@pytest.mark.parametrize("name", VENDORED)
+def test_vendored_copy_matches_source(name):
+    source = os.path.join(SOURCE, name)
+    if not os.path.exists(source):
+        pytest.skip("live_detection_service is not checked out next to dashboard_service")
+    with open(source, "rb") as f:
+        expected = f.read()
+    with open(os.path.join(HERE, name), "rb") as f:
+        vendored = f.read()
+    assert vendored == expected, f"dashboard_service/{name} is out of sync: cp live_detection_service/{name} dashboard_service/"
@@ -1,8 +1,9 @@
 from __future__ import annotations
-from flask import Flask, request, jsonify, send_file, send_from_directory, url_for
-import os, threading, cv2, numpy as np, requests, pandas as pd
-from io import BytesIO
+from flask import Flask, Response, request, jsonify, send_from_directory, url_for
+import os, threading, cv2, numpy as np, requests
 from dotenv import load_dotenv
+from http_pool import HttpClient
+from exporters import FORMATS, export_chunks
 
 load_dotenv()
 app = Flask(__name__)
@@ -16,6 +17,11 @@ SUMMONS_API_URL=os.getenv("SUMMONS_API_URL","http://localhost:5000/api/summons")
 SNAPSHOT_DIR=os.getenv("SNAPSHOT_DIR", os.path.join(app.root_path,"static/snapshots"))
 INGEST_TOKEN=os.getenv("SHARED_INGEST_TOKEN","")
 PORT=int(os.getenv("PORT","5001"))
+HTTP_CONNECT_TIMEOUT=float(os.getenv("HTTP_CONNECT_TIMEOUT","4"))
+http_client=HttpClient(pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE","8")), retries=int(os.getenv("HTTP_RETRIES","2")),
+                       backoff=float(os.getenv("HTTP_BACKOFF","0.5")),
+                       timeouts={"plate_recognizer":(HTTP_CONNECT_TIMEOUT, 30), "parking":(HTTP_CONNECT_TIMEOUT, 15),
+                                 "summons":(HTTP_CONNECT_TIMEOUT, 15)})
 
 os.makedirs(SNAPSHOT_DIR, exist_ok=True)
 detected_plates=[]; gps_data_list=[]; lock=threading.Lock()
@@ -33,9 +39,9 @@ def recognize_plate():
     ok, enc=cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), 80])
     if not ok: return jsonify({"error":"Encode failed"}), 500
     try:
-        r=requests.post(PLATE_RECOGNIZER_API_URL,
-                        files={"upload":("image.jpg", enc.tobytes(),"image/jpeg")},
-                        headers={"Authorization": f"Token {PLATE_RECOGNIZER_TOKEN}"}, timeout=30)
+        r=http_client.post("plate_recognizer", PLATE_RECOGNIZER_API_URL,
+                           files={"upload":("image.jpg", enc.tobytes(),"image/jpeg")},
+                           headers={"Authorization": f"Token {PLATE_RECOGNIZER_TOKEN}"})
         if r.status_code in (200,201): return jsonify(r.json().get("results",[])), 200
         return jsonify({"error":f"Plate API {r.status_code}", "body":r.text}), 502
     except requests.RequestException as e:
@@ -44,8 +50,8 @@ def recognize_plate():
 @app.route("/api/parking-status/<plate>", methods=["GET"])
 def parking_status(plate):
     try:
-        r=requests.get(PARKING_API_URL, params={"prpid":"","action":PARKING_API_ACTION,"filterid":plate},
-                       verify=PARKING_VERIFY_SSL, timeout=15)
+        r=http_client.get("parking", PARKING_API_URL, params={"prpid":"","action":PARKING_API_ACTION,"filterid":plate},
+                          verify=PARKING_VERIFY_SSL)
         if r.status_code==200: return jsonify(r.json()), 200
         return jsonify({"error":f"Parking API {r.status_code}"}), 502
     except requests.RequestException as e:
@@ -54,8 +60,8 @@ def parking_status(plate):
 @app.route("/api/summons-status/<plate>", methods=["GET"])
 def summons_status(plate):
     try:
-        r=requests.post(SUMMONS_API_URL, json={"vehicleNumber": plate},
-                        headers={"Content-Type":"application/json"}, timeout=15)
+        r=http_client.post("summons", SUMMONS_API_URL, json={"vehicleNumber": plate},
+                           headers={"Content-Type":"application/json"})
         if r.status_code in (200,201): return jsonify(r.json()), 200
         return jsonify({"error":f"Summons API {r.status_code}"}), 502
     except requests.RequestException as e:
@@ -93,14 +99,19 @@ def gps_logs():
 
 @app.route("/api/reports/detected-plates", methods=["GET"])
 def report_detected():
+    fmt=request.args.get("format","xlsx")
+    if fmt not in FORMATS: return jsonify({"error":"format must be csv, ndjson or xlsx"}), 400
     with lock:
         if not detected_plates: return jsonify({"error":"No detected plates available"}), 400
-        df=pd.DataFrame(detected_plates)
-    out=BytesIO()
-    with pd.ExcelWriter(out, engine="xlsxwriter") as w: df.to_excel(w, index=False, sheet_name="Detected Plates")
-    out.seek(0)
-    return send_file(out,"application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                     as_attachment=True, download_name="detected_plates.xlsx")
+        rows=list(detected_plates)
+    columns=list(dict.fromkeys(k for p in rows for k in p))  # union of keys, first-seen order
+    mimetype, ext=FORMATS[fmt]
+    return Response(export_chunks(fmt, rows, columns, sheet_name="Detected Plates"), mimetype=mimetype,
+                    headers={"Content-Disposition": f'attachment; filename="detected_plates.{ext}"'})
+
+@app.route("/api/http-stats", methods=["GET"])
+def http_stats():
+    return jsonify(http_client.stats()), 200
 
 @app.route('/static/snapshots/<path:filename>')
 def serve_snapshot(filename):
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Startup cost: what `import lpr` and create_app() pay before the first request
+#
+#   python benchmarks/import_time.py --top 25 --record benchmarks/import_history.ndjson
+#
+# Runs `python -X importtime -c "import lpr"` in a fresh interpreter (so
+# nothing is cached in sys.modules), prints the slowest top-level imports by
+# cumulative time and the total, then times create_app(start_background=False)
+# in a scratch directory. --record appends one JSON line per run (date,
+# git revision, totals) so regressions show up when the file is diffed over
+# time. --repeat takes the best of N runs to smooth out disk cache noise.
+#
+# cv2 and numpy are still loaded by `import lpr`: the pipeline modules it
+# imports (frame_buffer, plate_detector, recognizers, mjpeg_broadcaster,
+# snapshot_writer) use them at module level, and the service cannot run
+# without them. They are reported on their own line so that cost stays
+# visible; only the optional modules below are expected to be absent.
+# ──────────────────────────────────────────────────────────────────────────────
+APP_TIMER = (
+    "import time; t = time.perf_counter(); import lpr; t1 = time.perf_counter(); "
+    "lpr.create_app(start_background=False); t2 = time.perf_counter(); "
+    "print(round((t1 - t) * 1000, 1), round((t2 - t1) * 1000, 1))"
+)
+
+def import_profile(module):
+    # Returns [(cumulative_us, self_us, depth, name)] from -X importtime.
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=SERVICE_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    return rows
+
+def app_timing():
+    # create_app() opens the snapshot store, offline journal and report cache
+    # relative to the working directory; run it in a scratch one so the
+    # benchmark never touches (or migrates) the real state.
+    scratch = tempfile.mkdtemp(prefix="import-bench-")
+    try:
+        result = subprocess.run([sys.executable, "-c", APP_TIMER], cwd=scratch, capture_output=True, text=True,
+                                env=dict(os.environ, PYTHONPATH=SERVICE_DIR))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+    import_ms, create_ms = result.stdout.split()[-2:]
+    return float(import_ms), float(create_ms)
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SERVICE_DIR,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="lpr")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--record", default=None, help="append a JSON line with the totals to this file")
+    args = parser.parse_args()
+
+    best = None
+    for _ in range(max(1, args.repeat)):
+        rows = import_profile(args.module)
+        total = sum(cum for cum, _, depth, _ in rows if depth == 1)
+        if best is None or total < best[0]:
+            best = (total, rows)
+    total, rows = best
+
+    top_level = sorted((r for r in rows if r[2] == 1), reverse=True)[:args.top]
+    print(f"import {args.module}: {total / 1000:.1f} ms total, {len(rows)} modules")
+    print(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+    for cumulative, self_us, _, name in top_level:
+        print(f"{cumulative / 1000:>14.1f}  {self_us / 1000:>8.1f}  {name}")
+
+    heavy = [name for name in ("reportlab", "xlsxwriter", "pandas", "gps", "picamera2")
+             if any(r[3] == name for r in rows)]
+    native = {r[3]: r[0] for r in rows if r[3] in ("cv2", "numpy")}
+    print(f"\nheavy optional modules loaded at import: {', '.join(heavy) or 'none'}")
+    print("required native modules loaded at import (cumulative, numpy nests in cv2): "
+          + (", ".join(f"{name} {us / 1000:.1f} ms" for name, us in native.items()) or "none"))
+
+    import_ms, create_ms = None, None
+    if args.module == "lpr":
+        import_ms, create_ms = app_timing()
+        print(f"wall clock: import {import_ms:.1f} ms, create_app(start_background=False) {create_ms:.1f} ms")
+
+    if args.record:
+        with open(args.record, "a") as f:
+            f.write(json.dumps({
+                "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "rev": git_rev(),
+                "python": sys.version.split()[0],
+                "module": args.module,
+                "import_ms": round(total / 1000, 1),
+                "modules": len(rows),
+                "heavy": heavy,
+                "native_ms": {name: round(us / 1000, 1) for name, us in native.items()},
+                "wall_import_ms": import_ms,
+                "create_app_ms": create_ms,
+            }) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Load test: requests/s and latency percentiles a running service sustains
+#
+#   python serve.py lpr &
+#   python benchmarks/load_test.py --url http://127.0.0.1:5001 --paths /api/status,/summons \
+#       --concurrency 16 --seconds 30 --streams 4
+#
+# N client threads hit the given paths round-robin for a fixed time over
+# keep-alive sessions; the report is per path: requests/s, p50/p95/p99/max
+# latency and non-2xx counts. --streams opens that many /video_feed
+# readers for the whole run (draining frames as a browser would), to show
+# the API numbers hold while streaming slots are busy. --login user:password
+# signs in first for routes that need a session.
+# ──────────────────────────────────────────────────────────────────────────────
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+def new_session(base, login):
+    session = requests.Session()
+    if login:
+        username, password = login.split(":", 1)
+        session.post(f"{base}/login", data={"username": username, "password": password}, timeout=10)
+    return session
+
+def client(base, paths, deadline, login, offset, results, lock):
+    session = new_session(base, login)
+    local = {path: ([], 0) for path in paths}
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            ok = session.get(base + path, timeout=30).status_code < 300
+        except requests.RequestException:
+            ok = False
+        latencies, errors = local[path]
+        latencies.append(time.perf_counter() - started)
+        local[path] = (latencies, errors + (not ok))
+    with lock:
+        for path, (latencies, errors) in local.items():
+            results[path][0].extend(latencies)
+            results[path][1] += errors
+
+def stream_reader(base, path, deadline, login, counters, lock):
+    session = new_session(base, login)
+    try:
+        with session.get(base + path, stream=True, timeout=30) as resp:
+            with lock:
+                counters["status"][resp.status_code] = counters["status"].get(resp.status_code, 0) + 1
+            if resp.status_code != 200:
+                return
+            for chunk in resp.iter_content(64 * 1024):
+                with lock:
+                    counters["bytes"] += len(chunk)
+                if time.perf_counter() >= deadline:
+                    return
+    except requests.RequestException:
+        with lock:
+            counters["errors"] += 1
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:5001")
+    parser.add_argument("--paths", default="/api/status,/summons,/api/lpr-stats")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--streams", type=int, default=0)
+    parser.add_argument("--stream-path", default="/video_feed")
+    parser.add_argument("--login", default=None, help="user:password")
+    args = parser.parse_args()
+
+    base = args.url.rstrip("/")
+    paths = [p.strip() for p in args.paths.split(",") if p.strip()]
+    results = {path: [[], 0] for path in paths}
+    counters = {"bytes": 0, "errors": 0, "status": {}}
+    lock = threading.Lock()
+
+    started = time.perf_counter()
+    deadline = started + args.seconds
+    streams = [threading.Thread(target=stream_reader, args=(base, args.stream_path, deadline, args.login,
+                                                            counters, lock), daemon=True)
+               for _ in range(args.streams)]
+    for t in streams:
+        t.start()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for n in range(args.concurrency):
+            pool.submit(client, base, paths, deadline, args.login, n, results, lock)
+    elapsed = time.perf_counter() - started
+    for t in streams:
+        t.join(5)
+
+    print(f"{base}: {args.concurrency} clients, {args.streams} streams, {elapsed:.1f} s")
+    print(f"{'path':<28} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'non-2xx':>8}")
+    all_latencies, all_errors = [], 0
+    for path, (latencies, errors) in results.items():
+        latencies.sort()
+        all_latencies.extend(latencies)
+        all_errors += errors
+        print(f"{path:<28} {len(latencies) / elapsed:>8.1f} {percentile(latencies, 50) * 1000:>8.1f} "
+              f"{percentile(latencies, 95) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f} "
+              f"{(latencies[-1] if latencies else 0) * 1000:>8.1f} {errors:>8}")
+    all_latencies.sort()
+    print(f"{'total':<28} {len(all_latencies) / elapsed:>8.1f} {percentile(all_latencies, 50) * 1000:>8.1f} "
+          f"{percentile(all_latencies, 95) * 1000:>8.1f} {percentile(all_latencies, 99) * 1000:>8.1f} "
+          f"{(all_latencies[-1] if all_latencies else 0) * 1000:>8.1f} {all_errors:>8}")
+    if args.streams:
+        mb = counters["bytes"] / (1 << 20)
+        print(f"streams {args.stream_path}: status {counters['status']}, {mb:.1f} MB read "
+              f"({mb / elapsed:.2f} MB/s), {counters['errors']} errors")
+
+if __name__ == "__main__":
+    main()
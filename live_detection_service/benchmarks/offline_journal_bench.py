@@ -0,0 +1,100 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from offline_journal import OfflineJournal  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Offline queue benchmark: per-item cost as the backlog grows
+#
+#   python benchmarks/offline_journal_bench.py --items 100000
+#
+# Appends N GPS-sized records and prints the mean append cost for each 10%
+# slice of the run; with an append-only journal the numbers stay flat. The
+# legacy "load JSON, append, rewrite" queue is measured on a much smaller N
+# for comparison, since its cost grows with every queued item.
+# ──────────────────────────────────────────────────────────────────────────────
+SAMPLE = {"type": "gps", "data": {"plate": "VMD9454", "latitude": 3.139003, "longitude": 101.686855,
+                                  "speed": 12.5, "time": "2025-08-07 10:15:00"}}
+
+def bench_journal(n, fsync, slices=10):
+    tmp = tempfile.mkdtemp(prefix="journal-bench-")
+    try:
+        journal = OfflineJournal(tmp, fsync=fsync)
+        step = max(1, n // slices)
+        rows = []
+        started = time.perf_counter()
+        for i in range(n):
+            journal.append(SAMPLE)
+            if (i + 1) % step == 0:
+                now = time.perf_counter()
+                rows.append((i + 1, (now - started) / step * 1e6))
+                started = now
+        journal.flush()
+
+        drain_started = time.perf_counter()
+        drained = 0
+        while True:
+            batch = journal.read_batch(500)
+            if not batch.items:
+                break
+            drained += len(batch)
+            journal.ack(batch)
+        drain_us = (time.perf_counter() - drain_started) / max(1, drained) * 1e6
+        journal.close()
+        return rows, drain_us
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def bench_legacy(n, slices=5):
+    tmp = tempfile.mkdtemp(prefix="legacy-bench-")
+    path = os.path.join(tmp, "offline_queue.json")
+    try:
+        step = max(1, n // slices)
+        rows = []
+        started = time.perf_counter()
+        for i in range(n):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = []
+            data.append(SAMPLE)
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+            if (i + 1) % step == 0:
+                now = time.perf_counter()
+                rows.append((i + 1, (now - started) / step * 1e6))
+                started = now
+        return rows
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--fsync", default="interval", choices=["always", "interval", "never"])
+    parser.add_argument("--legacy-items", type=int, default=2_000)
+    args = parser.parse_args()
+
+    rows, drain_us = bench_journal(args.items, args.fsync)
+    print(f"journal (fsync={args.fsync}), {args.items} items")
+    print(f"{'queued':>10}  {'append us/item':>15}")
+    for queued, us in rows:
+        print(f"{queued:>10}  {us:>15.1f}")
+    print(f"drain: {drain_us:.1f} us/item\n")
+
+    if args.legacy_items:
+        print(f"legacy JSON rewrite, {args.legacy_items} items")
+        print(f"{'queued':>10}  {'append us/item':>15}")
+        for queued, us in bench_legacy(args.legacy_items):
+            print(f"{queued:>10}  {us:>15.1f}")
+
+if __name__ == "__main__":
+    main()
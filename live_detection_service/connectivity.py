@@ -0,0 +1,90 @@
+from __future__ import annotations
+import socket
+import threading
+import time
+from collections import deque
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Background connectivity monitor
+# ──────────────────────────────────────────────────────────────────────────────
+class ConnectivityMonitor:
+    # Probes host:port on its own thread and keeps the result in memory, so
+    # callers read `online` without touching the network. Probes run faster
+    # while offline to notice the link coming back quickly. Callbacks
+    # registered with on_reconnect() fire on every offline -> online edge.
+    def __init__(self, host="8.8.8.8", port=53, timeout=3.0, interval=15.0, offline_interval=5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.interval = interval
+        self.offline_interval = offline_interval
+        self.online = False
+        self.known = False  # becomes True after the first probe
+        self.last_probe = None
+        self.last_change = None
+        self.probes = 0
+        self.transitions = deque(maxlen=50)
+        self._callbacks = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def on_reconnect(self, callback):
+        self._callbacks.append(callback)
+
+    def probe(self) -> bool:
+        # no socket.setdefaulttimeout(): the timeout applies to this socket only
+        try:
+            with socket.create_connection((self.host, self.port), timeout=self.timeout):
+                return True
+        except OSError:
+            return False
+
+    def check_now(self):
+        # Ask for an immediate re-probe, e.g. after a request failed.
+        self._wake.set()
+
+    def _set_state(self, online: bool):
+        now = time.time()
+        self.last_probe = now
+        self.probes += 1
+        was_online, was_known = self.online, self.known
+        self.online, self.known = online, True
+        if was_known and was_online == online:
+            return
+        self.last_change = now
+        self.transitions.append({"time": now, "online": online})
+        print(f"Connectivity: {'online' if online else 'offline'}")
+        if online:
+            for cb in list(self._callbacks):
+                try:
+                    cb()
+                except Exception as e:
+                    print("Reconnect callback failed:", e)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._set_state(self.probe())
+            wait = self.interval if self.online else self.offline_interval
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self) -> dict:
+        return {
+            "status": "online" if self.online else "offline",
+            "known": self.known,
+            "since": self.last_change,
+            "last_probe": self.last_probe,
+            "probes": self.probes,
+            "transitions": list(self.transitions)[-10:],
+        }
@@ -0,0 +1,194 @@
+from __future__ import annotations
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Database connection pool
+# ──────────────────────────────────────────────────────────────────────────────
+# Kept dependency-free (the caller passes a connect() factory) so the same
+# file serves both services. live_detection_service/db_pool.py is the source;
+# dashboard_service/db_pool.py is a vendored byte-for-byte copy (the two are
+# deployed separately), checked by dashboard_service/tests/test_vendored_modules.py.
+# Edit the source, then copy it over.
+
+class PoolTimeout(Exception):
+    pass
+
+class _Pooled:
+    __slots__ = ("conn", "created", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created = self.last_used = time.time()
+
+class ConnectionPool:
+    # Connections are handed out with `with pool.connection() as conn:` and
+    # always returned, even when the block raises. Open transactions are
+    # rolled back on release so a reused connection never sees a stale
+    # snapshot. Connections idle longer than health_check_after are pinged
+    # before reuse; connections older than max_lifetime are replaced.
+    def __init__(self, connect, min_size=1, max_size=8, max_lifetime=3600.0,
+                 health_check_after=30.0, acquire_timeout=10.0):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(1, max_size)
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self._idle = deque()
+        self._open = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self.created = 0
+        self.destroyed = 0
+        self.acquires = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.failed_health_checks = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def warm(self):
+        # Opens min_size connections in the background; failures are ignored
+        # (the database may not be up yet) and retried on first use.
+        def fill():
+            held = []
+            try:
+                for _ in range(self.min_size):
+                    held.append(self._acquire())
+            except Exception as e:
+                print("DB pool warm-up failed:", e)
+            for item in held:
+                self._release(item, broken=False)
+        threading.Thread(target=fill, daemon=True).start()
+        return self
+
+    @contextmanager
+    def connection(self):
+        item = self._acquire()
+        try:
+            yield item.conn
+        except BaseException:
+            self._release(item, broken=not self._reset(item.conn))
+            raise
+        else:
+            self._release(item, broken=not self._reset(item.conn))
+
+    def _acquire(self) -> _Pooled:
+        started = time.time()
+        deadline = started + self.acquire_timeout
+        waited = False
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("pool is closed")
+                item = None
+                while not self._idle and self._open >= self.max_size:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(f"no DB connection free after {self.acquire_timeout}s")
+                    waited = True
+                    self._cond.wait(remaining)
+                if self._idle:
+                    item = self._idle.pop()  # LIFO: reuse the warmest connection
+                else:
+                    self._open += 1          # reserve a slot, connect outside the lock
+                self._in_use += 1
+
+            try:
+                if item is None:
+                    item = _Pooled(self._connect())
+                    self.created += 1
+                elif not self._usable(item):
+                    self._discard(item)
+                    continue
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+
+            waited_for = time.time() - started
+            with self._cond:
+                self.acquires += 1
+                if waited:
+                    self.waits += 1
+                self.wait_time += waited_for
+                self.max_wait_time = max(self.max_wait_time, waited_for)
+            return item
+
+    def _usable(self, item) -> bool:
+        now = time.time()
+        if now - item.created > self.max_lifetime:
+            return False
+        if now - item.last_used > self.health_check_after:
+            try:
+                item.conn.ping(reconnect=False)
+            except Exception:
+                self.failed_health_checks += 1
+                return False
+        return True
+
+    @staticmethod
+    def _reset(conn) -> bool:
+        try:
+            if not conn.get_autocommit():
+                conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _release(self, item, broken):
+        item.last_used = time.time()
+        expired = item.last_used - item.created > self.max_lifetime
+        with self._cond:
+            self._in_use -= 1
+            if not (broken or expired or self._closed):
+                self._idle.append(item)
+                self._cond.notify()
+                return
+        self._discard(item, in_use=False)
+
+    def _discard(self, item, in_use=True):
+        try:
+            item.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._open -= 1
+            if in_use:
+                self._in_use -= 1
+            self.destroyed += 1
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for item in idle:
+            self._discard(item, in_use=False)
+
+    def stats(self) -> dict:
+        with self._cond:
+            acquires = self.acquires
+            return {
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "created": self.created,
+                "destroyed": self.destroyed,
+                "acquires": acquires,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "failed_health_checks": self.failed_health_checks,
+                "avg_wait_ms": round(1000 * self.wait_time / acquires, 2) if acquires else 0.0,
+                "max_wait_ms": round(1000 * self.max_wait_time, 2),
+            }
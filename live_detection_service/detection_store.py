@@ -0,0 +1,123 @@
+from __future__ import annotations
+import sys
+import threading
+import time
+from collections import deque
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Bounded in-memory detection store
+# ──────────────────────────────────────────────────────────────────────────────
+class DetectionStore:
+    # Detections are kept in insertion order in a ring limited by max_items
+    # and max_age (seconds, 0 = no age limit), plus a dict from plate to its
+    # latest detection. Membership and latest-status lookups are O(1) no
+    # matter how long the shift has been running. Evicting an old sighting
+    # leaves the index alone if the same plate was seen again since.
+    def __init__(self, max_items=5000, max_age=12 * 3600):
+        self.max_items = max(1, int(max_items))
+        self.max_age = max_age
+        self._ring = deque()   # (seq, added_at, size, info), oldest first
+        self._latest = {}      # plate -> (seq, info)
+        self._seq = 0
+        self._bytes = 0
+        self.version = 0       # bumped on every change; keys caches of derived data
+        self._lock = threading.Lock()
+        self.added = 0
+        self.evicted = 0
+
+    def add(self, info: dict):
+        plate = info.get("plate", "")
+        size = _approx_size(info)
+        with self._lock:
+            self._seq += 1
+            self._ring.append((self._seq, time.time(), size, info))
+            self._bytes += size
+            if plate:
+                self._latest[plate] = (self._seq, info)
+            self.added += 1
+            self.version += 1
+            self._evict(time.time())
+
+    def _evict(self, now):
+        # caller holds self._lock
+        while self._ring and (len(self._ring) > self.max_items
+                              or (self.max_age and now - self._ring[0][1] > self.max_age)):
+            seq, _, size, info = self._ring.popleft()
+            self._bytes -= size
+            self.evicted += 1
+            self.version += 1
+            plate = info.get("plate", "")
+            current = self._latest.get(plate)
+            if current is not None and current[0] == seq:
+                del self._latest[plate]
+
+    def __contains__(self, plate) -> bool:
+        with self._lock:
+            self._evict(time.time())
+            return plate in self._latest
+
+    def latest(self, plate):
+        with self._lock:
+            self._evict(time.time())
+            entry = self._latest.get(plate)
+            return entry[1] if entry else None
+
+    def last(self):
+        # most recent detection of any plate
+        with self._lock:
+            return self._ring[-1][3] if self._ring else None
+
+    def latest_by_plate(self) -> dict:
+        with self._lock:
+            self._evict(time.time())
+            return {plate: info for plate, (_, info) in self._latest.items()}
+
+    def items(self) -> list:
+        # oldest first; a copy, safe to iterate without the lock
+        with self._lock:
+            self._evict(time.time())
+            return [entry[3] for entry in self._ring]
+
+    def snapshot(self):
+        # (version, items) taken together, for caches keyed by version
+        with self._lock:
+            self._evict(time.time())
+            return self.version, [entry[3] for entry in self._ring]
+
+    def newest_first(self) -> list:
+        with self._lock:
+            self._evict(time.time())
+            return [entry[3] for entry in reversed(self._ring)]
+
+    def clear(self):
+        with self._lock:
+            self._ring.clear()
+            self._latest.clear()
+            self._bytes = 0
+            self.version += 1
+
+    def __len__(self):
+        return len(self._ring)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "detections": len(self._ring),
+                "plates": len(self._latest),
+                "max_items": self.max_items,
+                "max_age_sec": self.max_age,
+                "added": self.added,
+                "evicted": self.evicted,
+                "approx_bytes": self._bytes,
+            }
+
+def _approx_size(value, depth=0) -> int:
+    # Shallow-recursive sys.getsizeof; good enough to watch the trend.
+    size = sys.getsizeof(value)
+    if depth > 3:
+        return size
+    if isinstance(value, dict):
+        size += sum(_approx_size(k, depth + 1) + _approx_size(v, depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_approx_size(v, depth + 1) for v in value)
+    return size
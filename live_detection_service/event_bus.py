@@ -0,0 +1,118 @@
+from __future__ import annotations
+import json
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+# ──────────────────────────────────────────────────────────────────────────────
+# In-process pub/sub bus + Server-Sent Events stream
+# ──────────────────────────────────────────────────────────────────────────────
+# Kept dependency-free so the same file serves both services.
+# live_detection_service/event_bus.py is the source; dashboard_service/event_bus.py
+# is a vendored byte-for-byte copy (the two are deployed separately), checked
+# by dashboard_service/tests/test_vendored_modules.py. Edit the source, then
+# copy it over.
+#
+# Each published event is serialized to its SSE frame exactly once and kept
+# in a bounded replay ring with consecutive ids. Subscribers hold no queue of
+# their own, only the last id they sent, so a publish costs the same with 1
+# or 100 viewers and a slow viewer cannot grow memory. A viewer that falls
+# further behind than the ring (or reconnects with a Last-Event-ID that has
+# already been evicted) is sent a `reset` event and should reload in full.
+
+class EventBus:
+    def __init__(self, replay=1000, max_subscribers=50):
+        self._events = deque(maxlen=max(1, replay))  # (id, frame)
+        self._next_id = 1
+        self._cond = threading.Condition()
+        self.max_subscribers = max_subscribers
+        self.subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self.resets = 0
+        self.rejected = 0
+        self.by_type = {}
+
+    def publish(self, event: str, data) -> int:
+        payload = json.dumps(data, separators=(",", ":"), default=str)
+        with self._cond:
+            event_id = self._next_id
+            self._next_id += 1
+            self._events.append((event_id, f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n"))
+            self.published += 1
+            self.by_type[event] = self.by_type.get(event, 0) + 1
+            self._cond.notify_all()
+        return event_id
+
+    @property
+    def last_id(self) -> int:
+        return self._next_id - 1
+
+    def _since(self, last_id):
+        # caller holds self._cond; returns (frames, new last id, reset?)
+        if not self._events or last_id >= self.last_id:
+            return [], last_id, False
+        oldest = self._events[0][0]
+        if last_id < oldest - 1:
+            return [], self.last_id, True
+        frames = [frame for _, frame in islice(self._events, last_id - oldest + 1, None)]
+        return frames, self.last_id, False
+
+    def wait(self, last_id, timeout):
+        with self._cond:
+            frames, new_last, reset = self._since(last_id)
+            if not frames and not reset:
+                self._cond.wait(timeout)
+                frames, new_last, reset = self._since(last_id)
+            return frames, new_last, reset
+
+    def try_subscribe(self) -> bool:
+        with self._cond:
+            if self.subscribers >= self.max_subscribers:
+                self.rejected += 1
+                return False
+            self.subscribers += 1
+            return True
+
+    def unsubscribe(self):
+        with self._cond:
+            self.subscribers = max(0, self.subscribers - 1)
+
+    def stream(self, last_event_id=None, heartbeat=15.0, retry_ms=3000, stop=None):
+        # SSE body generator. Pair try_subscribe() with unsubscribe() in the
+        # response's close hook: a generator that never started has no
+        # finally to run. last_event_id=None starts with new events only.
+        # The heartbeat is also what notices a client that went away.
+        with self._cond:
+            if last_event_id is None or last_event_id > self.last_id:
+                last_id = self.last_id
+            else:
+                last_id = last_event_id
+        yield f"retry: {retry_ms}\nid: {last_id}\n\n"
+        while stop is None or not stop.is_set():
+            frames, last_id, reset = self.wait(last_id, heartbeat)
+            if reset:
+                with self._cond:
+                    self.resets += 1
+                yield f"id: {last_id}\nevent: reset\ndata: {{}}\n\n"
+            elif frames:
+                with self._cond:
+                    self.delivered += len(frames)
+                yield "".join(frames)
+            else:
+                yield f": keepalive {int(time.time())}\n\n"
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "subscribers": self.subscribers,
+                "max_subscribers": self.max_subscribers,
+                "last_id": self.last_id,
+                "replay_buffered": len(self._events),
+                "published": self.published,
+                "delivered": self.delivered,
+                "resets": self.resets,
+                "rejected": self.rejected,
+                "by_type": dict(self.by_type),
+            }
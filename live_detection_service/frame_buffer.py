@@ -0,0 +1,122 @@
+from __future__ import annotations
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Fixed-size frame ring buffer
+# ──────────────────────────────────────────────────────────────────────────────
+class FrameRingBuffer:
+    # All slots are allocated once up front; the capture thread copies each
+    # frame into the next slot so steady-state capture never allocates.
+    def __init__(self, slots: int, shape: tuple, dtype=np.uint8):
+        self.slots = max(2, int(slots))
+        self.shape = tuple(shape)
+        self._frames = np.empty((self.slots,) + self.shape, dtype=dtype)
+        self._stamps = [0.0] * self.slots
+        self._seq = 0  # number of frames written so far
+        self._cond = threading.Condition()
+
+    def write(self, frame) -> int:
+        if frame.shape != self.shape:
+            frame = cv2.resize(frame, (self.shape[1], self.shape[0]))
+        with self._cond:
+            idx = self._seq % self.slots
+            np.copyto(self._frames[idx], frame)
+            self._stamps[idx] = time.time()
+            self._seq += 1
+            self._cond.notify_all()
+            return self._seq
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def get(self, seq: int):
+        # Returns a private copy of frame `seq`, or None if it has been overwritten.
+        with self._cond:
+            if seq <= 0 or seq > self._seq or self._seq - seq >= self.slots:
+                return None
+            return self._frames[(seq - 1) % self.slots].copy()
+
+    def latest(self):
+        with self._cond:
+            if not self._seq:
+                return 0, None
+            return self._seq, self._frames[(self._seq - 1) % self.slots].copy()
+
+    def wait_newer(self, seq: int, timeout: float | None = None):
+        # Blocks until a frame newer than `seq` exists; returns (seq, frame copy).
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > seq, timeout=timeout):
+                return seq, None
+            return self._seq, self._frames[(self._seq - 1) % self.slots].copy()
+
+    def stats(self) -> dict:
+        return {
+            "slots": self.slots,
+            "frames_written": self._seq,
+            "buffer_bytes": int(self._frames.nbytes),
+        }
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Motion / scene-change gate
+# ──────────────────────────────────────────────────────────────────────────────
+class MotionGate:
+    # Compares a tiny grayscale thumbnail of each frame against the last frame
+    # that was let through. Only frames whose scene changed enough are passed
+    # on to recognition, so a parked car stops paying for identical frames.
+    def __init__(self, size=(80, 60), pixel_threshold=25, min_changed_ratio=0.02,
+                 hold_seconds=1.5, max_idle_seconds=0.0):
+        self.size = tuple(size)
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_ratio = min_changed_ratio
+        self.hold_seconds = hold_seconds          # keep passing frames briefly after motion
+        self.max_idle_seconds = max_idle_seconds  # 0 = never force a frame through
+        self._reference = None
+        self._last_motion = 0.0
+        self._last_pass = 0.0
+        self.frames_seen = 0
+        self.frames_passed = 0
+        self.last_changed_ratio = 0.0
+
+    def _thumb(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def should_process(self, frame, now: float | None = None) -> bool:
+        now = now if now is not None else time.time()
+        self.frames_seen += 1
+        thumb = self._thumb(frame)
+
+        if self._reference is None:
+            changed = 1.0
+        else:
+            diff = cv2.absdiff(thumb, self._reference)
+            changed = float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+        self.last_changed_ratio = changed
+
+        if changed >= self.min_changed_ratio:
+            self._last_motion = now
+        passed = (
+            now - self._last_motion <= self.hold_seconds
+            or (self.max_idle_seconds and now - self._last_pass >= self.max_idle_seconds)
+        )
+        if passed:
+            self._reference = thumb
+            self._last_pass = now
+            self.frames_passed += 1
+        return bool(passed)
+
+    def stats(self) -> dict:
+        seen = self.frames_seen
+        return {
+            "frames_seen": seen,
+            "frames_passed": self.frames_passed,
+            "pass_ratio": round(self.frames_passed / seen, 3) if seen else 0.0,
+            "last_changed_ratio": round(self.last_changed_ratio, 4),
+        }
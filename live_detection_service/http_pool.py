@@ -0,0 +1,111 @@
+from __future__ import annotations
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import StageTimer
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Shared outbound HTTP client (keep-alive, per-host pools, retries)
+# ──────────────────────────────────────────────────────────────────────────────
+class HttpClient:
+    # One requests.Session for the whole process: urllib3 keeps a connection
+    # pool per host, so repeated calls to the same API reuse the TCP/TLS
+    # connection instead of handshaking again over the cellular link.
+    #
+    # Retries cover connection failures for every method (nothing was sent
+    # yet) and 502/503/504 for idempotent methods only; POSTs are never
+    # replayed after the server may have seen them.
+    #
+    # With a RateLimiter every request first takes a token from its
+    # endpoint's bucket, and a 429 pauses that bucket for Retry-After.
+    def __init__(self, pool_connections=8, pool_maxsize=8, retries=2, backoff=0.5,
+                 timeouts=None, default_timeout=(5.0, 15.0), limiter=None):
+        self.timeouts = dict(timeouts or {})
+        self.limiter = limiter
+        self.default_timeout = default_timeout
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                    max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self.latency = StageTimer()
+        self._lock = threading.Lock()
+        self._counts = {}  # endpoint -> {"requests": n, "errors": n}
+
+    def request(self, endpoint: str, method: str, url: str, **kwargs):
+        kwargs.setdefault("timeout", self.timeouts.get(endpoint, self.default_timeout))
+        if self.limiter is not None:
+            self.limiter.acquire(endpoint)
+        started = time.time()
+        ok = False
+        try:
+            response = self.session.request(method, url, **kwargs)
+            ok = True
+            if response.status_code == 429 and self.limiter is not None:
+                self.limiter.pause(endpoint, _retry_after(response.headers.get("Retry-After")))
+            return response
+        finally:
+            self.latency.record(endpoint, time.time() - started)
+            with self._lock:
+                c = self._counts.setdefault(endpoint, {"requests": 0, "errors": 0})
+                c["requests"] += 1
+                if not ok:
+                    c["errors"] += 1
+
+    def get(self, endpoint: str, url: str, **kwargs):
+        return self.request(endpoint, "GET", url, **kwargs)
+
+    def post(self, endpoint: str, url: str, **kwargs):
+        return self.request(endpoint, "POST", url, **kwargs)
+
+    def connection_stats(self) -> dict:
+        # urllib3 counts connections opened vs requests sent per host pool;
+        # the difference is how many requests rode on a reused connection.
+        hosts = {}
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened = getattr(pool, "num_connections", 0)
+            sent = getattr(pool, "num_requests", 0)
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "connections_opened": opened,
+                "requests": sent,
+                "reused": max(0, sent - opened),
+                "reuse_ratio": round(max(0, sent - opened) / sent, 3) if sent else 0.0,
+            }
+        return hosts
+
+    def stats(self) -> dict:
+        latency = self.latency.snapshot()
+        with self._lock:
+            endpoints = {name: dict(c, **latency.get(name, {})) for name, c in self._counts.items()}
+        return {
+            "endpoints": endpoints,
+            "hosts": self.connection_stats(),
+            "rate_limits": self.limiter.stats() if self.limiter is not None else {},
+        }
+
+    def close(self):
+        self.session.close()
+
+def _retry_after(value, default=1.0) -> float:
+    # Retry-After is seconds or an HTTP date; only the seconds form is common
+    try:
+        return min(60.0, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return default
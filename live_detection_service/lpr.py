@@ -1,27 +1,41 @@
 from __future__ import annotations
-from flask import Flask, render_template, Response, jsonify, request, redirect, url_for, session, send_file
+from flask import Flask, Blueprint, current_app, render_template, Response, jsonify, request, redirect, url_for, session, send_file, send_from_directory
 import platform
 import os
-import cv2
 import time
 import threading
 import requests
-from queue import Queue
-import pandas as pd
-from io import BytesIO
-import gps
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import Table, TableStyle, SimpleDocTemplate, Paragraph, Image
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from datetime import datetime
-import numpy as np
+from queue import Queue, Full, Empty
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import pymysql
-from pathlib import Path
 import json
-import socket
+import gzip
 import subprocess
+import atexit
 from functools import wraps
+from contextlib import ExitStack
+
+from frame_buffer import FrameRingBuffer, MotionGate
+from mjpeg_broadcaster import MjpegBroadcaster
+from plate_detector import PlateCandidateFinder
+from recognizers import CloudRecognizer, LocalOcrRecognizer, RecognitionPolicy
+from plate_tracker import PlateTracker
+from detection_store import DetectionStore
+from snapshot_writer import SnapshotWriter
+from snapshot_store import SnapshotStore
+import reports
+from reports import ReportEngine
+import exporters
+from rate_limiter import RateLimiter
+from metrics import StageTimer
+from ttl_cache import TTLCache
+from summons_view import SummonsView
+from http_pool import HttpClient
+from connectivity import ConnectivityMonitor
+from offline_journal import OfflineJournal
+from db_pool import ConnectionPool
+from event_bus import EventBus
 
 # 🔐 env + hashing
 from dotenv import load_dotenv
@@ -29,17 +43,6 @@ from werkzeug.security import check_password_hash
 
 load_dotenv()  # reads .env if present
 
-# ──────────────────────────────────────────────────────────────────────────────
-# Camera (Linux only)
-# ──────────────────────────────────────────────────────────────────────────────
-if platform.system() == "Linux":
-    try:
-        from picamera2 import Picamera2
-    except Exception:
-        Picamera2 = None
-else:
-    Picamera2 = None
-
 # ──────────────────────────────────────────────────────────────────────────────
 # Config/Env (🔐 no secrets hard-coded)
 # ──────────────────────────────────────────────────────────────────────────────
@@ -49,6 +52,18 @@ def _env_bool(key: str, default: bool) -> bool:
         return default
     return v.lower() in ("1", "true", "yes", "y", "on")
 
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int(os.getenv(key, default))
+    except (TypeError, ValueError):
+        return default
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, default))
+    except (TypeError, ValueError):
+        return default
+
 SECRET_KEY = os.getenv("SECRET_KEY") or os.urandom(24)
 
 DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -69,40 +84,224 @@ PAYMENT_QR_API = os.getenv("PAYMENT_QR_API", "http://localhost:5000/api/payment/
 PAYMENT_QR_TOKEN = os.getenv("PAYMENT_QR_TOKEN", "")
 
 DASHBOARD_URLS = [u.strip() for u in os.getenv("DASHBOARD_URLS", "").split(",") if u.strip()]
-OFFLINE_FILE = os.getenv("OFFLINE_FILE", "offline_queue.json")
+OFFLINE_FILE = os.getenv("OFFLINE_FILE", "offline_queue.json")  # legacy JSON queue, imported once
+OFFLINE_DIR = os.getenv("OFFLINE_DIR", "offline_queue")
+OFFLINE_FSYNC = os.getenv("OFFLINE_FSYNC", "interval")  # always | interval | never
+OFFLINE_FSYNC_INTERVAL = _env_float("OFFLINE_FSYNC_INTERVAL", 1.0)
+OFFLINE_SEGMENT_BYTES = _env_int("OFFLINE_SEGMENT_BYTES", 1 << 20)
+OFFLINE_MAX_BYTES = _env_int("OFFLINE_MAX_BYTES", 256 << 20)
+OFFLINE_BATCH_SIZE = _env_int("OFFLINE_BATCH_SIZE", 500)
+OFFLINE_BATCH_BYTES = _env_int("OFFLINE_BATCH_BYTES", 512 << 10)  # uncompressed
 
 SCAN_CAR_PLATE = os.getenv("SCAN_CAR_PLATE", "VMD9454")
 
 # 🔐 Optional shared token for ingest endpoints
 SHARED_INGEST_TOKEN = os.getenv("SHARED_INGEST_TOKEN", "")
 
+# DB connection pool
+DB_POOL_MIN = _env_int("DB_POOL_MIN", 1)
+DB_POOL_MAX = _env_int("DB_POOL_MAX", 6)
+DB_POOL_MAX_LIFETIME = _env_float("DB_POOL_MAX_LIFETIME", 3600)
+DB_POOL_ACQUIRE_TIMEOUT = _env_float("DB_POOL_ACQUIRE_TIMEOUT", 10)
+
+# Capture / motion gating (recognition no longer depends on /video_feed viewers)
+FRAME_WIDTH = _env_int("FRAME_WIDTH", 640)
+FRAME_HEIGHT = _env_int("FRAME_HEIGHT", 480)
+FRAME_RING_SLOTS = _env_int("FRAME_RING_SLOTS", 8)
+CAPTURE_FPS = _env_float("CAPTURE_FPS", 15.0)
+MOTION_GATE_ENABLED = _env_bool("MOTION_GATE_ENABLED", True)
+MOTION_PIXEL_THRESHOLD = _env_int("MOTION_PIXEL_THRESHOLD", 25)
+MOTION_MIN_CHANGED_RATIO = _env_float("MOTION_MIN_CHANGED_RATIO", 0.02)
+MOTION_HOLD_SECONDS = _env_float("MOTION_HOLD_SECONDS", 1.5)
+MOTION_MAX_IDLE_SECONDS = _env_float("MOTION_MAX_IDLE_SECONDS", 0.0)
+
+# Local plate pre-detector: only frames with plate-like regions are uploaded,
+# as tight high-quality crops. Every PLATE_AUDIT_EVERY-th frame (0 = never) is
+# still uploaded whole so misses by the detector show up in /api/lpr-stats.
+PLATE_DETECTOR_ENABLED = _env_bool("PLATE_DETECTOR_ENABLED", True)
+PLATE_MAX_CANDIDATES = _env_int("PLATE_MAX_CANDIDATES", 3)
+PLATE_CROP_JPEG_QUALITY = _env_int("PLATE_CROP_JPEG_QUALITY", 90)
+PLATE_FULL_JPEG_QUALITY = _env_int("PLATE_FULL_JPEG_QUALITY", 25)
+PLATE_AUDIT_EVERY = _env_int("PLATE_AUDIT_EVERY", 50)
+
+# Recognizer backends: cloud (Plate Recognizer) and/or a local ONNX character
+# classifier. cloud = cloud, local only when offline / no token;
+# local = never upload; local_first = escalate reads below LOCAL_ESCALATE_BELOW.
+RECOGNIZER_MODE = os.getenv("RECOGNIZER_MODE", "cloud")
+LOCAL_OCR_MODEL = os.getenv("LOCAL_OCR_MODEL", "")
+LOCAL_OCR_CHARSET = os.getenv("LOCAL_OCR_CHARSET", "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+LOCAL_OCR_INPUT_WIDTH = _env_int("LOCAL_OCR_INPUT_WIDTH", 28)
+LOCAL_OCR_INPUT_HEIGHT = _env_int("LOCAL_OCR_INPUT_HEIGHT", 28)
+LOCAL_ESCALATE_BELOW = _env_float("LOCAL_ESCALATE_BELOW", 0.85)
+LOCAL_MIN_SCORE = _env_float("LOCAL_MIN_SCORE", 0.5)
+
+# Multi-frame voting: reads of one plate are grouped into a track (edit
+# distance <= TRACK_MAX_EDIT_DISTANCE, within TRACK_MAX_MOVE_M) and a single
+# consolidated detection is emitted once the track is idle for
+# TRACK_IDLE_SECONDS or has been open TRACK_MAX_SECONDS.
+TRACK_MAX_EDIT_DISTANCE = _env_int("TRACK_MAX_EDIT_DISTANCE", 1)
+TRACK_IDLE_SECONDS = _env_float("TRACK_IDLE_SECONDS", 2.0)
+TRACK_MAX_SECONDS = _env_float("TRACK_MAX_SECONDS", 10.0)
+TRACK_MAX_MOVE_M = _env_float("TRACK_MAX_MOVE_M", 50.0)
+TRACK_MIN_READS = _env_int("TRACK_MIN_READS", 1)
+
+# /video_feed preview; encoded once for all viewers, independent of recognition
+PREVIEW_FPS = _env_float("PREVIEW_FPS", 10.0)
+PREVIEW_JPEG_QUALITY = _env_int("PREVIEW_JPEG_QUALITY", 70)
+PREVIEW_WIDTH = _env_int("PREVIEW_WIDTH", 0)    # 0 = capture size
+PREVIEW_HEIGHT = _env_int("PREVIEW_HEIGHT", 0)
+
+# Enrichment (parking + summons lookups) runs beside recognition, not inside it
+ENRICH_WORKERS = _env_int("ENRICH_WORKERS", 2)
+ENRICH_BACKLOG = _env_int("ENRICH_BACKLOG", 16)
+
+# Lookup cache (seconds); unpaid / "no summons" answers are cached too
+LOOKUP_CACHE_SIZE = _env_int("LOOKUP_CACHE_SIZE", 2048)
+PARKING_TTL_PAID = _env_float("PARKING_TTL_PAID", 300)
+PARKING_TTL_UNPAID = _env_float("PARKING_TTL_UNPAID", 60)
+PARKING_TTL_ERROR = _env_float("PARKING_TTL_ERROR", 10)
+SUMMONS_TTL_FOUND = _env_float("SUMMONS_TTL_FOUND", 300)
+SUMMONS_TTL_NONE = _env_float("SUMMONS_TTL_NONE", 120)
+SUMMONS_TTL_ERROR = _env_float("SUMMONS_TTL_ERROR", 10)
+SUMMONS_REFRESH_SECONDS = _env_float("SUMMONS_REFRESH_SECONDS", 60)
+
+# In-memory detections (UI, summons refresh, reports); the DB keeps the full
+# history. Oldest entries go once either limit is hit (age in seconds, 0 = none).
+DETECTION_STORE_MAX = _env_int("DETECTION_STORE_MAX", 5000)
+DETECTION_MAX_AGE = _env_float("DETECTION_MAX_AGE", 12 * 3600)
+DUPLICATE_COOLDOWN = _env_float("DUPLICATE_COOLDOWN", 10)
+
+# Snapshots are written by a background thread, with a thumbnail for list
+# views (SNAPSHOT_THUMB_WIDTH 0 = none). A full-view upload encoded at
+# SNAPSHOT_REUSE_MIN_QUALITY or better is stored as-is instead of re-encoding.
+# Reuse is opt-in: with the default PLATE_FULL_JPEG_QUALITY (25, sized for the
+# uplink) no upload qualifies and every snapshot is encoded at
+# SNAPSHOT_JPEG_QUALITY. Raise PLATE_FULL_JPEG_QUALITY to 60 or more to save
+# that encode at the cost of larger uploads (crop uploads never qualify).
+SNAPSHOT_JPEG_QUALITY = _env_int("SNAPSHOT_JPEG_QUALITY", 80)
+SNAPSHOT_THUMB_WIDTH = _env_int("SNAPSHOT_THUMB_WIDTH", 320)
+SNAPSHOT_THUMB_QUALITY = _env_int("SNAPSHOT_THUMB_QUALITY", 70)
+SNAPSHOT_QUEUE = _env_int("SNAPSHOT_QUEUE", 32)
+SNAPSHOT_REUSE_MIN_QUALITY = _env_int("SNAPSHOT_REUSE_MIN_QUALITY", 60)
+# Content-addressed on-disk store; least recently used snapshots go once the
+# budget is exceeded, and anything older than the max age (0 = no limit).
+SNAPSHOT_BUDGET_MB = _env_int("SNAPSHOT_BUDGET_MB", 2048)
+SNAPSHOT_MAX_AGE_DAYS = _env_float("SNAPSHOT_MAX_AGE_DAYS", 30)
+
+# PDF/Excel downloads are cached per data version; a request waits up to
+# REPORT_WAIT_SECONDS for a build, then gets 202 + Retry-After.
+REPORT_FOLDER = os.getenv("REPORT_FOLDER", "report_cache")
+REPORT_WAIT_SECONDS = _env_float("REPORT_WAIT_SECONDS", 5)
+REPORT_RETRY_AFTER = _env_int("REPORT_RETRY_AFTER", 2)
+
+# /api/export/detected-plates streams DB history (rows fetched per batch);
+# xlsx exports are assembled in EXPORT_TMP_DIR (default: system temp).
+EXPORT_BATCH = _env_int("EXPORT_BATCH", 1000)
+EXPORT_TMP_DIR = os.getenv("EXPORT_TMP_DIR") or None
+
+# Outbound HTTP (shared keep-alive pools); timeouts are (connect, read) seconds
+HTTP_POOL_MAXSIZE = _env_int("HTTP_POOL_MAXSIZE", 8)
+HTTP_RETRIES = _env_int("HTTP_RETRIES", 2)
+HTTP_BACKOFF = _env_float("HTTP_BACKOFF", 0.5)
+HTTP_CONNECT_TIMEOUT = _env_float("HTTP_CONNECT_TIMEOUT", 4)
+HTTP_TIMEOUTS = {
+    "plate_recognizer": (HTTP_CONNECT_TIMEOUT, _env_float("PLATE_RECOGNIZER_TIMEOUT", 30)),
+    "parking": (HTTP_CONNECT_TIMEOUT, _env_float("PARKING_TIMEOUT", 8)),
+    "summons": (HTTP_CONNECT_TIMEOUT, _env_float("SUMMONS_TIMEOUT", 8)),
+    "dashboard": (HTTP_CONNECT_TIMEOUT, _env_float("DASHBOARD_TIMEOUT", 5)),
+    "payment_qr": (HTTP_CONNECT_TIMEOUT, _env_float("PAYMENT_QR_TIMEOUT", 10)),
+}
+
+# Per-API request budgets (requests/second, burst); rate 0 = unlimited.
+# Set them to the plan limits: callers wait for a token instead of getting 429s.
+RATE_LIMITS = {
+    "plate_recognizer": (_env_float("PLATE_RECOGNIZER_RATE", 8), _env_int("PLATE_RECOGNIZER_BURST", 8)),
+    "parking": (_env_float("PARKING_RATE", 10), _env_int("PARKING_BURST", 10)),
+    "summons": (_env_float("SUMMONS_RATE", 10), _env_int("SUMMONS_BURST", 10)),
+    # the background summons refresh also takes one of these per upstream call,
+    # so it never uses more than this share of the "summons" budget
+    "summons_refresh": (_env_float("SUMMONS_REFRESH_RATE", 2), _env_int("SUMMONS_REFRESH_BURST", 1)),
+}
+
+# Connectivity probe (runs in the background; callers read cached state)
+CONNECTIVITY_HOST = os.getenv("CONNECTIVITY_HOST", "8.8.8.8")
+CONNECTIVITY_PORT = _env_int("CONNECTIVITY_PORT", 53)
+CONNECTIVITY_INTERVAL = _env_float("CONNECTIVITY_INTERVAL", 15)
+CONNECTIVITY_OFFLINE_INTERVAL = _env_float("CONNECTIVITY_OFFLINE_INTERVAL", 5)
+
+# Live push to the UI (/events, Server-Sent Events); pages poll only as a fallback
+EVENTS_REPLAY = _env_int("EVENTS_REPLAY", 500)
+EVENTS_MAX_CLIENTS = _env_int("EVENTS_MAX_CLIENTS", 16)
+EVENTS_HEARTBEAT = _env_float("EVENTS_HEARTBEAT", 15)
+
 # ──────────────────────────────────────────────────────────────────────────────
-# Flask app & security
+# Routes blueprint (the app itself is built by create_app() below)
 # ──────────────────────────────────────────────────────────────────────────────
-app = Flask(__name__)
-app.secret_key = SECRET_KEY
-app.config.update(
-    SESSION_COOKIE_SECURE=True,
-    SESSION_COOKIE_HTTPONLY=True,
-    SESSION_COOKIE_SAMESITE="Lax",
-)
+bp = Blueprint("lpr", __name__)
 
-app.config["SNAPSHOT_FOLDER"] = os.getenv("SNAPSHOT_FOLDER", "static/snapshots")
-os.makedirs(app.config["SNAPSHOT_FOLDER"], exist_ok=True)
+SNAPSHOT_FOLDER = os.getenv("SNAPSHOT_FOLDER", "static/snapshots")
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Globals
 # ──────────────────────────────────────────────────────────────────────────────
-detected_plates = []
-summons_data = []
+detections = DetectionStore(DETECTION_STORE_MAX, DETECTION_MAX_AGE)
+summons_view = SummonsView()  # replaces the per-request summons fan-out
 lock = threading.Lock()
-frame_queue = Queue(maxsize=1)
+frame_queue = Queue(maxsize=1)  # gated frames waiting for recognize_plate()
+frame_ring = FrameRingBuffer(FRAME_RING_SLOTS, (FRAME_HEIGHT, FRAME_WIDTH, 3))
+motion_gate = MotionGate(
+    pixel_threshold=MOTION_PIXEL_THRESHOLD,
+    min_changed_ratio=MOTION_MIN_CHANGED_RATIO,
+    hold_seconds=MOTION_HOLD_SECONDS,
+    max_idle_seconds=MOTION_MAX_IDLE_SECONDS,
+)
+capture_stats = {"frames_captured": 0, "frames_queued": 0, "frames_dropped": 0, "errors": 0}
+preview = MjpegBroadcaster(
+    frame_ring,
+    fps=PREVIEW_FPS,
+    quality=PREVIEW_JPEG_QUALITY,
+    size=(PREVIEW_WIDTH, PREVIEW_HEIGHT) if PREVIEW_WIDTH and PREVIEW_HEIGHT else None,
+)
+
+shutdown_event = threading.Event()
+_STOP = object()  # wakes the frame consumer on shutdown
+consumer_stats = {"frames_processed": 0, "busy_sec": 0.0, "idle_wait_sec": 0.0, "idle_cpu_sec": 0.0}
+PROCESS_STARTED = time.time()
+
+enrich_queue = Queue(maxsize=ENRICH_BACKLOG)  # recognized plates awaiting lookups
+completion_queue = Queue()                    # enriched plates awaiting persist/forward
+lookup_pool = ThreadPoolExecutor(max_workers=max(2, ENRICH_WORKERS * 2), thread_name_prefix="lookup")
+plate_tracker = PlateTracker(max_distance=TRACK_MAX_EDIT_DISTANCE, idle_seconds=TRACK_IDLE_SECONDS,
+                             max_track_seconds=TRACK_MAX_SECONDS, max_move_m=TRACK_MAX_MOVE_M,
+                             min_reads=TRACK_MIN_READS)
+stage_stats = StageTimer("recognize", "enrich_wait", "parking", "summons", "enrich", "persist")
+pipeline_stats = {"enrich_submitted": 0, "enrich_dropped": 0, "completed": 0}
 gps_logs = []
 stored_officer_id = "Unknown"
 latest_gps = {"latitude": None, "longitude": None, "last_update": None}
 
 api_stats = {"success_count": 0, "failure_count": 0, "total_time": 0.0}
-recent_plates = {}
+plate_finder = PlateCandidateFinder(max_candidates=PLATE_MAX_CANDIDATES) if PLATE_DETECTOR_ENABLED else None
+upload_stats = {"frames": 0, "skipped_no_candidates": 0, "uploads": 0, "upload_bytes": 0,
+                "audits": 0, "audit_misses": 0}
+connectivity = ConnectivityMonitor(CONNECTIVITY_HOST, CONNECTIVITY_PORT, timeout=3,
+                                   interval=CONNECTIVITY_INTERVAL,
+                                   offline_interval=CONNECTIVITY_OFFLINE_INTERVAL)
+sync_wakeup = threading.Event()  # set to flush the offline queue right away
+# On-disk state (snapshot store + writer, offline journal, report cache) is
+# opened by init_storage(), not at import.
+snapshot_store = None
+snapshots = None
+offline_journal = None
+report_engine = None
+offline_stats = {"replayed": 0, "rejected": 0, "batches": 0, "failed_batches": 0}
+rate_limiter = RateLimiter(RATE_LIMITS)
+http_client = HttpClient(pool_maxsize=HTTP_POOL_MAXSIZE, retries=HTTP_RETRIES,
+                         backoff=HTTP_BACKOFF, timeouts=HTTP_TIMEOUTS, limiter=rate_limiter)
+parking_cache = TTLCache(LOOKUP_CACHE_SIZE)
+summons_cache = TTLCache(LOOKUP_CACHE_SIZE)
+events = EventBus(replay=EVENTS_REPLAY, max_subscribers=EVENTS_MAX_CLIENTS)
+recent_plates = TTLCache(LOOKUP_CACHE_SIZE)  # plate -> last accepted, expires after the cooldown
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Utilities
@@ -113,30 +312,15 @@ def mask_plate(p: str) -> str:
     # show first 3 chars then mask
     return (p[:3] + ("*" * max(0, len(p) - 3))).upper()
 
-def is_connected(host="8.8.8.8", port=53, timeout=3):
-    try:
-        socket.setdefaulttimeout(timeout)
-        socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, port))
-        return True
-    except socket.error:
-        return False
+def is_connected():
+    # O(1): state is maintained by the background ConnectivityMonitor
+    return connectivity.online
 
 def save_offline(data):
-    path = Path(OFFLINE_FILE)
-    try:
-        if path.exists():
-            with open(path, "r") as f:
-                offline_data = json.load(f)
-        else:
-            offline_data = []
-    except json.JSONDecodeError:
-        offline_data = []
+    # O(1) append to the journal; never rewrites what is already queued
+    offline_journal.append(data)
 
-    offline_data.append(data)
-    with open(path, "w") as f:
-        json.dump(offline_data, f, indent=2)
-
-def get_db():
+def _connect_db():
     return pymysql.connect(
         host=DB_HOST,
         user=DB_USER,
@@ -145,35 +329,21 @@ def get_db():
         cursorclass=pymysql.cursors.DictCursor
     )
 
-# ──────────────────────────────────────────────────────────────────────────────
-# Throttler
-# ──────────────────────────────────────────────────────────────────────────────
-class Throttler:
-    def __init__(self, rate_limit, interval=1):
-        self.rate_limit = rate_limit
-        self.interval = interval
-        self.timestamps = []
-
-    def wait(self):
-        while True:
-            now = time.time()
-            self.timestamps = [t for t in self.timestamps if now - t < self.interval]
-            if len(self.timestamps) < self.rate_limit:
-                break
-            time.sleep(self.interval - (now - self.timestamps[0]))
-        self.timestamps.append(now)
+db_pool = ConnectionPool(_connect_db, min_size=DB_POOL_MIN, max_size=DB_POOL_MAX,
+                         max_lifetime=DB_POOL_MAX_LIFETIME, acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT)
 
-throttler = Throttler(rate_limit=8, interval=1)  # same as before
+def get_db():
+    # usage: `with get_db() as db:` — the connection always goes back to the pool
+    return db_pool.connection()
 
 def crop_plate_region(frame):
     h, w, _ = frame.shape
     return frame[int(h * 0.1):int(h * 0.99), int(w * 0.01):int(w * 0.99)]
 
-def is_duplicate_plate(plate, cooldown=10):
-    now = time.time()
-    if plate in recent_plates and now - recent_plates[plate] < cooldown:
+def is_duplicate_plate(plate, cooldown=DUPLICATE_COOLDOWN):
+    if plate in recent_plates:
         return True
-    recent_plates[plate] = now
+    recent_plates.set(plate, time.time(), ttl=cooldown)
     return False
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -182,6 +352,7 @@ def is_duplicate_plate(plate, cooldown=10):
 def gps_updater():
     global latest_gps
     try:
+        import gps  # gpsd client; only on the Pi
         session_gps = gps.gps(mode=gps.WATCH_ENABLE)
         for report in session_gps:
             if report.get('class') == 'TPV':
@@ -194,42 +365,95 @@ def gps_updater():
     except Exception as e:
         print(f"GPS updater error: {e}")
 
-threading.Thread(target=gps_updater, daemon=True).start()
+# ──────────────────────────────────────────────────────────────────────────────
+# Camera init (Linux only; called from start_services)
+# ──────────────────────────────────────────────────────────────────────────────
+picam2 = None
+
+def init_camera():
+    if platform.system() != "Linux":
+        return None
+    try:
+        from picamera2 import Picamera2
+        camera = Picamera2()
+        config = camera.create_preview_configuration(main={"size": (640, 480), "format": "RGB888"})
+        camera.configure(config)
+        camera.start()
+        return camera
+    except Exception as e:
+        print(f"Camera initialization failed: {e}")
+        return None
 
 # ──────────────────────────────────────────────────────────────────────────────
-# Camera init (Linux only)
+# Capture thread → ring buffer → motion gate → recognition queue
 # ──────────────────────────────────────────────────────────────────────────────
-try:
-    if Picamera2:
-        picam2 = Picamera2()
-        config = picam2.create_preview_configuration(main={"size": (640, 480), "format": "RGB888"})
-        picam2.configure(config)
-        picam2.start()
-    else:
-        picam2 = None
-except Exception as e:
-    print(f"Camera initialization failed: {e}")
-    picam2 = None
+def capture_loop():
+    if not picam2:
+        return
+    interval = 1.0 / CAPTURE_FPS if CAPTURE_FPS > 0 else 0
+    while not shutdown_event.is_set():
+        started = time.time()
+        try:
+            frame = picam2.capture_array()
+        except Exception as e:
+            capture_stats["errors"] += 1
+            print(f"Error capturing frame: {e}")
+            shutdown_event.wait(1)
+            continue
+
+        seq = frame_ring.write(frame)
+        capture_stats["frames_captured"] += 1
+
+        if not MOTION_GATE_ENABLED or motion_gate.should_process(frame):
+            if frame_queue.full():
+                # recognition is busy: drop the stale frame, keep the newest
+                try:
+                    frame_queue.get_nowait()
+                    capture_stats["frames_dropped"] += 1
+                except Exception:
+                    pass
+            try:
+                frame_queue.put_nowait(frame_ring.get(seq))
+                capture_stats["frames_queued"] += 1
+            except Exception:
+                capture_stats["frames_dropped"] += 1
+
+        elapsed = time.time() - started
+        if interval > elapsed:
+            shutdown_event.wait(interval - elapsed)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # External calls
 # ──────────────────────────────────────────────────────────────────────────────
 def recognize_plate(frame):
-    # Skip if token missing (fail closed)
-    if not API_TOKEN:
+    upload_stats["frames"] += 1
+    boxes = plate_finder.find(frame) if plate_finder else None
+    audit = bool(plate_finder and PLATE_AUDIT_EVERY and upload_stats["frames"] % PLATE_AUDIT_EVERY == 0)
+    if boxes == [] and not audit:
+        upload_stats["skipped_no_candidates"] += 1
         return []
-    throttler.wait()
+
+    # an audit frame is read whole, as if the detector had not run
+    results = recognizers.recognize(frame, None if audit else boxes)
+    if audit:
+        upload_stats["audits"] += 1
+        if results and not boxes:
+            upload_stats["audit_misses"] += 1  # the detector would have skipped a real plate
+    return results
+
+def upload_to_recognizer(img_bytes):
+    # Returns the Plate Recognizer results, or None when the call failed.
+    # Pacing to the plan limit happens in http_client (RATE_LIMITS).
     try:
         start_time = time.time()
-        roi = crop_plate_region(frame)
-        _, img_encoded = cv2.imencode(".jpg", roi, [int(cv2.IMWRITE_JPEG_QUALITY), 25])
-        img_bytes = img_encoded.tobytes()
+        upload_stats["uploads"] += 1
+        upload_stats["upload_bytes"] += len(img_bytes)
 
-        response = requests.post(
+        response = http_client.post(
+            "plate_recognizer",
             PLATE_RECOGNIZER_API_URL,
             files={"upload": ("image.jpg", img_bytes, "image/jpeg")},
             headers={"Authorization": f"Token {API_TOKEN}"},
-            timeout=30
         )
 
         elapsed = time.time() - start_time
@@ -240,17 +464,41 @@ def recognize_plate(frame):
             return response.json().get("results", [])
         else:
             api_stats["failure_count"] += 1
-            return []
+            return None
     except requests.exceptions.RequestException:
         api_stats["failure_count"] += 1
-        return []
+        return None
+
+recognizers = RecognitionPolicy(
+    cloud=CloudRecognizer(
+        upload_to_recognizer,
+        is_available=lambda: bool(API_TOKEN) and (connectivity.online or not connectivity.known),
+        finder=plate_finder,
+        full_view=crop_plate_region,
+        crop_quality=PLATE_CROP_JPEG_QUALITY,
+        full_quality=PLATE_FULL_JPEG_QUALITY,
+        reuse_min_quality=SNAPSHOT_REUSE_MIN_QUALITY if SNAPSHOT_REUSE_MIN_QUALITY > 0 else None,
+    ),
+    local=LocalOcrRecognizer(
+        LOCAL_OCR_MODEL,
+        plate_finder or PlateCandidateFinder(),
+        charset=LOCAL_OCR_CHARSET,
+        input_size=(LOCAL_OCR_INPUT_WIDTH, LOCAL_OCR_INPUT_HEIGHT),
+    ) if LOCAL_OCR_MODEL else None,
+    mode=RECOGNIZER_MODE,
+    escalate_below=LOCAL_ESCALATE_BELOW,
+    min_score=LOCAL_MIN_SCORE,
+)
+if recognizers.local is not None and recognizers.local.load_error:
+    print("Local OCR unavailable:", recognizers.local.load_error)
 
-def check_parking_status(plate_number):
+def _fetch_parking_status(plate_number):
     try:
-        response = requests.get(
+        response = http_client.get(
+            "parking",
             PARKING_API_URL,
             params={"prpid": "", "action": PARKING_API_ACTION, "filterid": plate_number},
-            verify=PARKING_VERIFY_SSL, timeout=8
+            verify=PARKING_VERIFY_SSL,
         )
         if response.status_code == 200:
             result = response.json()
@@ -258,16 +506,17 @@ def check_parking_status(plate_number):
                 return f"Paid until {result[0].get('enddate', 'Unknown')} {result[0].get('endtime', '')}"
             return "Not Paid"
         return "Error"
-    except requests.exceptions.RequestException:
+    except (requests.exceptions.RequestException, ValueError):
         return "Error"
 
-def check_summons_status(plate_number):
+def _fetch_summons_status(plate_number):
+    # None means the lookup failed (cached briefly), [] means no summons.
     try:
-        response = requests.post(
+        response = http_client.post(
+            "summons",
             NODE_API_URL,
             json={"vehicleNumber": plate_number},
             headers={"Content-Type": "application/json"},
-            timeout=8
         )
         data = response.json()
         if isinstance(data, list):
@@ -275,8 +524,27 @@ def check_summons_status(plate_number):
         elif isinstance(data, dict) and "summonsQueue" in data:
             return data["summonsQueue"]
         return []
-    except requests.exceptions.RequestException:
-        return []
+    except (requests.exceptions.RequestException, ValueError):
+        return None
+
+def _parking_ttl(status):
+    if status.startswith("Paid until"):
+        return PARKING_TTL_PAID
+    return PARKING_TTL_ERROR if status == "Error" else PARKING_TTL_UNPAID
+
+def _summons_ttl(summons):
+    if summons is None:
+        return SUMMONS_TTL_ERROR
+    return SUMMONS_TTL_FOUND if summons else SUMMONS_TTL_NONE
+
+def check_parking_status(plate_number):
+    key = (plate_number or "").strip().upper()
+    return parking_cache.get_or_load(key, _fetch_parking_status, _parking_ttl)
+
+def check_summons_status(plate_number):
+    # None when the lookup failed; callers must not treat that as "no summons".
+    key = (plate_number or "").strip().upper()
+    return summons_cache.get_or_load(key, _fetch_summons_status, _summons_ttl)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Dashboard forwarders
@@ -293,12 +561,13 @@ def send_gps_to_dashboard(data):
             headers = {}
             if SHARED_INGEST_TOKEN:
                 headers["X-Auth-Token"] = SHARED_INGEST_TOKEN
-            r = requests.post(url, json=data, headers=headers, timeout=5)
+            r = http_client.post("dashboard", url, json=data, headers=headers)
             if r.status_code == 200:
                 sent = True
         except Exception:
             pass
     if not sent:
+        connectivity.check_now()
         save_offline({"type": "gps", "data": data})
 
 def send_plate_to_dashboard(plate_info):
@@ -313,7 +582,7 @@ def send_plate_to_dashboard(plate_info):
                 headers = {}
                 if SHARED_INGEST_TOKEN:
                     headers["X-Auth-Token"] = SHARED_INGEST_TOKEN
-                requests.post(url, json=plate_info, headers=headers, timeout=5)
+                http_client.post("dashboard", url, json=plate_info, headers=headers)
             except Exception:
                 # keep trying others
                 pass
@@ -346,87 +615,245 @@ def ingest_token_required(f):
 # Frame processing
 # ──────────────────────────────────────────────────────────────────────────────
 def process_frames():
-    global stored_officer_id
+    # Blocks on the queue instead of polling it, so an idle consumer costs no CPU.
+    # While a plate track is open it wakes up in time to close it even when
+    # the motion gate stops sending frames.
+    while not shutdown_event.is_set():
+        wait_started = time.time()
+        cpu_started = time.thread_time()
+        try:
+            frame = frame_queue.get(timeout=TRACK_IDLE_SECONDS / 2 if plate_tracker.has_open_tracks() else None)
+        except Empty:
+            frame = None
+        consumer_stats["idle_wait_sec"] += time.time() - wait_started
+        consumer_stats["idle_cpu_sec"] += time.thread_time() - cpu_started
+        if frame is _STOP or shutdown_event.is_set():
+            break
+        if frame is None:
+            for track in plate_tracker.expire():
+                submit_track(track)
+            continue
+
+        busy_started = time.time()
+        try:
+            handle_frame(frame)
+        except Exception as e:
+            print("Frame processing error:", e)
+        consumer_stats["frames_processed"] += 1
+        consumer_stats["busy_sec"] += time.time() - busy_started
+    for track in plate_tracker.flush():
+        submit_track(track)
+    print("Frame consumer stopped")
+
+def handle_frame(frame):
+    started = time.time()
+    plates = recognize_plate(frame)
+    stage_stats.record("recognize", time.time() - started)
+    closed = plate_tracker.observe(plates, frame, latest_gps["latitude"], latest_gps["longitude"])
+    for track in closed:
+        submit_track(track)
+
+def submit_track(track):
+    # One consolidated detection per track: the winning string, the frame of
+    # its most confident read and the time the plate was first seen.
+    plate_number = track.plate
+    if not plate_number:
+        return
+    if is_duplicate_plate(plate_number):
+        return
+
+    if plate_number in detections:
+        return
+
+    latitude = track.latitude if track.latitude is not None else latest_gps["latitude"]
+    longitude = track.longitude if track.longitude is not None else latest_gps["longitude"]
+    if latitude is None or longitude is None:
+        return
+    last = detections.last()
+    if last and last.get("latitude") == latitude and last.get("longitude") == longitude:
+        return
+
+    # only now that the detection is kept; the write itself happens off-thread
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(track.first_seen))
+    snapshot_name = f"{plate_number}_{int(track.first_seen)}.jpg"
+    reused = (track.best_read or {}).get("jpeg")
+    saved = snapshots.submit(snapshot_name, frame=None if reused else track.best_frame, jpeg=reused,
+                             taken_at=track.first_seen, plate=plate_number)
+    snapshot_path = os.path.join(SNAPSHOT_FOLDER, snapshot_name) if saved else ""
+
+    job = {
+        "plate": plate_number,
+        "time": timestamp,
+        "snapshot_name": snapshot_name if snapshot_path else "",
+        "snapshot_path": snapshot_path,
+        "thumbnail_name": snapshot_name if saved and SNAPSHOT_THUMB_WIDTH else "",
+        "latitude": latitude,
+        "longitude": longitude,
+        "officer_id": stored_officer_id,
+        "reads": track.reads,
+        "vote_share": round(track.vote_share, 3),
+        "queued_at": time.time(),
+    }
+    try:
+        enrich_queue.put(job, timeout=2)
+        pipeline_stats["enrich_submitted"] += 1
+    except Full:
+        pipeline_stats["enrich_dropped"] += 1
+        print(f"Enrichment backlog full, dropping {mask_plate(plate_number)}")
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Enrichment stage: parking + summons lookups run concurrently per plate
+# ──────────────────────────────────────────────────────────────────────────────
+def _timed(stage, fn, *args):
+    started = time.time()
+    try:
+        return fn(*args)
+    finally:
+        stage_stats.record(stage, time.time() - started)
+
+def enrich_worker():
     while True:
-        if not frame_queue.empty():
-            frame = frame_queue.get()
-            plates = recognize_plate(frame)
-
-            for plate_data in plates:
-                plate_number = plate_data.get("plate", "").upper()
-                if not plate_number:
-                    continue
-                if is_duplicate_plate(plate_number):
-                    continue
-
-                with lock:
-                    if any(p["plate"] == plate_number for p in detected_plates):
-                        continue
-
-                timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-                snapshot_name = f"{plate_number}_{int(time.time())}.jpg"
-                snapshot_path = os.path.join(app.config["SNAPSHOT_FOLDER"], snapshot_name)
-                try:
-                    cv2.imwrite(snapshot_path, frame)
-                except Exception:
-                    # if snapshot save fails, still continue
-                    snapshot_path = ""
-
-                latitude = latest_gps["latitude"]
-                longitude = latest_gps["longitude"]
-                if latitude is None or longitude is None:
-                    continue
-                if detected_plates and detected_plates[-1].get("latitude") == latitude and detected_plates[-1].get("longitude") == longitude:
-                    continue
-
-                officer_id = stored_officer_id
-
-                parking_status = check_parking_status(plate_number)
-                summons_status = check_summons_status(plate_number)
-
-                if summons_status and isinstance(summons_status, list) and len(summons_status) > 0:
-                    final_status = summons_status[0].get("status", "Not Paid")
-                elif "Paid until" in parking_status:
-                    final_status = parking_status
-                else:
-                    final_status = "Not Paid"
-
-                # Build snapshot URL safely
-                host = request.host if request else "localhost:5001"
-                snapshot_url = f"http://{host}/static/snapshots/{snapshot_name}" if snapshot_name else ""
-
-                plate_info = {
-                    "plate": plate_number,
-                    "status": final_status,
-                    "summons": summons_status,
-                    "time": timestamp,
-                    "snapshot": snapshot_url,
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "officer_id": officer_id
-                }
-
-                with lock:
-                    detected_plates.append(plate_info)
-                    send_plate_to_dashboard(plate_info)
-
-                # DB insert
-                try:
-                    db = get_db()
-                    with db.cursor() as cursor:
-                        cursor.execute("""
-                            INSERT INTO detected_plates (plate, timestamp, image_path, latitude, longitude, officer_id)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                        """, (plate_number, timestamp, snapshot_path, latitude, longitude, officer_id))
-                        cursor.execute("""
-                            INSERT INTO plate_history (plate, timestamp, image_path, latitude, longitude, officer_id)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                        """, (plate_number, timestamp, snapshot_path, latitude, longitude, officer_id))
-                        db.commit()
-                except Exception as e:
-                    print("DB insert failed:", e)
-
-threading.Thread(target=process_frames, daemon=True).start()
+        job = enrich_queue.get()
+        if job is _STOP:
+            break
+        started = time.time()
+        stage_stats.record("enrich_wait", started - job["queued_at"])
+        try:
+            parking_future = lookup_pool.submit(_timed, "parking", check_parking_status, job["plate"])
+            summons_future = lookup_pool.submit(_timed, "summons", check_summons_status, job["plate"])
+            parking_status = parking_future.result()
+            summons_status = summons_future.result()
+        except Exception as e:
+            print("Enrichment failed:", e)
+            parking_status, summons_status = "Error", None
+        stage_stats.record("enrich", time.time() - started)
+
+        if summons_status and isinstance(summons_status, list) and len(summons_status) > 0:
+            final_status = summons_status[0].get("status", "Not Paid")
+        elif "Paid until" in parking_status:
+            final_status = parking_status
+        else:
+            final_status = "Not Paid"
+
+        job["status"] = final_status
+        job["summons"] = summons_status
+        completion_queue.put(job)
+
+def finalize_detections():
+    # Single consumer of enriched plates: memory, dashboard forward, DB.
+    while True:
+        job = completion_queue.get()
+        if job is _STOP:
+            break
+        started = time.time()
+        try:
+            persist_detection(job)
+        except Exception as e:
+            print("Persist failed:", e)
+        pipeline_stats["completed"] += 1
+        stage_stats.record("persist", time.time() - started)
+
+def persist_detection(job):
+    plate_number = job["plate"]
+    timestamp = job["time"]
+    snapshot_name = job["snapshot_name"]
+    snapshot_path = job["snapshot_path"]
+    latitude = job["latitude"]
+    longitude = job["longitude"]
+    officer_id = job["officer_id"]
+
+    # Build snapshot URL safely
+    host = request.host if request else "localhost:5001"
+    snapshot_url = f"http://{host}/static/snapshots/{snapshot_name}" if snapshot_name else ""
+    thumbnail_url = f"http://{host}/static/snapshots/thumbs/{job['thumbnail_name']}" if job["thumbnail_name"] else ""
+
+    plate_info = {
+        "plate": plate_number,
+        "status": job["status"],
+        "summons": job["summons"] or [],
+        "time": timestamp,
+        "snapshot": snapshot_url,
+        "thumbnail": thumbnail_url,
+        "latitude": latitude,
+        "longitude": longitude,
+        "officer_id": officer_id
+    }
+
+    detections.add(plate_info)
+    send_plate_to_dashboard(plate_info)
+    events.publish("plate", plate_info)
+    update_summons(plate_info, job["summons"])
+
+    # DB insert
+    try:
+        with get_db() as db, db.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO detected_plates (plate, timestamp, image_path, latitude, longitude, officer_id)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (plate_number, timestamp, snapshot_path, latitude, longitude, officer_id))
+            cursor.execute("""
+                INSERT INTO plate_history (plate, timestamp, image_path, latitude, longitude, officer_id)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (plate_number, timestamp, snapshot_path, latitude, longitude, officer_id))
+            db.commit()
+    except Exception as e:
+        print("DB insert failed:", e)
+
+def update_summons(plate_info, summons):
+    # Pushes the new view version so open pages fetch /summons?since=<their version>.
+    # summons=None is a failed lookup: keep what the view has for the plate.
+    if summons is None:
+        return
+    if summons_view.update_plate(plate_info, summons):
+        events.publish("summons", {"version": summons_view.version})
+
+def summons_refresh_loop():
+    # Keeps the summons view current (e.g. a summons paid after detection)
+    # off the request path; lookups go through the TTL cache. Plates whose
+    # answer is still cached cost nothing; the rest are paced by the
+    # "summons_refresh" bucket so new-plate enrichment keeps most of the
+    # summons API budget.
+    while not shutdown_event.wait(SUMMONS_REFRESH_SECONDS):
+        for plate, info in detections.latest_by_plate().items():
+            if shutdown_event.is_set():
+                break
+            if plate.strip().upper() not in summons_cache:
+                rate_limiter.acquire("summons_refresh")
+            update_summons(info, check_summons_status(plate))
+
+enrich_threads = [threading.Thread(target=enrich_worker, daemon=True) for _ in range(max(1, ENRICH_WORKERS))]
+finalize_thread = threading.Thread(target=finalize_detections, daemon=True)
+consumer_thread = threading.Thread(target=process_frames, daemon=True)
+
+def stop_background_services(timeout=5):
+    if shutdown_event.is_set():
+        return
+    shutdown_event.set()
+    # make room for the sentinel so the blocked get() returns immediately
+    try:
+        frame_queue.get_nowait()
+    except Exception:
+        pass
+    try:
+        frame_queue.put_nowait(_STOP)
+    except Exception:
+        pass
+    if consumer_thread.ident is not None:
+        consumer_thread.join(timeout)
+    for _ in enrich_threads:
+        enrich_queue.put(_STOP)
+    completion_queue.put(_STOP)
+    lookup_pool.shutdown(wait=False)
+    preview.stop()
+    if snapshots is not None:
+        snapshots.stop()
+        snapshot_store.close()
+        report_engine.close()
+        offline_journal.close()
+    connectivity.stop()
+    sync_wakeup.set()
+    http_client.close()
+    db_pool.close()
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Video feed (MJPEG)
@@ -435,41 +862,22 @@ def generate_frames():
     if not picam2:
         yield b"Camera not initialized."
         return
-    frame_skip = 1
-    count = 0
-    while True:
-        try:
-            frame = picam2.capture_array()
-            frame = cv2.resize(frame, (640, 480))
-            count += 1
-            if count % frame_skip == 0 and not frame_queue.full():
-                frame_queue.put(frame.copy())
-            _, buffer = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
-            yield (b"--frame\r\n"
-                   b"Content-Type: image/jpeg\r\n\r\n" + buffer.tobytes() + b"\r\n")
-        except Exception as e:
-            print(f"Error capturing frame: {e}")
-            yield b"Error capturing frame."
-            break
+    # Every viewer shares the one encoded JPEG stream; slow viewers skip frames.
+    yield from preview.stream(stop=shutdown_event)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Auth routes
 # ──────────────────────────────────────────────────────────────────────────────
-@app.route("/login", methods=["GET", "POST"])
+@bp.route("/login", methods=["GET", "POST"])
 def login():
     global stored_officer_id
     if request.method == "POST":
         username = request.form.get("username", "")
         password = request.form.get("password", "")
 
-        conn = get_db()
-        user = None
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-                user = cursor.fetchone()
-        finally:
-            conn.close()
+        with get_db() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+            user = cursor.fetchone()
 
         # 🔐 support hashed (preferred) or legacy plaintext column
         ok = False
@@ -488,28 +896,28 @@ def login():
             session["is_admin"] = bool(user.get("is_admin", 0))
             session["role"] = user.get("role", "user")
             stored_officer_id = session["officer_id"]
-            return redirect(url_for("dashboard"))
+            return redirect(url_for(".dashboard"))
         return render_template("login.html", error="Invalid credentials.")
 
     return render_template("login.html")
 
-@app.route("/logout")
+@bp.route("/logout")
 def logout():
     global stored_officer_id
     session.clear()
     stored_officer_id = "Unknown"
-    return redirect(url_for("login"))
+    return redirect(url_for(".login"))
 
-@app.route("/")
+@bp.route("/")
 def dashboard():
     if "user_id" not in session:
-        return redirect(url_for("login"))
+        return redirect(url_for(".login"))
     return render_template("index.html")
 
 # ──────────────────────────────────────────────────────────────────────────────
 # APIs
 # ──────────────────────────────────────────────────────────────────────────────
-@app.route("/video_feed")
+@bp.route("/video_feed")
 def video_feed():
     return Response(
         generate_frames(),
@@ -517,11 +925,10 @@ def video_feed():
         headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
     )
 
-@app.route("/plates", methods=["GET"])
+@bp.route("/plates", methods=["GET"])
 def plates():
     try:
-        db = get_db()
-        with db.cursor() as cursor:
+        with get_db() as db, db.cursor() as cursor:
             cursor.execute("""
                 SELECT plate, timestamp, image_path, latitude, longitude, officer_id
                 FROM detected_plates ORDER BY id DESC LIMIT 100
@@ -530,7 +937,7 @@ def plates():
 
         plates_from_db = []
         for row in rows:
-            latest = next((p for p in detected_plates if p["plate"] == row["plate"]), None)
+            latest = detections.latest(row["plate"])
             status = latest["status"] if latest else "Not Paid"
             image_rel = row["image_path"].replace("\\", "/") if row["image_path"] else ""
             snapshot_url = f"http://{request.host}/{image_rel}" if image_rel else ""
@@ -552,157 +959,150 @@ def plates():
         print("Error loading plates from DB:", e)
         return jsonify([]), 500
 
-@app.route("/api/user", methods=["GET"])
+@bp.route("/api/user", methods=["GET"])
 def get_user():
     if "user_id" in session:
         return jsonify({"user": session.get("username"), "officer_id": session.get("officer_id")})
     return jsonify({"error": "Not logged in"}), 401
 
-@app.route("/summons", methods=["GET"])
+@bp.route("/summons", methods=["GET"])
 def get_summons():
-    global summons_data
-    unique_summons = {}
-    with lock:
-        for plate in detected_plates:
-            summons_status = check_summons_status(plate["plate"])
-            if summons_status and summons_status != "Error":
-                for summon in summons_status:
-                    nn = summon.get("noticeNo")
-                    if not nn:
-                        continue
-                    if nn not in unique_summons:
-                        enriched = dict(summon)
-                        enriched["latitude"] = plate["latitude"]
-                        enriched["longitude"] = plate["longitude"]
-                        enriched["snapshot"] = plate["snapshot"]
-                        enriched["officer_id"] = plate.get("officer_id", session.get("officer_id", "Unknown"))
-                        unique_summons[nn] = enriched
-    summons_data = list(unique_summons.values())
-    return jsonify(summons_data)
-
-@app.route("/api/received-plates", methods=["GET"])
+    # Served from the precomputed view; never calls upstream or takes `lock`.
+    since = request.args.get("since", type=int)
+    if since is not None:
+        delta = summons_view.changes_since(since)
+        resp = jsonify(delta)
+        resp.headers["X-Summons-Version"] = str(delta["version"])
+        return resp
+    version, body = summons_view.snapshot_json()
+    resp = Response(body, mimetype="application/json")
+    resp.headers["X-Summons-Version"] = str(version)
+    return resp
+
+@bp.route("/events")
+def event_stream():
+    # Events: plate (new detection), gps (new fix), summons ({"version"}; fetch
+    # /summons?since=), reset (reload everything). 503 means poll instead.
+    if "user_id" not in session:
+        return jsonify({"error": "Not logged in"}), 401
+    if not events.try_subscribe():
+        return jsonify({"error": "too many live clients, poll instead"}), 503
+    last_event_id = request.headers.get("Last-Event-ID", type=int)
+    response = Response(events.stream(last_event_id, heartbeat=EVENTS_HEARTBEAT, stop=shutdown_event),
+                        mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.call_on_close(events.unsubscribe)
+    return response
+
+# ── Streaming exports (date range straight from the DB; csv / ndjson / xlsx)
+EXPORT_SOURCES = {
+    "history": "plate_history",     # every detection ever made
+    "detected": "detected_plates",  # the current queue (emptied by /reset-queue)
+}
+EXPORT_COLUMNS = ["id", "plate", "timestamp", "image_path", "latitude", "longitude", "officer_id"]
+
+@bp.route("/api/export/detected-plates", methods=["GET"])
+def export_detected_plates():
+    # ?start=YYYY-MM-DD&end=YYYY-MM-DD (inclusive)&format=csv|ndjson|xlsx&source=history|detected
+    if "user_id" not in session:
+        return jsonify({"error": "Not logged in"}), 401
+    fmt = request.args.get("format", "csv")
+    table = EXPORT_SOURCES.get(request.args.get("source", "history"))
+    if fmt not in exporters.FORMATS or table is None:
+        return jsonify({"error": "format must be csv, ndjson or xlsx; source history or detected"}), 400
+    try:
+        start = datetime.strptime(request.args["start"], "%Y-%m-%d")
+        last_day = datetime.strptime(request.args.get("end", request.args["start"]), "%Y-%m-%d")
+    except (KeyError, ValueError):
+        return jsonify({"error": "start (and optional end) dates as YYYY-MM-DD are required"}), 400
+
+    # Server-side cursor: rows come off the socket batch by batch, and the
+    # pooled connection is released when the response finishes or the
+    # client goes away.
+    stack = ExitStack()
+    try:
+        db = stack.enter_context(get_db())
+        cursor = stack.enter_context(db.cursor(pymysql.cursors.SSDictCursor))
+        cursor.execute(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM {table} "
+                       "WHERE timestamp >= %s AND timestamp < %s ORDER BY timestamp",
+                       (start, last_day + timedelta(days=1)))
+    except Exception as e:
+        stack.close()
+        print("Export failed:", e)
+        return jsonify({"error": "export failed"}), 500
+
+    def generate():
+        with stack:
+            yield from exporters.export_chunks(fmt, exporters.cursor_rows(cursor, EXPORT_BATCH), EXPORT_COLUMNS,
+                                               sheet_name="Detected Plates", tmp_dir=EXPORT_TMP_DIR)
+
+    mimetype, ext = exporters.FORMATS[fmt]
+    response = Response(generate(), mimetype=mimetype)
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="{table}_{start:%Y%m%d}_{last_day:%Y%m%d}.{ext}"')
+    response.headers["X-Accel-Buffering"] = "no"
+    response.call_on_close(stack.close)
+    return response
+
+@bp.route("/api/received-plates", methods=["GET"])
 def get_received_plates():
-    with lock:
-        return jsonify(list(reversed(detected_plates)))
-
-# ── Downloads
-@app.route("/download/excel/detected_plates", methods=["GET"])
+    return jsonify(detections.newest_first())
+
+# ── Downloads (built off-thread by report_engine, cached per data version)
+REPORT_MIMETYPES = {
+    ".pdf": "application/pdf",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+def _report_thumbnail(row):
+    # local thumbnail only; plates received from peers have none and show N/A
+    name = os.path.basename(row.get("snapshot") or "")
+    path = snapshot_store.path_for(name, thumb=True, touch=False) if name else None
+    return path if path and os.path.exists(path) else None
+
+def register_reports(engine):
+    engine.register("detected_plates.pdf", detections.snapshot, reports.detected_plates_pdf(_report_thumbnail),
+                    version=lambda: detections.version)
+    engine.register("detected_plates.xlsx", detections.snapshot, reports.xlsx_table("Detected Plates"),
+                    version=lambda: detections.version)
+    engine.register("summons_queue.pdf", summons_view.snapshot, reports.summons_queue_pdf,
+                    version=lambda: summons_view.version)
+    engine.register("summons_queue.xlsx", summons_view.snapshot, reports.xlsx_table("Summons Queue"),
+                    version=lambda: summons_view.version)
+    return engine
+
+def send_report(kind):
+    state, path = report_engine.get(kind)
+    if state == "empty":
+        return "No data available", 400
+    if state == "failed":
+        return jsonify({"error": "report generation failed"}), 500
+    if state == "building":
+        resp = jsonify({"status": "building", "retry_after": REPORT_RETRY_AFTER})
+        resp.status_code = 202
+        resp.headers["Retry-After"] = str(REPORT_RETRY_AFTER)
+        return resp
+    return send_file(path, mimetype=REPORT_MIMETYPES[os.path.splitext(kind)[1]],
+                     as_attachment=True, download_name=kind)
+
+@bp.route("/download/excel/detected_plates", methods=["GET"])
 def download_detected_plates_excel():
-    with lock:
-        if not detected_plates:
-            return "No data available", 400
-        df = pd.DataFrame(detected_plates)
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name="Detected Plates")
-        output.seek(0)
-        return send_file(output, mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                         as_attachment=True, download_name="detected_plates.xlsx")
-
-@app.route("/download/pdf/detected_plates", methods=["GET"])
+    return send_report("detected_plates.xlsx")
+
+@bp.route("/download/pdf/detected_plates", methods=["GET"])
 def download_detected_plates_pdf():
-    with lock:
-        if not detected_plates:
-            return "No data available", 400
-
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), leftMargin=10, rightMargin=10, topMargin=20, bottomMargin=20)
-        elements = []
-        styles = getSampleStyleSheet()
-        title = Paragraph("<b>Detected Plates Report</b>", styles["Title"])
-        elements.append(title)
-
-        data = [["License Plate", "Status", "Time", "Snapshot"]]
-        for plate in detected_plates:
-            snapshot_path = plate["snapshot"]
-            try:
-                img = Image(snapshot_path, width=100, height=70)
-            except Exception:
-                img = Paragraph("N/A", styles["Normal"])
-            status_text = Paragraph(plate["status"], styles["Normal"])
-            data.append([plate["plate"], status_text, plate["time"], img])
-
-        col_widths = [100, 140, 120, 120]
-        table = Table(data, colWidths=col_widths)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.blue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('WORDWRAP', (0, 0), (-1, -1)),
-        ]))
-        elements.append(table)
-        doc.build(elements)
-
-        buffer.seek(0)
-        return send_file(buffer, mimetype="application/pdf", as_attachment=True, download_name="detected_plates.pdf")
-
-@app.route("/download/excel/summons_queue", methods=["GET"])
+    return send_report("detected_plates.pdf")
+
+@bp.route("/download/excel/summons_queue", methods=["GET"])
 def download_summons_queue_excel():
-    with lock:
-        if not summons_data:
-            return "No data available", 400
-        df = pd.DataFrame(summons_data)
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name="Summons Queue")
-        output.seek(0)
-        return send_file(output, mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                         as_attachment=True, download_name="summons_queue.xlsx")
-
-@app.route("/download/pdf/summons_queue", methods=["GET"])
+    return send_report("summons_queue.xlsx")
+
+@bp.route("/download/pdf/summons_queue", methods=["GET"])
 def download_summons_queue_pdf():
-    with lock:
-        if not summons_data:
-            return "No data available", 400
-
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), leftMargin=20, rightMargin=20, topMargin=30, bottomMargin=20)
-        elements = []
-        styles = getSampleStyleSheet()
-        title = Paragraph("<b>Summons Queue Report</b>", styles["Title"])
-        elements.append(title)
-
-        data = [["License Plate", "Notice No", "Offence", "Location", "Date", "Status", "Fine Amount", "Due Date"]]
-        for summon in summons_data:
-            data.append([
-                summon.get("plate", ""),
-                summon.get("noticeNo", ""),
-                Paragraph(summon.get("offence", ""), styles["Normal"]),
-                Paragraph(summon.get("location", ""), styles["Normal"]),
-                summon.get("date", ""),
-                summon.get("status", ""),
-                summon.get("amount", ""),
-                summon.get("due_date", "")
-            ])
-
-        col_widths = [60, 90, 180, 150, 70, 70, 70, 70]
-        table = Table(data, colWidths=col_widths)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.blue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('WORDWRAP', (0, 0), (-1, -1)),
-        ]))
-        elements.append(table)
-        doc.build(elements)
-
-        buffer.seek(0)
-        return send_file(buffer, mimetype="application/pdf", as_attachment=True, download_name="summons_queue.pdf")
-
-# ── GPS ingest
-@app.route("/api/gps", methods=["POST"])
+    return send_report("summons_queue.pdf")
+
+@bp.route("/api/gps", methods=["POST"])
 @ingest_token_required
 def receive_gps():
     data = request.json or {}
@@ -714,8 +1114,7 @@ def receive_gps():
 
     gps_logs.append(data)
     try:
-        db = get_db()
-        with db.cursor() as cursor:
+        with get_db() as db, db.cursor() as cursor:
             cursor.execute("""
                 INSERT INTO gps_history (plate, timestamp, latitude, longitude, speed)
                 VALUES (%s, %s, %s, %s, %s)
@@ -734,16 +1133,17 @@ def receive_gps():
         gps_logs.pop(0)
 
     send_gps_to_dashboard(data)
+    events.publish("gps", data)
     # do not log full PII; mask plate
     print(f"GPS received @{data.get('time')} for {mask_plate(data.get('plate',''))}")
     return jsonify({"status": "success"}), 200
 
-@app.route("/api/gps/logs", methods=["GET"])
+@bp.route("/api/gps/logs", methods=["GET"])
 def get_gps_logs():
     return jsonify(gps_logs)
 
 # ── Payment QR proxy
-@app.route("/api/payment/generate-qr", methods=["POST"])
+@bp.route("/api/payment/generate-qr", methods=["POST"])
 def generate_qr():
     data = request.json or {}
     if "totalAmount" not in data or "summons" not in data:
@@ -752,19 +1152,19 @@ def generate_qr():
         headers = {"Content-Type": "application/json"}
         if PAYMENT_QR_TOKEN:
             headers["Authorization"] = PAYMENT_QR_TOKEN
-        response = requests.post(PAYMENT_QR_API, json=data, headers=headers, timeout=10)
+        response = http_client.post("payment_qr", PAYMENT_QR_API, json=data, headers=headers)
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to generate payment QR"}), 500
 
 # ── Tracking utilities
-@app.route("/gps-tracking", methods=["GET"])
+@bp.route("/gps-tracking", methods=["GET"])
 def get_gps_tracking():
     if gps_logs:
         return jsonify(gps_logs[-1])
     return jsonify({"error": "No GPS data available"}), 404
 
-@app.route("/gps-tracking-history", methods=["GET"])
+@bp.route("/gps-tracking-history", methods=["GET"])
 def gps_tracking_history():
     plate = request.args.get("plate")
     start = request.args.get("start")
@@ -783,25 +1183,25 @@ def gps_tracking_history():
     return jsonify(formatted)
 
 # ── Payment views
-@app.route("/queue-summons")
+@bp.route("/queue-summons")
 def redirect_to_dashboard_summons():
     plate = request.args.get("plate")
     if not plate:
         return "Missing plate number", 400
     return redirect(f"/?plate={plate}&view=summons-payment")
 
-@app.route("/qr-payment")
+@bp.route("/qr-payment")
 def qr_payment_view():
     url = request.args.get("url")
     return render_template("qr_payment.html", qr_url=url)
 
-@app.route("/summons-payment")
+@bp.route("/summons-payment")
 def standalone_summons_payment():
     plate = request.args.get("plate")
     return render_template("summons_payment.html", plate=plate)
 
 # ── Stats & health
-@app.route("/api/lpr-stats", methods=["GET"])
+@bp.route("/api/lpr-stats", methods=["GET"])
 def get_lpr_stats():
     total = api_stats["success_count"] + api_stats["failure_count"]
     average_time = (api_stats["total_time"] / api_stats["success_count"]) if api_stats["success_count"] else 0
@@ -809,52 +1209,101 @@ def get_lpr_stats():
         "total_calls": total,
         "successful_calls": api_stats["success_count"],
         "failed_calls": api_stats["failure_count"],
-        "average_response_time_sec": round(average_time, 2)
+        "average_response_time_sec": round(average_time, 2),
+        "capture": dict(capture_stats, **frame_ring.stats()),
+        "motion_gate": motion_gate.stats(),
+        "preview": preview.stats(),
+        "plate_detector": dict(plate_finder.stats() if plate_finder else {}, **upload_stats),
+        "recognizers": recognizers.stats(),
+        "plate_tracker": plate_tracker.stats(),
+        "consumer": consumer_cpu_report(),
+        "pipeline": dict(pipeline_stats, enrich_backlog=enrich_queue.qsize(),
+                         completion_backlog=completion_queue.qsize()),
+        "stages": stage_stats.snapshot(),
+        "cache": {"parking": parking_cache.stats(), "summons": summons_cache.stats(),
+                  "recent_plates": recent_plates.stats()},
+        "detections": detections.stats(),
+        "snapshots": dict(snapshots.stats(), store=snapshot_store.stats()),
+        "reports": report_engine.stats(),
+        "http": http_client.stats(),
+        "offline_queue": dict(offline_journal.stats(), **offline_stats),
+        "db_pool": db_pool.stats(),
+        "events": events.stats(),
+        "serving": current_app.extensions["route_budgets"].stats() if "route_budgets" in current_app.extensions else {},
     })
 
-@app.route("/api/status", methods=["GET"])
+def consumer_cpu_report():
+    # idle_cpu_percent is CPU burned by the consumer while waiting for frames;
+    # with the blocking queue it should sit at ~0 (it was ~100% of a core).
+    stats = dict(consumer_stats)
+    waited = stats["idle_wait_sec"]
+    uptime = time.time() - PROCESS_STARTED
+    stats["idle_cpu_percent"] = round(100.0 * stats["idle_cpu_sec"] / waited, 2) if waited else 0.0
+    stats["process_cpu_percent"] = round(100.0 * time.process_time() / uptime, 2) if uptime else 0.0
+    stats["busy_sec"] = round(stats["busy_sec"], 3)
+    stats["idle_wait_sec"] = round(waited, 3)
+    stats["idle_cpu_sec"] = round(stats["idle_cpu_sec"], 4)
+    return stats
+
+@bp.route("/api/status", methods=["GET"])
 def api_status():
-    return jsonify({"status": "online" if is_connected() else "offline"})
+    return jsonify(connectivity.stats())
 
 # ── Plate ingest (from peers)
-@app.route("/api/receive-plate", methods=["POST"])
+@bp.route("/api/receive-plate", methods=["POST"])
 @ingest_token_required
 def receive_plate():
     data = request.json or {}
     if "plate" not in data:
         return jsonify({"error": "Invalid data"}), 400
-    with lock:
-        detected_plates.append(data)
+    detections.add(data)
+    events.publish("plate", data)
+    if "summons" in data:
+        update_summons(data, data.get("summons"))
     print(f"Plate received via API: {mask_plate(data.get('plate',''))}")
     return jsonify({"message": "Plate received"}), 200
 
+# ── Snapshots (content-addressed store; URLs keep the /static/snapshots/<name> form)
+@bp.route("/static/snapshots/<path:name>")
+def serve_snapshot(name):
+    thumb = name.startswith("thumbs/")
+    if thumb:
+        name = name[len("thumbs/"):]
+    path = snapshot_store.path_for(name, thumb=thumb)
+    if path:
+        return send_file(path, mimetype="image/jpeg", max_age=86400)
+    if not thumb and "/" not in name and name.lower().endswith(".jpg"):
+        # old flat layout, not adopted into the store yet
+        return send_from_directory(SNAPSHOT_FOLDER, name)
+    return jsonify({"error": "not found"}), 404
+
+@bp.route("/api/snapshots/purge", methods=["POST"])
+@admin_required
+def purge_snapshots():
+    # {"start": "YYYY-MM-DD", "end": "YYYY-MM-DD"}; both days inclusive
+    data = request.json or {}
+    try:
+        start = datetime.strptime(data["start"], "%Y-%m-%d").timestamp()
+        end = datetime.strptime(data["end"], "%Y-%m-%d").timestamp() + 86400
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "start and end dates (YYYY-MM-DD) are required"}), 400
+    removed = snapshot_store.delete_range(start, end)
+    return jsonify({"status": "success", "removed": removed, "store": snapshot_store.stats()})
+
 # ── Reset queue (DB + memory + snapshots)
-@app.route('/reset-queue', methods=['POST'])
+@bp.route('/reset-queue', methods=['POST'])
 @admin_required
 def reset_queue():
     def clear_all():
         try:
-            connection = get_db()
-            with connection.cursor() as cursor:
+            with get_db() as connection, connection.cursor() as cursor:
                 cursor.execute("TRUNCATE TABLE detected_plates")
                 connection.commit()
-            with lock:
-                detected_plates.clear()
-            snapshot_folder = app.config["SNAPSHOT_FOLDER"]
-            if os.path.exists(snapshot_folder):
-                # cautious: remove only files, not the folder tree outside
-                for f in Path(snapshot_folder).glob("*"):
-                    try:
-                        if f.is_file():
-                            f.unlink()
-                        elif f.is_dir():
-                            # if someone created nested dirs, remove them
-                            for sub in f.rglob("*"):
-                                if sub.is_file():
-                                    sub.unlink()
-                            f.rmdir()
-                    except Exception:
-                        pass
+            detections.clear()
+            recent_plates.clear()
+            summons_view.clear()
+            events.publish("reset", {})
+            snapshot_store.clear()
         except Exception as e:
             print("Reset failed:", e)
 
@@ -862,7 +1311,7 @@ def reset_queue():
     return jsonify({"status": "success", "message": "Reset started. Data will clear shortly."})
 
 # ── Start/Stop dangerous ops (🔐 admin only)
-@app.route('/start-all', methods=['POST'])
+@bp.route('/start-all', methods=['POST'])
 @admin_required
 def start_all_services():
     try:
@@ -870,23 +1319,26 @@ def start_all_services():
         PY = os.getenv("PYTHON_BIN", "python3")
         BASE = os.getenv("PROJECT_BASE", "/home/lpr2/Desktop/lpr-project")
         procs = [
-            [PY, f"{BASE}/live_detection_service/lpr.py"],
+            # production entry point (waitress); see serve.py
+            [PY, f"{BASE}/live_detection_service/serve.py", "lpr"],
             [PY, f"{BASE}/live_detection_service/gps_tracker.py"],
             ["node", f"{BASE}/live_detection_service/server.js"],
             [PY, f"{BASE}/dashboard_service/dashboard.py"],
         ]
         for cmd in procs:
-            subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            # relative paths (static/snapshots, offline_queue, ...) resolve against the script's folder
+            subprocess.Popen(cmd, cwd=os.path.dirname(cmd[1]), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         return jsonify({"message": "All services started successfully!"})
     except Exception as e:
         return jsonify({"message": f"Error starting services: {e}"}), 500
 
-@app.route('/stop-all', methods=['POST'])
+@bp.route('/stop-all', methods=['POST'])
 @admin_required
 def stop_all_services():
     try:
         BASE = os.getenv("PROJECT_BASE", "/home/lpr2/Desktop/lpr-project")
-        os.system(f"pkill -f {BASE}/live_detection_service/lpr.py")
+        os.system(f"pkill -f '{BASE}/live_detection_service/serve.py lpr'")
+        os.system(f"pkill -f {BASE}/live_detection_service/lpr.py")  # dev server, if started by hand
         os.system(f"pkill -f {BASE}/live_detection_service/gps_tracker.py")
         os.system(f"pkill -f {BASE}/live_detection_service/server.js")
         os.system(f"pkill -f {BASE}/dashboard_service/dashboard.py")
@@ -897,59 +1349,167 @@ def stop_all_services():
 # ──────────────────────────────────────────────────────────────────────────────
 # Offline queue sync loop
 # ──────────────────────────────────────────────────────────────────────────────
+_OFFLINE_ROUTES = {"plate": "/api/receive-plate", "gps": "/api/gps"}
+_inflight_batch = None  # resent unchanged until acked, so its idempotency key is stable
+
+def _is_permanent_rejection(status_code):
+    return 400 <= status_code < 500 and status_code not in (401, 403, 404, 405, 408, 429)
+
+def _replay_items(kind, items, headers):
+    # One POST per item; only used against dashboards without /bulk routes.
+    suffix = _OFFLINE_ROUTES[kind]
+    for data in items:
+        delivered = False
+        for url in DASHBOARD_URLS:
+            if not url.endswith(suffix):
+                continue
+            res = http_client.post("dashboard", url, json=data, headers=headers)
+            if res.status_code == 200 or _is_permanent_rejection(res.status_code):
+                delivered = True
+                break
+        if not delivered:
+            return False
+    return True
+
+def _post_bulk(kind, items, key, headers):
+    # Sends one batch as gzip NDJSON; True once any dashboard accepted it.
+    suffix = _OFFLINE_ROUTES[kind]
+    lines = (json.dumps(d, separators=(",", ":"), default=str) for d in items)
+    body = gzip.compress(("\n".join(lines) + "\n").encode())
+    bulk_headers = dict(headers)
+    bulk_headers.update({
+        "Content-Type": "application/x-ndjson",
+        "Content-Encoding": "gzip",
+        "Idempotency-Key": f"{key}:{kind}",
+    })
+    for url in DASHBOARD_URLS:
+        if not url.endswith(suffix):
+            continue
+        res = http_client.post("dashboard", url.rstrip("/") + "/bulk", data=body, headers=bulk_headers)
+        if res.status_code == 200:
+            return True
+        if res.status_code in (404, 405):
+            return _replay_items(kind, items, headers)
+        if _is_permanent_rejection(res.status_code):
+            offline_stats["rejected"] += len(items)
+            print(f"Dashboard rejected offline {kind} batch: {res.status_code}")
+            return True
+    return False
+
 def sync_offline_data():
-    if not is_connected():
-        return
-    path = Path(OFFLINE_FILE)
-    if not path.exists():
+    global _inflight_batch
+    if not is_connected() or not offline_journal.pending:
         return
-    try:
-        with open(path, "r") as f:
-            queue = json.load(f)
-    except json.JSONDecodeError:
-        queue = []
+    headers = {}
+    if SHARED_INGEST_TOKEN:
+        headers["X-Auth-Token"] = SHARED_INGEST_TOKEN
+
+    # Drain in size-bounded batches; each batch is acked only after every
+    # record type in it was accepted, and the Idempotency-Key lets the
+    # dashboard ignore a batch it already stored if the ack got lost.
+    while not shutdown_event.is_set():
+        batch = _inflight_batch or offline_journal.read_batch(OFFLINE_BATCH_SIZE, OFFLINE_BATCH_BYTES)
+        if not batch.items:
+            break
+        _inflight_batch = batch
 
-    successful = []
-    for item in queue:
+        by_kind = {}
+        for item in batch.items:
+            if item.get("type") in _OFFLINE_ROUTES:
+                by_kind.setdefault(item["type"], []).append(item.get("data"))
         try:
-            headers = {}
-            if SHARED_INGEST_TOKEN:
-                headers["X-Auth-Token"] = SHARED_INGEST_TOKEN
-
-            if item.get("type") == "plate":
-                # send to first matching receive-plate URL
-                for url in DASHBOARD_URLS:
-                    if url.endswith("/api/receive-plate"):
-                        res = requests.post(url, json=item["data"], headers=headers, timeout=5)
-                        if res.status_code == 200:
-                            successful.append(item)
-                            break
-            elif item.get("type") == "gps":
-                for url in DASHBOARD_URLS:
-                    if url.endswith("/api/gps"):
-                        res = requests.post(url, json=item["data"], headers=headers, timeout=5)
-                        if res.status_code == 200:
-                            successful.append(item)
-                            break
-        except Exception:
-            pass
+            ok = all(_post_bulk(kind, items, batch.key, headers) for kind, items in by_kind.items())
+        except Exception as e:
+            print("Offline sync failed:", e)
+            ok = False
+        if not ok:
+            offline_stats["failed_batches"] += 1
+            connectivity.check_now()
+            break
 
-    remaining = [q for q in queue if q not in successful]
-    with open(OFFLINE_FILE, "w") as f:
-        json.dump(remaining, f, indent=2)
+        offline_journal.ack(batch)
+        _inflight_batch = None
+        offline_stats["batches"] += 1
+        offline_stats["replayed"] += len(batch)
 
 def start_sync_loop():
     def loop():
-        while True:
+        while not shutdown_event.is_set():
             sync_offline_data()
-            time.sleep(30)
+            sync_wakeup.wait(30)
+            sync_wakeup.clear()
     threading.Thread(target=loop, daemon=True).start()
 
-start_sync_loop()
+# ──────────────────────────────────────────────────────────────────────────────
+# Startup
+# ──────────────────────────────────────────────────────────────────────────────
+# Importing this module touches no hardware, writes nothing to disk and starts
+# no threads, so it can be imported by tests and tools. It is not cheap,
+# though: the pipeline modules load cv2 and numpy (see
+# benchmarks/import_time.py). init_storage() opens the on-disk state the
+# routes need (create_app() always calls it); start_services() brings up the
+# camera, GPS, the DB pool and every background loop, and create_app() calls
+# it unless asked not to.
+_services_lock = threading.Lock()
+_services_started = False
+
+def init_storage():
+    global snapshot_store, snapshots, offline_journal, report_engine
+    with _services_lock:
+        if snapshots is not None:
+            return
+        os.makedirs(SNAPSHOT_FOLDER, exist_ok=True)
+        snapshot_store = SnapshotStore(SNAPSHOT_FOLDER, budget_bytes=SNAPSHOT_BUDGET_MB << 20,
+                                       max_age=SNAPSHOT_MAX_AGE_DAYS * 86400)
+        offline_journal = OfflineJournal(OFFLINE_DIR, segment_bytes=OFFLINE_SEGMENT_BYTES,
+                                         max_bytes=OFFLINE_MAX_BYTES, fsync=OFFLINE_FSYNC,
+                                         fsync_interval=OFFLINE_FSYNC_INTERVAL)
+        if offline_journal.import_json_file(OFFLINE_FILE):
+            print(f"Imported legacy offline queue from {OFFLINE_FILE}")
+        report_engine = register_reports(ReportEngine(REPORT_FOLDER, wait=REPORT_WAIT_SECONDS))
+        # assigned last: it is the "storage is ready" flag checked above
+        snapshots = SnapshotWriter(snapshot_store, quality=SNAPSHOT_JPEG_QUALITY,
+                                   thumb_width=SNAPSHOT_THUMB_WIDTH, thumb_quality=SNAPSHOT_THUMB_QUALITY,
+                                   max_queue=SNAPSHOT_QUEUE)
+
+def start_services():
+    global picam2, _services_started
+    init_storage()
+    with _services_lock:
+        if _services_started:
+            return
+        _services_started = True
+    picam2 = init_camera()
+    db_pool.warm()
+    threading.Thread(target=gps_updater, daemon=True).start()
+    threading.Thread(target=capture_loop, daemon=True).start()
+    for t in enrich_threads + [finalize_thread, consumer_thread]:
+        t.start()
+    if SUMMONS_REFRESH_SECONDS > 0:
+        threading.Thread(target=summons_refresh_loop, daemon=True).start()
+    threading.Thread(target=snapshot_store.adopt_flat_files, daemon=True).start()  # old flat layout
+    connectivity.on_reconnect(sync_wakeup.set)
+    connectivity.start()
+    start_sync_loop()
+    atexit.register(stop_background_services)
+
+def create_app(start_background=True):
+    app = Flask(__name__)
+    app.secret_key = SECRET_KEY
+    app.config.update(
+        SESSION_COOKIE_SECURE=True,
+        SESSION_COOKIE_HTTPONLY=True,
+        SESSION_COOKIE_SAMESITE="Lax",
+    )
+    app.register_blueprint(bp)
+    init_storage()
+    if start_background:
+        start_services()
+    return app
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Main
 # ──────────────────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
     # If you run behind a reverse proxy with TLS termination, adjust as needed.
-    app.run(host="0.0.0.0", port=int(os.getenv("PORT", "5001")), debug=False)
+    create_app().run(host="0.0.0.0", port=int(os.getenv("PORT", "5001")), debug=False)
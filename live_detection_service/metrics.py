@@ -0,0 +1,58 @@
+from __future__ import annotations
+import threading
+from collections import deque
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Latency accounting (kept tiny: a bounded window of recent samples)
+# ──────────────────────────────────────────────────────────────────────────────
+class LatencyStats:
+    def __init__(self, window: int = 512):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total, peak = self.count, self.total, self.max
+
+        def pct(p):
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            "count": count,
+            "avg_ms": round(1000 * total / count, 1) if count else 0.0,
+            "p50_ms": round(1000 * pct(0.50), 1),
+            "p95_ms": round(1000 * pct(0.95), 1),
+            "p99_ms": round(1000 * pct(0.99), 1),
+            "max_ms": round(1000 * peak, 1),
+        }
+
+class StageTimer:
+    # Named LatencyStats, e.g. one per pipeline stage or per endpoint.
+    def __init__(self, *names, window: int = 512):
+        self._window = window
+        self._stages = {n: LatencyStats(window) for n in names}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        stats = self._stages.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self._stages.setdefault(name, LatencyStats(self._window))
+        stats.record(seconds)
+
+    def snapshot(self) -> dict:
+        return {name: s.snapshot() for name, s in list(self._stages.items())}
@@ -0,0 +1,192 @@
+from __future__ import annotations
+import argparse
+import os
+import re
+import sys
+from datetime import date
+from pathlib import Path
+
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Versioned schema migrations + partition maintenance
+#
+#   python migrate.py              apply pending migrations/NNNN_*.sql, add upcoming partitions
+#   python migrate.py status       list applied / pending migrations
+#   python migrate.py rotate       add upcoming monthly partitions; with
+#                                  GPS_RETENTION_MONTHS set, also drop older ones
+#   python migrate.py explain      EXPLAIN the hot dashboard queries
+#
+# Applied versions are recorded in `schema_migrations`. Run it on every
+# database holding these tables (the Pi and the dashboard server), and
+# schedule `rotate` monthly (cron) so pmax never has to absorb a new month.
+# Nothing is ever dropped unless GPS_RETENTION_MONTHS is configured, and
+# `migrate` itself never drops partitions.
+# ──────────────────────────────────────────────────────────────────────────────
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+# table -> partitioning column
+PARTITIONED_TABLES = {"gps_logs": "time", "gps_history": "timestamp"}
+GPS_RETENTION_MONTHS = int(os.getenv("GPS_RETENTION_MONTHS", "0"))  # 0 / unset = keep forever
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+def connect():
+    return pymysql.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        user=os.getenv("DB_USER", "lpr_user"),
+        password=os.getenv("DB_PASSWORD", ""),
+        database=os.getenv("DB_NAME", "lpr_system"),
+        autocommit=True,
+        cursorclass=pymysql.cursors.DictCursor,
+    )
+
+def available_migrations():
+    found = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        m = re.match(r"(\d+)_(.+)\.sql$", path.name)
+        if m:
+            found.append((int(m.group(1)), m.group(2), path))
+    return found
+
+def split_statements(sql: str):
+    # Migrations are plain DDL/DML (no procedures), so ';' at end of line
+    # is a safe statement separator once comments are stripped.
+    lines = [l for l in sql.splitlines() if not l.strip().startswith("--")]
+    return [s.strip() for s in re.split(r";\s*$", "\n".join(lines), flags=re.M) if s.strip()]
+
+def applied_versions(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version int NOT NULL PRIMARY KEY,
+            name varchar(255) NOT NULL,
+            applied_at datetime NOT NULL DEFAULT current_timestamp()
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row["version"] for row in cursor.fetchall()}
+
+def migrate(conn):
+    with conn.cursor() as cursor:
+        done = applied_versions(cursor)
+        for version, name, path in available_migrations():
+            if version in done:
+                continue
+            print(f"Applying {path.name} ...")
+            # MySQL DDL commits implicitly, so a failed migration stops here
+            # and must be fixed by hand before re-running.
+            for statement in split_statements(path.read_text()):
+                cursor.execute(statement)
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+    print("Schema is up to date.")
+
+def status(conn):
+    with conn.cursor() as cursor:
+        done = applied_versions(cursor)
+    for version, name, _ in available_migrations():
+        print(f"{version:04d}  {'applied' if version in done else 'PENDING'}  {name}")
+
+# ── partitions
+def _add_months(d: date, n: int) -> date:
+    month = d.month - 1 + n
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+def _partitions(cursor, table):
+    cursor.execute("""
+        SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS bound
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    return cursor.fetchall()
+
+def rotate(conn, today=None, months_ahead=PARTITION_MONTHS_AHEAD, retention_months=GPS_RETENTION_MONTHS):
+    today = today or date.today()
+    this_month = today.replace(day=1)
+    with conn.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            parts = _partitions(cursor, table)
+            names = [p["name"] for p in parts]
+            if "pmax" not in names:
+                print(f"{table}: not partitioned yet, skipping")
+                continue
+
+            # 1) split pmax so every month up to `months_ahead` has its own partition
+            monthly = sorted(n for n in names if re.fullmatch(r"p\d{6}", n))
+            if monthly:
+                last = monthly[-1]
+                start = _add_months(date(int(last[1:5]), int(last[5:7]), 1), 1)
+            elif len(parts) > 1:
+                # first run after 0003: continue from the bound of p_old
+                cursor.execute("SELECT FROM_DAYS(%s) AS d", (int(parts[-2]["bound"]),))
+                start = cursor.fetchone()["d"].replace(day=1)
+            else:
+                start = this_month
+            month = start
+            new_parts = []
+            while month <= _add_months(this_month, months_ahead):
+                upper = _add_months(month, 1)
+                new_parts.append(f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))")
+                month = upper
+            if new_parts:
+                new_parts.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+                cursor.execute(f"ALTER TABLE `{table}` REORGANIZE PARTITION pmax INTO ({', '.join(new_parts)})")
+                print(f"{table}: added {len(new_parts) - 1} monthly partitions")
+
+            # 2) retention: drop whole months older than the cutoff (cheap, no row deletes)
+            if retention_months <= 0:
+                continue
+            cutoff = _add_months(this_month, -retention_months)
+            expired = []
+            for p in _partitions(cursor, table):
+                if p["name"] == "pmax":
+                    continue
+                cursor.execute("SELECT FROM_DAYS(%s) AS d", (int(p["bound"]),))
+                if cursor.fetchone()["d"] <= cutoff:
+                    expired.append(p["name"])
+            if expired:
+                cursor.execute(f"ALTER TABLE `{table}` DROP PARTITION {', '.join(expired)}")
+                print(f"{table}: dropped {', '.join(expired)} (older than {cutoff})")
+
+def explain(conn):
+    end = date.today()
+    start = _add_months(end.replace(day=1), -1)
+    queries = {
+        "gps history (dashboard /gps-tracking-history)": (
+            "SELECT plate, latitude, longitude, speed, time FROM gps_logs "
+            "WHERE plate_norm = %s AND time >= %s AND time < %s ORDER BY time ASC",
+            ("VMD9454", start, end)),
+        "received plates by day (dashboard /api/received-plates)": (
+            "SELECT * FROM dashboard_plates WHERE time >= %s AND time < %s ORDER BY id DESC",
+            (start, end)),
+    }
+    with conn.cursor() as cursor:
+        for label, (sql, params) in queries.items():
+            cursor.execute("EXPLAIN " + sql, params)
+            print(f"-- {label}")
+            for row in cursor.fetchall():
+                print(f"   table={row.get('table')} type={row.get('type')} key={row.get('key')} rows={row.get('rows')}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LPR schema migrations")
+    parser.add_argument("command", nargs="?", default="migrate", choices=["migrate", "status", "rotate", "explain"])
+    args = parser.parse_args(argv)
+    conn = connect()
+    try:
+        if args.command == "migrate":
+            migrate(conn)
+            rotate(conn, retention_months=0)  # partitions only; dropping data is `rotate`'s job
+        elif args.command == "status":
+            status(conn)
+        elif args.command == "rotate":
+            rotate(conn)
+        else:
+            explain(conn)
+    finally:
+        conn.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
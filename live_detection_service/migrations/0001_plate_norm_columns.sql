@@ -0,0 +1,18 @@
+-- Normalized plate key (upper case, no spaces) as a stored generated column,
+-- so lookups can use `plate_norm = %s` against an index instead of
+-- wrapping the column in UPPER().
+
+ALTER TABLE `gps_logs`
+  ADD COLUMN `plate_norm` varchar(20) AS (UPPER(REPLACE(`plate`, ' ', ''))) STORED AFTER `plate`;
+
+ALTER TABLE `gps_history`
+  ADD COLUMN `plate_norm` varchar(20) AS (UPPER(REPLACE(`plate`, ' ', ''))) STORED AFTER `plate`;
+
+ALTER TABLE `dashboard_plates`
+  ADD COLUMN `plate_norm` varchar(20) AS (UPPER(REPLACE(`plate`, ' ', ''))) STORED AFTER `plate`;
+
+ALTER TABLE `detected_plates`
+  ADD COLUMN `plate_norm` varchar(20) AS (UPPER(REPLACE(`plate`, ' ', ''))) STORED AFTER `plate`;
+
+ALTER TABLE `plate_history`
+  ADD COLUMN `plate_norm` varchar(20) AS (UPPER(REPLACE(`plate`, ' ', ''))) STORED AFTER `plate`;
@@ -0,0 +1,20 @@
+-- Composite (plate, time) indexes for per-vehicle history lookups and plain
+-- time indexes for date-range listings.
+
+ALTER TABLE `gps_logs`
+  ADD INDEX `idx_gps_logs_plate_time` (`plate_norm`, `time`),
+  ADD INDEX `idx_gps_logs_time` (`time`);
+
+ALTER TABLE `gps_history`
+  ADD INDEX `idx_gps_history_plate_time` (`plate_norm`, `timestamp`),
+  ADD INDEX `idx_gps_history_time` (`timestamp`);
+
+ALTER TABLE `dashboard_plates`
+  ADD INDEX `idx_dashboard_plates_time` (`time`),
+  ADD INDEX `idx_dashboard_plates_plate_time` (`plate_norm`, `time`);
+
+ALTER TABLE `detected_plates`
+  ADD INDEX `idx_detected_plates_plate_time` (`plate_norm`, `timestamp`);
+
+ALTER TABLE `plate_history`
+  ADD INDEX `idx_plate_history_plate_time` (`plate_norm`, `timestamp`);
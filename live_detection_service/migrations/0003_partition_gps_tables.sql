@@ -0,0 +1,33 @@
+-- Monthly RANGE partitions for the two GPS tables (one row per second per
+-- vehicle). The partition column has to be part of every unique key, so the
+-- primary key becomes (id, time) and the time column NOT NULL. Rows without
+-- a time land in p_old and are removed by the first retention run.
+--
+-- Only p_old and pmax are created here; `python migrate.py rotate` splits
+-- pmax into the monthly partitions and drops months past retention.
+
+UPDATE `gps_logs` SET `time` = '1970-01-01 00:00:00' WHERE `time` IS NULL;
+
+ALTER TABLE `gps_logs`
+  MODIFY `time` datetime NOT NULL DEFAULT current_timestamp(),
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (`id`, `time`);
+
+ALTER TABLE `gps_logs`
+  PARTITION BY RANGE (TO_DAYS(`time`)) (
+    PARTITION p_old VALUES LESS THAN (TO_DAYS('2025-08-01')),
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+  );
+
+UPDATE `gps_history` SET `timestamp` = '1970-01-01 00:00:00' WHERE `timestamp` IS NULL;
+
+ALTER TABLE `gps_history`
+  MODIFY `timestamp` datetime NOT NULL DEFAULT current_timestamp(),
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (`id`, `timestamp`);
+
+ALTER TABLE `gps_history`
+  PARTITION BY RANGE (TO_DAYS(`timestamp`)) (
+    PARTITION p_old VALUES LESS THAN (TO_DAYS('2025-08-01')),
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+  );
@@ -0,0 +1,8 @@
+-- Plain time indexes so the streaming exports (/api/export/detected-plates)
+-- scan only the requested date range.
+
+ALTER TABLE `plate_history`
+  ADD INDEX `idx_plate_history_time` (`timestamp`);
+
+ALTER TABLE `detected_plates`
+  ADD INDEX `idx_detected_plates_time` (`timestamp`);
@@ -0,0 +1,123 @@
+from __future__ import annotations
+import threading
+import time
+
+import cv2
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Shared MJPEG preview encoder
+# ──────────────────────────────────────────────────────────────────────────────
+class MjpegBroadcaster:
+    # One thread reads the newest frame from the ring buffer, resizes and
+    # JPEG-encodes it once, and publishes the finished multipart chunk as an
+    # immutable bytes object. Every /video_feed client yields that same
+    # object. A client that is slower than the encoder simply skips to the
+    # newest chunk when it is ready again, so one slow viewer never delays
+    # the others or queues frames. The encoder runs only while someone is
+    # watching and stops idle_timeout seconds after the last viewer leaves.
+    def __init__(self, ring, fps=10.0, quality=70, size=None, idle_timeout=5.0):
+        self.ring = ring
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.quality = int(quality)
+        self.size = tuple(size) if size else None  # (width, height) or None = capture size
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._chunk = None
+        self._seq = 0
+        self._subscribers = 0
+        self._thread = None
+        self._stopped = False
+        self.frames_encoded = 0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.encode_time = 0.0
+        self.bytes_encoded = 0
+
+    def _ensure_running(self):
+        # caller holds self._cond
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        ring_seq = self.ring.seq
+        idle_since = None
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                if self._subscribers == 0:
+                    idle_since = idle_since or time.time()
+                    if time.time() - idle_since >= self.idle_timeout:
+                        self._thread = None
+                        return
+                else:
+                    idle_since = None
+
+            started = time.time()
+            ring_seq, frame = self.ring.wait_newer(ring_seq, timeout=1.0)
+            if frame is None:
+                continue
+            encode_started = time.time()
+            if self.size and (frame.shape[1], frame.shape[0]) != self.size:
+                frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+            ok, buffer = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+            if not ok:
+                continue
+            jpeg = buffer.tobytes()
+            chunk = (b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n" % len(jpeg)
+                     + jpeg + b"\r\n")
+            with self._cond:
+                self._chunk = chunk
+                self._seq += 1
+                self.frames_encoded += 1
+                self.encode_time += time.time() - encode_started
+                self.bytes_encoded += len(jpeg)
+                self._cond.notify_all()
+
+            elapsed = time.time() - started
+            if self.interval > elapsed:
+                time.sleep(self.interval - elapsed)
+
+    def stream(self, stop=None, timeout=5.0):
+        # Generator for one client; yields shared chunks, newest only.
+        with self._cond:
+            self._subscribers += 1
+            self._ensure_running()
+        try:
+            seen = 0
+            while stop is None or not stop.is_set():
+                with self._cond:
+                    if not self._cond.wait_for(lambda: self._seq > seen or self._stopped, timeout=timeout):
+                        continue
+                    if self._stopped:
+                        return
+                    if seen:
+                        self.frames_skipped += self._seq - seen - 1
+                    seen, chunk = self._seq, self._chunk
+                    self.frames_sent += 1
+                yield chunk
+        finally:
+            with self._cond:
+                self._subscribers -= 1
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            encoded = self.frames_encoded
+            return {
+                "viewers": self._subscribers,
+                "encoder_running": self._thread is not None and self._thread.is_alive(),
+                "target_fps": round(1.0 / self.interval, 1) if self.interval else None,
+                "quality": self.quality,
+                "size": list(self.size) if self.size else None,
+                "frames_encoded": encoded,
+                "frames_sent": self.frames_sent,
+                "frames_skipped": self.frames_skipped,
+                "avg_encode_ms": round(1000 * self.encode_time / encoded, 2) if encoded else 0.0,
+                "avg_frame_bytes": self.bytes_encoded // encoded if encoded else 0,
+            }
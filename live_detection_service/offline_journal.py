@@ -0,0 +1,319 @@
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Append-only, segmented offline journal
+# ──────────────────────────────────────────────────────────────────────────────
+# Layout of the journal directory:
+#   00000001.log, 00000002.log, ...   segments, one record per line:
+#                                     "<crc32 hex>\t<json>\n"
+#   ack.json                          {"segment": n, "offset": bytes} — every
+#                                     record before this position was delivered
+#   journal.id                        random id of this journal; together with
+#                                     a batch position it names a batch uniquely
+#
+# Appends only ever touch the tail of the newest segment, so queueing an item
+# costs the same with 10 or 100k items pending. A torn write from a power cut
+# leaves at most one bad trailing line, which is truncated on open. Fully
+# acknowledged segments are deleted (compaction); when the journal exceeds
+# max_bytes the oldest segments are dropped.
+
+FSYNC_ALWAYS = "always"
+FSYNC_INTERVAL = "interval"
+FSYNC_NEVER = "never"
+
+class JournalBatch:
+    def __init__(self, items, positions, start, journal_id=""):
+        self.items = items          # decoded records, oldest first
+        self.positions = positions  # journal position just after each item
+        self.start = start          # position of the first item
+        self.journal_id = journal_id
+
+    @property
+    def key(self) -> str:
+        # stable, globally unique id for this batch, usable as an idempotency key
+        return f"{self.journal_id}:{self.start[0]}:{self.start[1]}:{len(self.items)}"
+
+    def __len__(self):
+        return len(self.items)
+
+class OfflineJournal:
+    def __init__(self, directory, segment_bytes=1 << 20, max_bytes=256 << 20,
+                 fsync=FSYNC_INTERVAL, fsync_interval=1.0):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync_policy = fsync
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._segments = {}   # segment id -> {"records": n, "bytes": n}
+        self._writer = None
+        self._active = 0
+        self._last_fsync = 0.0
+        self._dirty = False
+        self.pending = 0
+        self.appended = 0
+        self.acked = 0
+        self.dropped = 0
+        self.corrupt = 0
+        self.journal_id = self._load_journal_id()
+        self._ack = self._load_ack()
+        self._recover()
+
+    # ── paths / ack state
+    def _segment_path(self, seg: int) -> Path:
+        return self.dir / f"{seg:08d}.log"
+
+    def _load_journal_id(self) -> str:
+        path = self.dir / "journal.id"
+        try:
+            value = path.read_text().strip()
+            if value:
+                return value
+        except OSError:
+            pass
+        value = uuid.uuid4().hex
+        path.write_text(value)
+        return value
+
+    def _load_ack(self):
+        try:
+            with open(self.dir / "ack.json") as f:
+                data = json.load(f)
+            return int(data["segment"]), int(data["offset"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0, 0
+
+    def _store_ack(self):
+        tmp = self.dir / "ack.json.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"segment": self._ack[0], "offset": self._ack[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.dir / "ack.json")
+
+    # ── startup: count records, truncate a torn tail
+    def _recover(self):
+        ids = sorted(int(p.stem) for p in self.dir.glob("*.log") if p.stem.isdigit())
+        for seg in ids:
+            path = self._segment_path(seg)
+            records, good = 0, 0
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n") or self._decode(line) is None:
+                        if seg == ids[-1] and not line.endswith(b"\n"):
+                            break  # torn final write
+                        self.corrupt += 1
+                        good += len(line)
+                        continue
+                    records += 1
+                    good += len(line)
+            if path.stat().st_size != good:
+                with open(path, "r+b") as f:
+                    f.truncate(good)
+            self._segments[seg] = {"records": records, "bytes": good}
+
+        if ids and self._ack[0] < ids[0]:
+            self._ack = (ids[0], 0)
+        self.pending = self._count_from(self._ack)
+        self._active = ids[-1] if ids else max(1, self._ack[0])
+        self._open_writer()
+
+    def _count_from(self, pos) -> int:
+        seg, offset = pos
+        total = 0
+        for sid, meta in self._segments.items():
+            if sid > seg:
+                total += meta["records"]
+            elif sid == seg and meta["bytes"] > offset:
+                with open(self._segment_path(sid), "rb") as f:
+                    f.seek(offset)
+                    total += sum(1 for line in f if self._decode(line) is not None)
+        return total
+
+    def _open_writer(self):
+        self._writer = open(self._segment_path(self._active), "ab")
+        self._segments.setdefault(self._active, {"records": 0, "bytes": self._writer.tell()})
+
+    @staticmethod
+    def _encode(item) -> bytes:
+        payload = json.dumps(item, separators=(",", ":"), default=str).encode()
+        return b"%08x\t%s\n" % (zlib.crc32(payload), payload)
+
+    @staticmethod
+    def _decode(line: bytes):
+        try:
+            crc, payload = line.rstrip(b"\n").split(b"\t", 1)
+            if int(crc, 16) != zlib.crc32(payload):
+                return None
+            return json.loads(payload)
+        except ValueError:
+            return None
+
+    # ── writer
+    def append(self, item):
+        record = self._encode(item)
+        with self._lock:
+            self._writer.write(record)
+            meta = self._segments[self._active]
+            meta["records"] += 1
+            meta["bytes"] += len(record)
+            self.pending += 1
+            self.appended += 1
+            self._dirty = True
+            self._maybe_fsync()
+            if meta["bytes"] >= self.segment_bytes:
+                self._rotate()
+            self._enforce_cap()
+
+    def _maybe_fsync(self, force=False):
+        if not self._dirty:
+            return
+        self._writer.flush()
+        now = time.time()
+        if (force or self.fsync_policy == FSYNC_ALWAYS
+                or (self.fsync_policy == FSYNC_INTERVAL and now - self._last_fsync >= self.fsync_interval)):
+            os.fsync(self._writer.fileno())
+            self._last_fsync = now
+            self._dirty = False
+
+    def _rotate(self):
+        self._maybe_fsync(force=self.fsync_policy != FSYNC_NEVER)
+        self._writer.close()
+        self._active += 1
+        self._open_writer()
+
+    def _enforce_cap(self):
+        while self.total_bytes() > self.max_bytes and len(self._segments) > 1:
+            oldest = min(self._segments)
+            if oldest == self._active:
+                break
+            meta = self._segments.pop(oldest)
+            lost = meta["records"]
+            if self._ack[0] == oldest:
+                lost = self._count_segment_from(oldest, self._ack[1], meta)
+            if self._ack[0] <= oldest:
+                self._ack = (min(self._segments), 0)
+                self._store_ack()
+            self._segment_path(oldest).unlink(missing_ok=True)
+            self.pending -= lost
+            self.dropped += lost
+            print(f"Offline journal over {self.max_bytes} bytes, dropped {lost} oldest records")
+
+    def _count_segment_from(self, seg, offset, meta):
+        if offset == 0:
+            return meta["records"]
+        with open(self._segment_path(seg), "rb") as f:
+            f.seek(offset)
+            return sum(1 for line in f if self._decode(line) is not None)
+
+    # ── reader
+    def read_batch(self, max_items=500, max_bytes=512 << 10) -> JournalBatch:
+        with self._lock:
+            self._writer.flush()
+            items, positions = [], []
+            seg, offset = self._normalized_ack()
+            start = (seg, offset)
+            size = 0
+            while len(items) < max_items and size < max_bytes and seg in self._segments:
+                with open(self._segment_path(seg), "rb") as f:
+                    f.seek(offset)
+                    for line in f:
+                        offset += len(line)
+                        if not line.endswith(b"\n"):
+                            break
+                        item = self._decode(line)
+                        if item is None:
+                            continue
+                        items.append(item)
+                        positions.append((seg, offset))
+                        size += len(line)
+                        if len(items) >= max_items or size >= max_bytes:
+                            break
+                if len(items) >= max_items or size >= max_bytes or seg == self._active:
+                    break
+                seg, offset = self._next_segment(seg), 0
+            return JournalBatch(items, positions, start, self.journal_id)
+
+    def ack(self, batch: JournalBatch, count: int | None = None):
+        # Marks the first `count` items (default: all) of a batch as delivered.
+        count = len(batch) if count is None else min(count, len(batch))
+        if count <= 0:
+            return
+        with self._lock:
+            self._ack = batch.positions[count - 1]
+            self.pending = max(0, self.pending - count)
+            self.acked += count
+            self._ack = self._normalized_ack()
+            self._store_ack()
+            self._compact()
+
+    def _next_segment(self, seg):
+        later = [s for s in self._segments if s > seg]
+        return min(later) if later else seg + 1
+
+    def _normalized_ack(self):
+        seg, offset = self._ack
+        if seg not in self._segments and self._segments:
+            later = [s for s in self._segments if s > seg]
+            return (min(later), 0) if later else (self._active, self._segments[self._active]["bytes"])
+        while seg != self._active and offset >= self._segments[seg]["bytes"]:
+            seg, offset = self._next_segment(seg), 0
+        return seg, offset
+
+    def _compact(self):
+        for seg in sorted(self._segments):
+            if seg >= self._ack[0] or seg == self._active:
+                break
+            del self._segments[seg]
+            self._segment_path(seg).unlink(missing_ok=True)
+
+    # ── misc
+    def import_json_file(self, path) -> int:
+        # One-off migration of the old offline_queue.json array.
+        path = Path(path)
+        if not path.exists():
+            return 0
+        try:
+            with open(path) as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            items = []
+        for item in items if isinstance(items, list) else []:
+            self.append(item)
+        with self._lock:
+            self._maybe_fsync(force=True)
+        path.rename(path.with_name(path.name + ".imported"))
+        return len(items) if isinstance(items, list) else 0
+
+    def total_bytes(self) -> int:
+        return sum(m["bytes"] for m in self._segments.values())
+
+    def flush(self):
+        with self._lock:
+            self._maybe_fsync(force=True)
+
+    def close(self):
+        with self._lock:
+            self._maybe_fsync(force=True)
+            self._writer.close()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "appended": self.appended,
+            "acked": self.acked,
+            "dropped": self.dropped,
+            "corrupt": self.corrupt,
+            "segments": len(self._segments),
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+            "fsync": self.fsync_policy,
+        }
@@ -0,0 +1,126 @@
+from __future__ import annotations
+import threading
+
+import cv2
+import numpy as np
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Local plate-candidate finder (CPU only, no model files)
+# ──────────────────────────────────────────────────────────────────────────────
+class PlateCandidateFinder:
+    # Plates are compact, wide regions packed with strong vertical edges
+    # (character strokes). The frame is reduced to a horizontal-gradient map,
+    # binarized with Otsu, and closed with a wide kernel so the characters of
+    # one plate merge into a single blob. Blobs with a plate-like size, aspect
+    # ratio and edge density become candidate boxes. Both single-line (~4:1)
+    # and two-line (~1.6:1) plates pass the aspect filter. The polarity does
+    # not matter, so white-on-black Malaysian plates work the same as
+    # black-on-white ones.
+    def __init__(self, min_area_ratio=0.0015, max_area_ratio=0.12, min_aspect=1.3, max_aspect=6.5,
+                 min_edge_density=0.25, max_candidates=3, pad=0.3, crop_height=96):
+        self.min_area_ratio = min_area_ratio
+        self.max_area_ratio = max_area_ratio
+        self.min_aspect = min_aspect
+        self.max_aspect = max_aspect
+        self.min_edge_density = min_edge_density
+        self.max_candidates = max_candidates
+        self.pad = pad                # padding around each box, as a fraction of its size
+        self.crop_height = crop_height  # crops smaller than this are upscaled in the mosaic
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.frames_with_candidates = 0
+        self.candidates = 0
+
+    def find(self, frame) -> list:
+        # Returns up to max_candidates (x, y, w, h) boxes, best first.
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        h, w = gray.shape[:2]
+        area = float(h * w)
+
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        grad = cv2.convertScaleAbs(cv2.Sobel(blurred, cv2.CV_16S, 1, 0, ksize=3))
+        _, edges = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+        kw = max(9, (w // 40) | 1)
+        closed = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (kw, 3)))
+        closed = cv2.morphologyEx(closed, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3)))
+        contours, _ = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        scored = []
+        for contour in contours:
+            x, y, bw, bh = cv2.boundingRect(contour)
+            if bh == 0:
+                continue
+            ratio = bw * bh / area
+            aspect = bw / bh
+            if not (self.min_area_ratio <= ratio <= self.max_area_ratio
+                    and self.min_aspect <= aspect <= self.max_aspect):
+                continue
+            density = cv2.countNonZero(edges[y:y + bh, x:x + bw]) / float(bw * bh)
+            if density < self.min_edge_density:
+                continue
+            # solid, well-filled blobs score higher than ragged texture
+            fill = cv2.contourArea(contour) / float(bw * bh)
+            scored.append((density * fill, (x, y, bw, bh)))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        boxes = []
+        for _, box in scored:
+            if all(_overlap(box, kept) < 0.3 for kept in boxes):
+                boxes.append(box)
+            if len(boxes) >= self.max_candidates:
+                break
+
+        with self._lock:
+            self.frames += 1
+            self.candidates += len(boxes)
+            if boxes:
+                self.frames_with_candidates += 1
+        return boxes
+
+    def mosaic(self, frame, boxes):
+        # Padded crops stacked vertically on a neutral background, so several
+        # candidates cost one upload. Crops keep their native resolution
+        # unless they are shorter than crop_height.
+        h, w = frame.shape[:2]
+        crops = []
+        for x, y, bw, bh in boxes:
+            px, py = int(bw * self.pad), int(bh * self.pad)
+            x0, y0 = max(0, x - px), max(0, y - py)
+            x1, y1 = min(w, x + bw + px), min(h, y + bh + py)
+            crop = frame[y0:y1, x0:x1]
+            if crop.shape[0] < self.crop_height:
+                scale = self.crop_height / float(crop.shape[0])
+                crop = cv2.resize(crop, (int(crop.shape[1] * scale), self.crop_height),
+                                  interpolation=cv2.INTER_CUBIC)
+            crops.append(crop)
+        if not crops:
+            return None
+        gap = 16
+        width = max(c.shape[1] for c in crops)
+        height = sum(c.shape[0] for c in crops) + gap * (len(crops) - 1)
+        canvas = np.full((height, width) + frame.shape[2:], 128, dtype=frame.dtype)
+        top = 0
+        for crop in crops:
+            canvas[top:top + crop.shape[0], :crop.shape[1]] = crop
+            top += crop.shape[0] + gap
+        return canvas
+
+    def stats(self) -> dict:
+        with self._lock:
+            frames = self.frames
+            return {
+                "frames": frames,
+                "frames_with_candidates": self.frames_with_candidates,
+                "frames_without_candidates": frames - self.frames_with_candidates,
+                "avg_candidates": round(self.candidates / frames, 2) if frames else 0.0,
+            }
+
+def _overlap(a, b) -> float:
+    # intersection over the smaller box
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    smaller = min(aw * ah, bw * bh)
+    return iw * ih / float(smaller) if smaller else 0.0
@@ -0,0 +1,187 @@
+from __future__ import annotations
+import math
+import re
+import threading
+import time
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Multi-frame plate tracker / voter
+# ──────────────────────────────────────────────────────────────────────────────
+# One physical plate is usually read several times while it is in view, and
+# OCR misreads differ from frame to frame (BPH1200, BPH120, BPH120D, BPH1).
+# Reads are grouped into a track when their strings are close (edit distance
+# or one contained in the other) and they arrive close together in time and
+# GPS position. Two complete, well-formed plates of the same length merge only
+# when they differ in one character that OCR confuses (BPH1200 / BPH120D);
+# any other difference is a different car: BPH1200 and BPW1200. When a
+# track goes quiet it is closed and the string with the highest summed
+# confidence wins. Only that one consolidated detection goes downstream.
+
+# Malaysian plates: 1-3 prefix letters, 1-4 digits, optional suffix letter
+PLATE_PATTERN = re.compile(r"^[A-Z]{1,3}\d{1,4}[A-Z]?$")
+
+# characters OCR misreads as one another; a substitution inside a group is a
+# misread, anything else is a different plate
+CONFUSABLE = ("0DO", "1I", "8B", "5S", "2Z")
+_CONFUSABLE_GROUP = {c: i for i, group in enumerate(CONFUSABLE) for c in group}
+
+def normalize_plate(text) -> str:
+    return re.sub(r"[^A-Z0-9]", "", str(text or "").upper())
+
+def edit_distance(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+def same_plate(a: str, b: str, max_distance: int) -> bool:
+    # Could `a` and `b` be two reads of one physical plate?
+    if a == b:
+        return True
+    if len(a) == len(b) and PLATE_PATTERN.match(a) and PLATE_PATTERN.match(b):
+        diff = [(x, y) for x, y in zip(a, b) if x != y]
+        return (max_distance >= 1 and len(diff) == 1
+                and _CONFUSABLE_GROUP.get(diff[0][0], -1) == _CONFUSABLE_GROUP.get(diff[0][1], -2))
+    if edit_distance(a, b) <= max_distance:
+        return True
+    shorter, longer = sorted((a, b), key=len)
+    return len(shorter) >= 3 and shorter in longer
+
+def distance_m(lat1, lon1, lat2, lon2) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(a))
+
+class PlateTrack:
+    __slots__ = ("votes", "read_plates", "reads", "first_seen", "last_seen", "latitude", "longitude",
+                 "best_score", "best_frame", "best_read")
+
+    def __init__(self, now):
+        self.votes = {}        # plate string -> summed confidence
+        self.read_plates = set()  # strings actually read (votes also holds OCR alternatives)
+        self.reads = 0
+        self.first_seen = self.last_seen = now
+        self.latitude = self.longitude = None
+        self.best_score = -1.0
+        self.best_frame = None  # frame of the most confident read (for the snapshot)
+        self.best_read = None
+
+    def add(self, plate, score, candidates, frame, read, latitude, longitude, now, candidate_weight):
+        self.votes[plate] = self.votes.get(plate, 0.0) + score
+        self.read_plates.add(plate)
+        for cand in candidates or []:
+            alt = normalize_plate(cand.get("plate"))
+            if alt and alt != plate:
+                self.votes[alt] = self.votes.get(alt, 0.0) + candidate_weight * float(cand.get("score") or 0)
+        self.reads += 1
+        self.last_seen = now
+        if latitude is not None and longitude is not None:
+            self.latitude, self.longitude = latitude, longitude
+        if score > self.best_score:
+            self.best_score, self.best_frame, self.best_read = score, frame, read
+
+    @property
+    def plate(self) -> str:
+        # well-formed strings win ties against fragments like "BPH1"
+        return max(self.votes, key=lambda p: (self.votes[p] * (1.0 if PLATE_PATTERN.match(p) else 0.5), len(p)))
+
+    @property
+    def vote_share(self) -> float:
+        # fraction of all votes that went to the winning string
+        total = sum(self.votes.values())
+        return self.votes[self.plate] / total if total else 0.0
+
+    def matches(self, plate, max_distance) -> bool:
+        # against what was read, not OCR alternatives: an alternative BPW1200
+        # of a BPH1200 read must not pull a real BPW1200 into this track
+        return any(same_plate(plate, known, max_distance) for known in self.read_plates)
+
+class PlateTracker:
+    def __init__(self, max_distance=1, idle_seconds=2.0, max_track_seconds=10.0, max_move_m=50.0,
+                 min_reads=1, candidate_weight=0.3):
+        self.max_distance = max_distance
+        self.idle_seconds = idle_seconds            # close a track after this long without reads
+        self.max_track_seconds = max_track_seconds  # ...or once it has been open this long
+        self.max_move_m = max_move_m                # GPS gate for joining a track
+        self.min_reads = min_reads                  # tracks with fewer reads are discarded
+        self.candidate_weight = candidate_weight    # vote weight of OCR alternatives
+        self._tracks = []
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.tracks_opened = 0
+        self.tracks_emitted = 0
+        self.tracks_discarded = 0
+
+    def observe(self, results, frame=None, latitude=None, longitude=None, now=None) -> list:
+        # Feeds one frame's recognizer results; returns tracks closed by now.
+        now = now or time.time()
+        with self._lock:
+            closed = self._close_expired(now)
+            for read in results or []:
+                plate = normalize_plate(read.get("plate"))
+                if not plate:
+                    continue
+                score = float(read.get("score") or read.get("dscore") or 0.5)
+                track = self._find(plate, latitude, longitude, now)
+                if track is None:
+                    track = PlateTrack(now)
+                    self._tracks.append(track)
+                    self.tracks_opened += 1
+                track.add(plate, score, read.get("candidates"), frame, read, latitude, longitude,
+                          now, self.candidate_weight)
+                self.reads += 1
+            return closed
+
+    def has_open_tracks(self) -> bool:
+        return bool(self._tracks)
+
+    def expire(self, now=None) -> list:
+        with self._lock:
+            return self._close_expired(now or time.time())
+
+    def flush(self) -> list:
+        with self._lock:
+            return self._close_expired(float("inf"))
+
+    def _find(self, plate, latitude, longitude, now):
+        for track in self._tracks:
+            if now - track.last_seen > self.idle_seconds:
+                continue
+            if (latitude is not None and track.latitude is not None
+                    and distance_m(latitude, longitude, track.latitude, track.longitude) > self.max_move_m):
+                continue
+            if track.matches(plate, self.max_distance):
+                return track
+        return None
+
+    def _close_expired(self, now):
+        closed, still_open = [], []
+        for track in self._tracks:
+            if now - track.last_seen > self.idle_seconds or now - track.first_seen > self.max_track_seconds:
+                if track.reads >= self.min_reads:
+                    closed.append(track)
+                    self.tracks_emitted += 1
+                else:
+                    self.tracks_discarded += 1
+            else:
+                still_open.append(track)
+        self._tracks = still_open
+        return closed
+
+    def stats(self) -> dict:
+        with self._lock:
+            emitted = self.tracks_emitted
+            return {
+                "open_tracks": len(self._tracks),
+                "reads": self.reads,
+                "tracks_opened": self.tracks_opened,
+                "tracks_emitted": emitted,
+                "tracks_discarded": self.tracks_discarded,
+                "reads_per_detection": round(self.reads / emitted, 2) if emitted else 0.0,
+            }
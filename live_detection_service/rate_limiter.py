@@ -0,0 +1,121 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+
+from metrics import LatencyStats
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Token-bucket rate limiting for outbound APIs
+# ──────────────────────────────────────────────────────────────────────────────
+class TokenBucket:
+    # `rate` tokens per second refill a bucket holding at most `burst`.
+    # A blocking caller reserves its token under the lock (the level may go
+    # negative) and then sleeps outside it for exactly the deficit, so
+    # concurrent callers queue up in arrival order and never oversleep or
+    # busy-loop. rate <= 0 disables the limit.
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst if burst is not None else max(1, rate)))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.waits = LatencyStats()
+        self.acquired = 0
+        self.rejected = 0
+        self.throttled = 0  # 429s reported through pause()
+
+    # caller holds self._lock
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self, tokens, timeout):
+        # Returns the seconds to wait for the reserved tokens, or None if the
+        # wait would exceed timeout (nothing is reserved then).
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            delay = max(0.0, self._paused_until - now)
+            deficit = tokens - self._tokens
+            if deficit > 0:
+                delay = max(delay, deficit / self.rate)
+            if timeout is not None and delay > timeout:
+                self.rejected += 1
+                return None
+            self._tokens -= tokens
+            self.acquired += 1
+            return delay
+
+    def acquire(self, tokens: int = 1, timeout: float | None = None) -> bool:
+        delay = self._reserve(tokens, timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        self.waits.record(delay)
+        return True
+
+    def try_acquire(self, tokens: int = 1) -> bool:
+        return self.acquire(tokens, timeout=0.0)
+
+    async def acquire_async(self, tokens: int = 1, timeout: float | None = None) -> bool:
+        delay = self._reserve(tokens, timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.waits.record(delay)
+        return True
+
+    def pause(self, seconds: float):
+        # The server said slow down (429 / Retry-After): hold everyone off.
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+            self.throttled += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            tokens = self._tokens
+            stats = {
+                "rate_per_sec": self.rate,
+                "burst": self.burst,
+                "tokens": round(tokens, 2),
+                "acquired": self.acquired,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+            }
+        stats["wait"] = self.waits.snapshot()
+        return stats
+
+class RateLimiter:
+    # Named buckets, one per upstream API budget. Endpoints without a budget
+    # are not limited, so callers can go through the limiter unconditionally.
+    def __init__(self, budgets=None):
+        self.buckets = {name: TokenBucket(rate, burst) for name, (rate, burst) in (budgets or {}).items()
+                        if rate and rate > 0}
+
+    def acquire(self, endpoint: str, tokens: int = 1, timeout: float | None = None) -> bool:
+        bucket = self.buckets.get(endpoint)
+        return bucket.acquire(tokens, timeout) if bucket else True
+
+    def try_acquire(self, endpoint: str, tokens: int = 1) -> bool:
+        bucket = self.buckets.get(endpoint)
+        return bucket.try_acquire(tokens) if bucket else True
+
+    async def acquire_async(self, endpoint: str, tokens: int = 1, timeout: float | None = None) -> bool:
+        bucket = self.buckets.get(endpoint)
+        return await bucket.acquire_async(tokens, timeout) if bucket else True
+
+    def pause(self, endpoint: str, seconds: float):
+        bucket = self.buckets.get(endpoint)
+        if bucket:
+            bucket.pause(seconds)
+
+    def stats(self) -> dict:
+        return {name: bucket.stats() for name, bucket in self.buckets.items()}
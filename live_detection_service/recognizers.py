@@ -0,0 +1,320 @@
+from __future__ import annotations
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from metrics import LatencyStats
+from plate_tracker import PLATE_PATTERN
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Pluggable plate recognizers
+# ──────────────────────────────────────────────────────────────────────────────
+# A backend has a `name`, `available()` and `recognize(frame, boxes)`, which
+# returns a list of results shaped like Plate Recognizer's
+# ({"plate", "score", "box", "candidates"}) or None if the backend failed
+# (as opposed to "looked and found nothing", which is []). `boxes` are
+# candidate regions from PlateCandidateFinder; None means "not localised".
+
+MODE_CLOUD = "cloud"              # cloud; local only when the cloud is unreachable
+MODE_LOCAL = "local"              # never upload
+MODE_LOCAL_FIRST = "local_first"  # local; escalate low-confidence reads to the cloud
+
+
+class CloudRecognizer:
+    # When a whole view is uploaded at reuse_min_quality or better, each
+    # result carries the uploaded JPEG bytes as "jpeg" so the snapshot
+    # writer can store them instead of encoding the frame again.
+    name = "cloud"
+
+    def __init__(self, upload, is_available, finder=None, full_view=None, crop_quality=90, full_quality=25,
+                 reuse_min_quality=None):
+        self.upload = upload              # upload(jpeg_bytes) -> results | None
+        self.is_available = is_available  # e.g. token configured and link up
+        self.finder = finder
+        self.full_view = full_view or (lambda frame: frame)
+        self.crop_quality = crop_quality
+        self.full_quality = full_quality
+        self.reuse_min_quality = reuse_min_quality
+
+    def available(self) -> bool:
+        return bool(self.is_available())
+
+    def recognize(self, frame, boxes):
+        if boxes and self.finder is not None:
+            results, _ = self._send(self.finder.mosaic(frame, boxes), self.crop_quality)
+            return results
+        results, jpeg = self._send(self.full_view(frame), self.full_quality)
+        if results and self.reuse_min_quality and self.full_quality >= self.reuse_min_quality:
+            for r in results:
+                r["jpeg"] = jpeg
+        return results
+
+    def _send(self, image, quality):
+        ok, buffer = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        if not ok:
+            return None, None
+        jpeg = buffer.tobytes()
+        return self.upload(jpeg), jpeg
+
+class LocalOcrRecognizer:
+    # Plate localisation (PlateCandidateFinder) -> character segmentation
+    # (connected components on the binarized crop, split into one or two
+    # text lines) -> one batched forward pass of a small character
+    # classifier through OpenCV DNN. The classifier is an ONNX model that
+    # takes N x 1 x H x W grayscale characters scaled to [0, 1] and returns
+    # N x len(charset) scores. It is not shipped with the repo; without it
+    # the backend reports itself unavailable.
+    name = "local"
+
+    def __init__(self, model_path, finder, charset="0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+                 input_size=(28, 28), min_chars=2, max_chars=8, pad=0.08):
+        self.model_path = model_path
+        self.finder = finder
+        self.charset = charset
+        self.input_size = tuple(input_size)  # (width, height)
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.pad = pad
+        self._net = None
+        self._lock = threading.Lock()  # cv2.dnn nets are not thread-safe
+        self.load_error = None
+        if model_path and os.path.exists(model_path):
+            try:
+                self._net = cv2.dnn.readNetFromONNX(model_path)
+                self._net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+                self._net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            except cv2.error as e:
+                self.load_error = str(e)
+        elif model_path:
+            self.load_error = f"model not found: {model_path}"
+
+    def available(self) -> bool:
+        return self._net is not None
+
+    def recognize(self, frame, boxes):
+        if self._net is None:
+            return None
+        if boxes is None:
+            boxes = self.finder.find(frame)
+        results = []
+        for box in boxes:
+            result = self._read_box(frame, box)
+            if result:
+                results.append(result)
+        results.sort(key=lambda r: r["score"], reverse=True)
+        return results
+
+    def _read_box(self, frame, box):
+        x, y, w, h = box
+        px, py = int(w * self.pad), int(h * self.pad)
+        crop = frame[max(0, y - py):y + h + py, max(0, x - px):x + w + px]
+        chars = self.segment(crop)
+        if not (self.min_chars <= len(chars) <= self.max_chars):
+            return None
+        probs = self._classify(chars)
+        best = probs.argmax(axis=1)
+        conf = probs[np.arange(len(best)), best]
+        plate = "".join(self.charset[i] for i in best)
+        score = float(conf.min())
+        if not PLATE_PATTERN.match(plate):
+            score *= 0.5
+
+        # alternatives: swap the least certain character for its runner-up
+        candidates = [{"plate": plate, "score": round(score, 4)}]
+        weakest = int(conf.argmin())
+        runner_up = int(np.argsort(probs[weakest])[-2])
+        alt = plate[:weakest] + self.charset[runner_up] + plate[weakest + 1:]
+        alt_score = float(probs[weakest, runner_up])
+        if not PLATE_PATTERN.match(alt):
+            alt_score *= 0.5
+        candidates.append({"plate": alt, "score": round(alt_score, 4)})
+
+        return {
+            "plate": plate,
+            "score": round(score, 4),
+            "box": {"xmin": x, "ymin": y, "xmax": x + w, "ymax": y + h},
+            "candidates": candidates,
+            "source": self.name,
+        }
+
+    def segment(self, crop) -> list:
+        # Returns character images in reading order (top line, then bottom line).
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+        scale = 64.0 / max(1, gray.shape[0]) if gray.shape[0] < 64 else 1.0
+        if scale != 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        # Plates come in both polarities and the crop may include bodywork, so
+        # try both and keep the one that yields more same-height characters.
+        best_binary, blobs = binary, []
+        for candidate in (binary, cv2.bitwise_not(binary)):
+            found = self._char_blobs(candidate)
+            if len(found) > len(blobs):
+                best_binary, blobs = candidate, found
+        binary = best_binary
+        if not blobs:
+            return []
+
+        # one or two text lines: split where the vertical centres jump
+        blobs.sort(key=lambda b: b[1] + b[3] / 2)
+        lines, current = [], [blobs[0]]
+        for blob in blobs[1:]:
+            prev = current[-1]
+            if (blob[1] + blob[3] / 2) - (prev[1] + prev[3] / 2) > 0.6 * max(blob[3], prev[3]):
+                lines.append(current)
+                current = [blob]
+            else:
+                current.append(blob)
+        lines.append(current)
+
+        chars = []
+        for line in lines:
+            for x, y, w, h in sorted(line, key=lambda b: b[0]):
+                char = binary[y:y + h, x:x + w]
+                side = max(w, h) + 4
+                square = np.zeros((side, side), dtype=np.uint8)
+                ox, oy = (side - w) // 2, (side - h) // 2
+                square[oy:oy + h, ox:ox + w] = char
+                chars.append(square)
+        return chars
+
+    @staticmethod
+    def _char_blobs(binary):
+        ph = binary.shape[0]
+        count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        blobs = []
+        for i in range(1, count):
+            x, y, w, h, area = stats[i]
+            if not (0.2 * ph <= h <= 0.95 * ph):
+                continue
+            if not (0.08 <= w / float(h) <= 1.2) or area < 0.15 * w * h:
+                continue
+            blobs.append((int(x), int(y), int(w), int(h)))
+        if not blobs:
+            return []
+        median = sorted(b[3] for b in blobs)[len(blobs) // 2]
+        return [b for b in blobs if abs(b[3] - median) <= 0.25 * median]
+
+    def _classify(self, chars):
+        blob = cv2.dnn.blobFromImages(chars, scalefactor=1 / 255.0, size=self.input_size)
+        with self._lock:
+            self._net.setInput(blob)
+            logits = self._net.forward().reshape(len(chars), -1)
+        logits = logits[:, :len(self.charset)]
+        if logits.min() < 0 or not np.allclose(logits.sum(axis=1), 1.0, atol=1e-3):
+            e = np.exp(logits - logits.max(axis=1, keepdims=True))
+            logits = e / e.sum(axis=1, keepdims=True)
+        return logits
+
+class RecognitionPolicy:
+    # Chooses which backend(s) read a frame and keeps per-backend latency,
+    # read counts and cloud/local agreement (both read the same frame when
+    # a local read is escalated).
+    def __init__(self, cloud=None, local=None, mode=MODE_CLOUD, escalate_below=0.85, min_score=0.5):
+        self.backends = {b.name: b for b in (cloud, local) if b is not None}
+        self.cloud = cloud
+        self.local = local
+        self.mode = mode
+        self.escalate_below = escalate_below
+        self.min_score = min_score
+        self._latency = {name: LatencyStats() for name in self.backends}
+        self._lock = threading.Lock()
+        self._counts = {name: {"calls": 0, "reads": 0, "empty": 0, "failures": 0} for name in self.backends}
+        self.escalations = 0
+        self.fallbacks = 0
+        self.compared = 0
+        self.agreed = 0
+        self.unavailable = 0
+
+    def _run(self, backend, frame, boxes):
+        started = time.time()
+        try:
+            results = backend.recognize(frame, boxes)
+        except Exception as e:
+            print(f"{backend.name} recognizer failed:", e)
+            results = None
+        self._latency[backend.name].record(time.time() - started)
+        with self._lock:
+            counts = self._counts[backend.name]
+            counts["calls"] += 1
+            if results is None:
+                counts["failures"] += 1
+            elif results:
+                counts["reads"] += len(results)
+            else:
+                counts["empty"] += 1
+        for r in results or []:
+            r.setdefault("source", backend.name)
+        return results
+
+    def _usable(self, backend):
+        return backend is not None and backend.available()
+
+    def recognize(self, frame, boxes=None) -> list:
+        cloud_ok, local_ok = self._usable(self.cloud), self._usable(self.local)
+
+        if self.mode == MODE_LOCAL or (self.mode == MODE_LOCAL_FIRST and local_ok):
+            if not local_ok:
+                return self._none()
+            local = self._run(self.local, frame, boxes) or []
+            confident = [r for r in local if r["score"] >= self.escalate_below]
+            if confident or self.mode == MODE_LOCAL or not cloud_ok or not local:
+                return [r for r in local if r["score"] >= self.min_score]
+            with self._lock:
+                self.escalations += 1
+            cloud = self._run(self.cloud, frame, boxes)
+            if cloud is None:
+                return [r for r in local if r["score"] >= self.min_score]
+            self._compare(local, cloud)
+            return cloud
+
+        if cloud_ok:
+            cloud = self._run(self.cloud, frame, boxes)
+            if cloud is not None or not local_ok:
+                return cloud or []
+        if local_ok:
+            # cloud mode, but no token / no link / request failed: don't go blind
+            with self._lock:
+                self.fallbacks += 1
+            local = self._run(self.local, frame, boxes) or []
+            return [r for r in local if r["score"] >= self.min_score]
+        return self._none()
+
+    def _none(self):
+        with self._lock:
+            self.unavailable += 1
+        return []
+
+    def _compare(self, local, cloud):
+        if not local or not cloud:
+            return
+        top_local = local[0]["plate"].upper()
+        top_cloud = cloud[0].get("plate", "").upper()
+        with self._lock:
+            self.compared += 1
+            if top_local == top_cloud:
+                self.agreed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            backends = {}
+            for name, backend in self.backends.items():
+                backends[name] = dict(self._counts[name], available=backend.available(),
+                                      latency=self._latency[name].snapshot())
+                if getattr(backend, "load_error", None):
+                    backends[name]["load_error"] = backend.load_error
+            return {
+                "mode": self.mode,
+                "backends": backends,
+                "escalations": self.escalations,
+                "cloud_fallbacks": self.fallbacks,
+                "unavailable": self.unavailable,
+                "local_vs_cloud": {
+                    "compared": self.compared,
+                    "agreed": self.agreed,
+                    "agreement": round(self.agreed / self.compared, 3) if self.compared else None,
+                },
+            }
@@ -0,0 +1,196 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from metrics import LatencyStats
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Cached report generation
+# ──────────────────────────────────────────────────────────────────────────────
+class ReportEngine:
+    # A report is a `source` returning (version, rows) from an in-memory
+    # store, and a `build(rows, path)` that writes the file. get() copies the
+    # rows (under the store's own lock only), builds on a worker thread and
+    # keeps the result on disk keyed by the data version. Until the data
+    # changes, repeated downloads are served straight from that file. Builds
+    # never run on the request thread or under the pipeline lock. A request
+    # waits up to `wait` seconds for a build and otherwise gets "building",
+    # so the caller can answer 202 and have the client retry.
+    def __init__(self, folder, wait=5.0, workers=1):
+        self.folder = folder
+        self.wait = wait
+        os.makedirs(folder, exist_ok=True)
+        self._reports = {}
+        self._cached = {}    # kind -> (version, path)
+        self._building = {}  # kind -> (version, future)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="report")
+        self.build_time = LatencyStats()
+        self.hits = 0
+        self.builds = 0
+        self.failures = 0
+
+    def register(self, kind, source, build, version=None):
+        # `version` is an optional cheap () -> version used to check the cache
+        # without copying the rows.
+        self._reports[kind] = (source, build, version or (lambda: source()[0]))
+
+    def get(self, kind, wait=None):
+        # Returns ("ready", path), ("building", None), ("empty", None) or ("failed", None).
+        source, build, version_of = self._reports[kind]
+        with self._lock:
+            cached = self._cached.get(kind)
+            if cached and cached[0] == version_of() and os.path.exists(cached[1]):
+                self.hits += 1
+                return "ready", cached[1]
+            building = self._building.get(kind)
+            if building is None or building[0] != version_of():
+                version, rows = source()
+                if not rows:
+                    return "empty", None
+                future = self._pool.submit(self._build, kind, version, list(rows), build)
+                building = self._building[kind] = (version, future)
+        try:
+            return "ready", building[1].result(timeout=self.wait if wait is None else wait)
+        except FutureTimeout:
+            return "building", None
+        except Exception as e:
+            print(f"Report {kind} failed:", e)
+            return "failed", None
+
+    def _build(self, kind, version, rows, build):
+        started = time.time()
+        path = os.path.join(self.folder, f"{kind}.v{version}")
+        tmp = path + ".tmp"
+        try:
+            build(rows, tmp)
+            os.replace(tmp, path)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+                if self._building.get(kind, (None,))[0] == version:
+                    del self._building[kind]
+            raise
+        self.build_time.record(time.time() - started)
+        with self._lock:
+            previous = self._cached.get(kind)
+            self._cached[kind] = (version, path)
+            if self._building.get(kind, (None,))[0] == version:
+                del self._building[kind]
+            self.builds += 1
+        if previous and previous[1] != path:
+            try:
+                os.remove(previous[1])
+            except OSError:
+                pass
+        return path
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cached": {kind: version for kind, (version, _) in self._cached.items()},
+                "building": sorted(self._building),
+                "hits": self.hits,
+                "builds": self.builds,
+                "failures": self.failures,
+                "build": self.build_time.snapshot(),
+            }
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Builders (reportlab / xlsxwriter are imported on first build, not at startup)
+# ──────────────────────────────────────────────────────────────────────────────
+def _header_style():
+    from reportlab.lib import colors
+    return [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.blue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('WORDWRAP', (0, 0), (-1, -1)),
+    ]
+
+def detected_plates_pdf(thumbnail_for):
+    # thumbnail_for(row) -> local thumbnail path or None; never a URL, so a
+    # build never touches the network.
+    def build(rows, path):
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import Table, TableStyle, SimpleDocTemplate, Paragraph, Image
+
+        doc = SimpleDocTemplate(path, pagesize=landscape(A4), leftMargin=10, rightMargin=10, topMargin=20, bottomMargin=20)
+        styles = getSampleStyleSheet()
+        elements = [Paragraph("<b>Detected Plates Report</b>", styles["Title"])]
+
+        data = [["License Plate", "Status", "Time", "Snapshot"]]
+        for plate in rows:
+            thumb = thumbnail_for(plate)
+            img = Image(thumb, width=100, height=70) if thumb else Paragraph("N/A", styles["Normal"])
+            status_text = Paragraph(str(plate.get("status", "")), styles["Normal"])
+            data.append([plate.get("plate", ""), status_text, plate.get("time", ""), img])
+
+        table = Table(data, colWidths=[100, 140, 120, 120], repeatRows=1)
+        table.setStyle(TableStyle(_header_style() + [('FONTSIZE', (0, 0), (-1, -1), 10)]))
+        elements.append(table)
+        doc.build(elements)
+    return build
+
+def summons_queue_pdf(rows, path):
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Table, TableStyle, SimpleDocTemplate, Paragraph
+
+    doc = SimpleDocTemplate(path, pagesize=landscape(A4), leftMargin=20, rightMargin=20, topMargin=30, bottomMargin=20)
+    styles = getSampleStyleSheet()
+    elements = [Paragraph("<b>Summons Queue Report</b>", styles["Title"])]
+
+    data = [["License Plate", "Notice No", "Offence", "Location", "Date", "Status", "Fine Amount", "Due Date"]]
+    for summon in rows:
+        data.append([
+            summon.get("plate", ""),
+            summon.get("noticeNo", ""),
+            Paragraph(summon.get("offence", ""), styles["Normal"]),
+            Paragraph(summon.get("location", ""), styles["Normal"]),
+            summon.get("date", ""),
+            summon.get("status", ""),
+            summon.get("amount", ""),
+            summon.get("due_date", "")
+        ])
+
+    table = Table(data, colWidths=[60, 90, 180, 150, 70, 70, 70, 70], repeatRows=1)
+    table.setStyle(TableStyle(_header_style() + [('FONTSIZE', (0, 0), (-1, -1), 9)]))
+    elements.append(table)
+    doc.build(elements)
+
+def xlsx_table(sheet_name):
+    # Columns are the union of the row keys in first-seen order (what
+    # pandas.DataFrame(rows) produced); lists/dicts are written as text.
+    def build(rows, path):
+        import xlsxwriter
+
+        columns = []
+        for row in rows:
+            for key in row:
+                if key not in columns:
+                    columns.append(key)
+        workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        sheet = workbook.add_worksheet(sheet_name)
+        bold = workbook.add_format({"bold": True})
+        sheet.write_row(0, 0, columns, bold)
+        for r, row in enumerate(rows, start=1):
+            sheet.write_row(r, 0, [_cell(row.get(c)) for c in columns])
+        workbook.close()
+    return build
+
+def _cell(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+import argparse
+import os
+
+from dotenv import load_dotenv
+from waitress import serve
+
+from serving import RouteBudgets
+
+load_dotenv()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Production launcher (waitress) for lpr.py and app.py
+#
+#   python serve.py lpr      # the Pi service (camera, pipeline, dashboard)
+#   python serve.py app      # the lightweight recognition/ingest service
+#
+# `python lpr.py` still starts the Flask development server for debugging;
+# use this launcher for production. One waitress pool of WAITRESS_THREADS
+# serves everything. Streaming routes and downloads get their own capped
+# budgets inside it (see serving.RouteBudgets), and the API always keeps the
+# remaining threads.
+#
+# PROVISIONAL DEFAULTS: the thread count, MIN_API_WORKERS and the stream /
+# download budgets below are estimates and have not been measured on the Pi.
+# The only load test so far ran on a development machine with no camera
+# attached, so no stream held a slot and the results say nothing about Pi
+# capacity. Before changing them or relying on them, run
+#   python serve.py lpr &
+#   python benchmarks/load_test.py --concurrency 16 --seconds 60 --streams 4
+# on the Pi with the camera running and record the numbers here.
+# ──────────────────────────────────────────────────────────────────────────────
+WAITRESS_THREADS = int(os.getenv("WAITRESS_THREADS", "16"))
+# /video_feed + /events at once; /events past EVENTS_MAX_CLIENTS is refused by lpr.py itself
+STREAM_WORKERS = int(os.getenv("STREAM_WORKERS", "8"))
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "2"))  # exports and report downloads at once
+MIN_API_WORKERS = int(os.getenv("MIN_API_WORKERS", "4"))
+BUDGET_WAIT = float(os.getenv("BUDGET_WAIT", "0.5"))        # seconds to wait for a slot before 503
+CONNECTION_LIMIT = int(os.getenv("WAITRESS_CONNECTION_LIMIT", "100"))
+CHANNEL_TIMEOUT = int(os.getenv("WAITRESS_CHANNEL_TIMEOUT", "60"))   # idle seconds before a socket is closed
+CLEANUP_INTERVAL = int(os.getenv("WAITRESS_CLEANUP_INTERVAL", "15"))
+BACKLOG = int(os.getenv("WAITRESS_BACKLOG", "256"))
+# per-connection output buffer cap: past this waitress blocks the thread writing
+# the response until the client drains it, so a slow MJPEG/SSE client holds its
+# thread and stream slot rather than growing memory without bound
+OUTBUF_HIGH_WATERMARK = int(os.getenv("WAITRESS_OUTBUF_HIGH_WATERMARK", str(4 << 20)))
+MAX_REQUEST_BODY = int(os.getenv("WAITRESS_MAX_REQUEST_BODY", str(32 << 20)))  # snapshot uploads
+
+TARGETS = {
+    # name -> (default port, {budget: [path prefixes]})
+    "lpr": (5001, {
+        "stream": ["/video_feed", "/events"],
+        "download": ["/download/", "/api/export/"],
+    }),
+    "app": (5001, {
+        "stream": [],
+        "download": ["/api/reports/"],
+    }),
+}
+
+def load_app(target):
+    if target == "lpr":
+        import lpr
+        return lpr.create_app()
+    import app
+    return app.app
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("target", choices=sorted(TARGETS))
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=WAITRESS_THREADS)
+    args = parser.parse_args()
+
+    default_port, prefixes = TARGETS[args.target]
+    limits = {"stream": STREAM_WORKERS, "download": DOWNLOAD_WORKERS}
+    budgets = {name: (limits[name], paths) for name, paths in prefixes.items() if paths}
+    reserved = sum(limit for limit, _ in budgets.values())
+    if args.threads - reserved < MIN_API_WORKERS:
+        raise SystemExit(f"WAITRESS_THREADS={args.threads} leaves fewer than {MIN_API_WORKERS} API threads "
+                         f"after {reserved} streaming/download slots; raise it or lower the budgets")
+
+    port = args.port or int(os.getenv("PORT", str(default_port)))
+    flask_app = load_app(args.target)
+    route_budgets = RouteBudgets(flask_app.wsgi_app, budgets, wait=BUDGET_WAIT)
+    flask_app.wsgi_app = route_budgets
+    flask_app.extensions["route_budgets"] = route_budgets  # surfaced in the stats endpoints
+
+    print(f"Serving {args.target} on {args.host}:{port} with {args.threads} threads "
+          f"({', '.join(f'{n}={l}' for n, (l, _) in budgets.items())}, api>={args.threads - reserved})")
+    serve(
+        flask_app,
+        host=args.host,
+        port=port,
+        threads=args.threads,
+        connection_limit=CONNECTION_LIMIT,
+        channel_timeout=CHANNEL_TIMEOUT,
+        cleanup_interval=CLEANUP_INTERVAL,
+        backlog=BACKLOG,
+        outbuf_high_watermark=OUTBUF_HIGH_WATERMARK,
+        max_request_body_size=MAX_REQUEST_BODY,
+        ident="lpr",
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import threading
+import time
+
+from metrics import LatencyStats
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Per-route worker budgets (WSGI middleware)
+# ──────────────────────────────────────────────────────────────────────────────
+class RouteBudgets:
+    # waitress runs every request on one fixed thread pool, and a streaming
+    # response (MJPEG, SSE, a large export) holds its thread until the
+    # client goes away. Each budget caps how many requests whose path starts
+    # with one of its prefixes may run at once, so a few browsers left
+    # open on /video_feed can never take the threads the API needs.
+    # Everything unmatched shares the rest of the pool. A slot is held until
+    # the server closes the response iterable, i.e. for the whole stream.
+    # When a budget is full the request waits up to `wait` seconds for a
+    # slot and is then answered 503 with Retry-After rather than queueing
+    # behind streams that may never end.
+    def __init__(self, app, budgets, wait=0.5, retry_after=5):
+        # budgets: {name: (limit, [path prefixes])}
+        self.app = app
+        self.wait = wait
+        self.retry_after = retry_after
+        self._budgets = [(name, tuple(prefixes), _Budget(limit)) for name, (limit, prefixes) in budgets.items()
+                         if limit and limit > 0]
+
+    def _match(self, path):
+        for name, prefixes, budget in self._budgets:
+            if path.startswith(prefixes):
+                return budget
+        return None
+
+    def __call__(self, environ, start_response):
+        budget = self._match(environ.get("PATH_INFO", ""))
+        if budget is None:
+            return self.app(environ, start_response)
+        if not budget.acquire(self.wait):
+            body = b'{"error": "server busy, retry shortly"}'
+            start_response("503 Service Unavailable", [("Content-Type", "application/json"),
+                                                       ("Content-Length", str(len(body))),
+                                                       ("Retry-After", str(self.retry_after))])
+            return [body]
+        try:
+            result = self.app(environ, start_response)
+        except BaseException:
+            budget.release()
+            raise
+        return _Releasing(result, budget)
+
+    def total(self) -> int:
+        return sum(budget.limit for _, _, budget in self._budgets)
+
+    def stats(self) -> dict:
+        return {name: budget.stats() for name, _, budget in self._budgets}
+
+class _Budget:
+    def __init__(self, limit):
+        self.limit = int(limit)
+        self._slots = threading.BoundedSemaphore(self.limit)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.served = 0
+        self.rejected = 0
+        self.held = LatencyStats()  # how long each request kept its slot
+
+    def acquire(self, wait) -> bool:
+        if not self._slots.acquire(timeout=wait):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        return True
+
+    def release(self, held=None):
+        with self._lock:
+            self.active -= 1
+            self.served += 1
+        if held is not None:
+            self.held.record(held)
+        self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {"limit": self.limit, "active": self.active, "peak": self.peak,
+                     "served": self.served, "rejected": self.rejected}
+        stats["held"] = self.held.snapshot()
+        return stats
+
+class _Releasing:
+    # Wraps the app's response iterable; the slot goes back when the server
+    # closes it (end of response or client disconnect), exactly once.
+    def __init__(self, result, budget):
+        self._result = result
+        self._budget = budget
+        self._started = time.time()
+        self._released = False
+
+    def __iter__(self):
+        return iter(self._result)
+
+    def close(self):
+        try:
+            close = getattr(self._result, "close", None)
+            if close:
+                close()
+        finally:
+            if not self._released:
+                self._released = True
+                self._budget.release(time.time() - self._started)
@@ -0,0 +1,217 @@
+from __future__ import annotations
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Content-addressed snapshot store
+# ──────────────────────────────────────────────────────────────────────────────
+class SnapshotStore:
+    # Images are stored once per distinct content under
+    # root/<sha[:2]>/<sha[2:4]>/<sha>.jpg (thumbnail: <sha>_t.jpg), so no
+    # directory ever holds more than a few hundred files. A SQLite catalog
+    # maps the public snapshot names (PLATE_EPOCH.jpg, the names used in
+    # URLs and the DB) to blobs, so identical frames share one file. It also
+    # keeps size, capture time and last access per blob.
+    #
+    # Retention: blobs older than max_age are removed, and once the total
+    # exceeds budget_bytes the least recently used ones go until the total is
+    # back under 90% of it. Both run from put() at most every prune_interval
+    # seconds, so there is no background thread and no directory scan.
+    def __init__(self, root, budget_bytes=2 << 30, max_age=30 * 86400, catalog=None, prune_interval=300):
+        self.root = root
+        self.budget_bytes = budget_bytes  # 0 = no size limit
+        self.max_age = max_age            # seconds, 0 = keep forever
+        self.prune_interval = prune_interval
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(catalog or os.path.join(root, "catalog.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                has_thumb INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS blobs_last_access ON blobs (last_access);
+            CREATE INDEX IF NOT EXISTS blobs_created ON blobs (created);
+            CREATE TABLE IF NOT EXISTS snapshots (
+                name TEXT PRIMARY KEY,
+                sha TEXT NOT NULL,
+                plate TEXT,
+                taken_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS snapshots_sha ON snapshots (sha);
+            CREATE INDEX IF NOT EXISTS snapshots_taken_at ON snapshots (taken_at);
+        """)
+        self._db.commit()
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        self._last_prune = 0.0
+        self.stored = 0
+        self.dedup_hits = 0
+        self.pruned_lru = 0
+        self.pruned_age = 0
+        self.deleted = 0
+
+    def _blob_path(self, sha, thumb=False):
+        return os.path.join(self.root, sha[:2], sha[2:4], sha + ("_t.jpg" if thumb else ".jpg"))
+
+    def put(self, name, jpeg: bytes, thumb: bytes | None = None, taken_at=None, plate=None) -> int:
+        # Returns the bytes actually written (0 when the content was already stored).
+        sha = hashlib.sha256(jpeg).hexdigest()
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT sha FROM snapshots WHERE name = ?", (name,)).fetchone()
+            known = self._db.execute("SELECT has_thumb FROM blobs WHERE sha = ?", (sha,)).fetchone()
+            written = 0
+            if known is None:
+                written += _write_atomic(self._blob_path(sha), jpeg)
+            if thumb and not (known and known[0]):
+                written += _write_atomic(self._blob_path(sha, thumb=True), thumb)
+            if known is None:
+                self._db.execute("INSERT INTO blobs (sha, size, has_thumb, created, last_access) "
+                                 "VALUES (?, ?, ?, ?, ?)", (sha, written, int(bool(thumb)), min(now, taken_at or now), now))
+                self.stored += 1
+            else:
+                self._db.execute("UPDATE blobs SET size = size + ?, has_thumb = MAX(has_thumb, ?), "
+                                 "last_access = ? WHERE sha = ?", (written, int(bool(thumb)), now, sha))
+                self.dedup_hits += 1
+            self._db.execute("INSERT OR REPLACE INTO snapshots (name, sha, plate, taken_at) VALUES (?, ?, ?, ?)",
+                             (name, sha, plate, taken_at or now))
+            self._db.commit()
+            self._total += written
+            if previous and previous[0] != sha:
+                # the name now points elsewhere; free its old content if nothing else uses it
+                if self._db.execute("SELECT 1 FROM snapshots WHERE sha = ? LIMIT 1", (previous[0],)).fetchone() is None:
+                    self._drop_blobs([previous[0]])
+        if now - self._last_prune >= self.prune_interval or (self.budget_bytes and self._total > self.budget_bytes):
+            self.prune(now)
+        return written
+
+    def path_for(self, name, thumb=False, touch=True):
+        # Absolute file path for a snapshot name, or None if it is not stored.
+        with self._lock:
+            row = self._db.execute("SELECT b.sha, b.has_thumb, b.last_access FROM snapshots s "
+                                   "JOIN blobs b ON b.sha = s.sha WHERE s.name = ?", (name,)).fetchone()
+            if row is None or (thumb and not row[1]):
+                return None
+            sha, _, last_access = row
+            now = time.time()
+            if touch and now - last_access > 60:  # LRU granularity; keeps reads from writing every time
+                self._db.execute("UPDATE blobs SET last_access = ? WHERE sha = ?", (now, sha))
+                self._db.commit()
+        return self._blob_path(sha, thumb)
+
+    def prune(self, now=None):
+        now = now or time.time()
+        with self._lock:
+            self._last_prune = now
+            doomed = []
+            if self.max_age:
+                doomed = [r[0] for r in self._db.execute("SELECT sha FROM blobs WHERE created < ?",
+                                                         (now - self.max_age,))]
+                self.pruned_age += len(doomed)
+            freed = self._drop_blobs(doomed)
+            if self.budget_bytes and self._total > self.budget_bytes:
+                target = self._total - int(0.9 * self.budget_bytes)
+                lru, total = [], 0
+                for sha, size in self._db.execute("SELECT sha, size FROM blobs ORDER BY last_access"):
+                    if total >= target:
+                        break
+                    lru.append(sha)
+                    total += size
+                self.pruned_lru += len(lru)
+                freed += self._drop_blobs(lru)
+            return freed
+
+    def delete_range(self, start, end) -> int:
+        # Removes snapshots taken in [start, end) (epoch seconds) and any blob
+        # no other snapshot still uses. Returns the number of snapshots removed.
+        with self._lock:
+            removed = self._db.execute("DELETE FROM snapshots WHERE taken_at >= ? AND taken_at < ?",
+                                       (start, end)).rowcount
+            orphans = [r[0] for r in self._db.execute(
+                "SELECT sha FROM blobs WHERE sha NOT IN (SELECT sha FROM snapshots)")]
+            self._drop_blobs(orphans)
+            self.deleted += removed
+            return removed
+
+    def clear(self):
+        # Drops the catalog rows first, then whole shard directories; no per-file walk.
+        with self._lock:
+            self._db.execute("DELETE FROM snapshots")
+            self._db.execute("DELETE FROM blobs")
+            self._db.commit()
+            self._total = 0
+            for entry in os.scandir(self.root):
+                if entry.is_dir() and len(entry.name) == 2:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+
+    # caller holds self._lock
+    def _drop_blobs(self, shas) -> int:
+        freed = 0
+        for sha in shas:
+            for thumb in (False, True):
+                try:
+                    os.remove(self._blob_path(sha, thumb))
+                except OSError:
+                    pass
+            row = self._db.execute("SELECT size FROM blobs WHERE sha = ?", (sha,)).fetchone()
+            freed += row[0] if row else 0
+            self._db.execute("DELETE FROM blobs WHERE sha = ?", (sha,))
+            self._db.execute("DELETE FROM snapshots WHERE sha = ?", (sha,))
+        self._db.commit()
+        self._total -= freed
+        return freed
+
+    def adopt_flat_files(self) -> int:
+        # One-off migration of the old flat static/snapshots/*.jpg layout.
+        adopted = 0
+        for entry in os.scandir(self.root):
+            if not (entry.is_file() and entry.name.lower().endswith(".jpg")):
+                continue
+            try:
+                with open(entry.path, "rb") as f:
+                    data = f.read()
+                taken_at = entry.stat().st_mtime
+                self.put(entry.name, data, taken_at=taken_at, plate=entry.name.rsplit("_", 1)[0])
+                os.remove(entry.path)
+                adopted += 1
+            except (OSError, sqlite3.Error) as e:
+                print("Could not adopt snapshot", entry.name, e)
+        return adopted
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            blobs = self._db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+            names = self._db.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+            return {
+                "snapshots": names,
+                "blobs": blobs,
+                "bytes": self._total,
+                "budget_bytes": self.budget_bytes,
+                "max_age_days": round(self.max_age / 86400, 1) if self.max_age else 0,
+                "stored": self.stored,
+                "dedup_hits": self.dedup_hits,
+                "pruned_lru": self.pruned_lru,
+                "pruned_age": self.pruned_age,
+                "deleted_by_range": self.deleted,
+            }
+
+def _write_atomic(path, data) -> int:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+import threading
+import time
+from queue import Queue, Full
+
+import cv2
+import numpy as np
+
+from metrics import LatencyStats
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Background snapshot writer
+# ──────────────────────────────────────────────────────────────────────────────
+class SnapshotWriter:
+    # submit() only decides the file names and queues the work, so the
+    # recognition thread never waits on JPEG encoding or the SD card. The
+    # writer thread stores the full snapshot and a small thumbnail for list
+    # views. If the caller already has JPEG bytes of the frame (e.g. the
+    # ones uploaded to the recognizer), they are written as they are rather
+    # than re-encoded, and the thumbnail is decoded from them at reduced
+    # size. Storage is the SnapshotStore's job. When the queue is full the
+    # snapshot is dropped (and counted) rather than stalling recognition.
+    def __init__(self, store, quality=80, thumb_width=320, thumb_quality=70, max_queue=32):
+        self.store = store
+        self.quality = int(quality)
+        self.thumb_width = int(thumb_width)  # 0 = no thumbnails
+        self.thumb_quality = int(thumb_quality)
+        self._queue = Queue(maxsize=max(1, max_queue))
+        self._lock = threading.Lock()
+        self.write_latency = LatencyStats()  # encode + disk, per snapshot
+        self.lag = LatencyStats()            # submit() until the files exist
+        self.queued = 0
+        self.written = 0
+        self.reused_jpeg = 0
+        self.dropped = 0
+        self.failed = 0
+        self.bytes_written = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, name, frame=None, jpeg=None, taken_at=None, plate=None) -> bool:
+        # False if the snapshot was dropped; otherwise `name` will be in the store shortly.
+        if frame is None and jpeg is None:
+            return False
+        try:
+            self._queue.put_nowait((name, frame, jpeg, taken_at, plate, time.time()))
+        except Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.queued += 1
+        return True
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            name, frame, jpeg, taken_at, plate, submitted = job
+            started = time.time()
+            try:
+                written = self._write(name, frame, jpeg, taken_at, plate)
+            except Exception as e:
+                print("Snapshot write failed:", e)
+                with self._lock:
+                    self.failed += 1
+                continue
+            done = time.time()
+            self.write_latency.record(done - started)
+            self.lag.record(done - submitted)
+            with self._lock:
+                self.written += 1
+                self.bytes_written += written
+                if jpeg is not None:
+                    self.reused_jpeg += 1
+
+    def _write(self, name, frame, jpeg, taken_at, plate):
+        if jpeg is None:
+            jpeg = _encode(frame, self.quality)
+        thumb = None
+        if self.thumb_width:
+            if frame is None:
+                # decoding at 1/2 size is much cheaper than a full decode + resize
+                frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_REDUCED_COLOR_2)
+            h, w = frame.shape[:2]
+            if w > self.thumb_width:
+                frame = cv2.resize(frame, (self.thumb_width, max(1, h * self.thumb_width // w)),
+                                   interpolation=cv2.INTER_AREA)
+            thumb = _encode(frame, self.thumb_quality)
+        return self.store.put(name, jpeg, thumb, taken_at=taken_at, plate=plate)
+
+    def stop(self, timeout=5):
+        # drains what is already queued, then exits
+        try:
+            self._queue.put(None, timeout=timeout)
+        except Full:
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            written = self.written
+            stats = {
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self._queue.maxsize,
+                "queued": self.queued,
+                "written": written,
+                "reused_jpeg": self.reused_jpeg,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "avg_bytes": self.bytes_written // written if written else 0,
+            }
+        stats["write"] = self.write_latency.snapshot()
+        stats["lag"] = self.lag.snapshot()
+        return stats
+
+def _encode(frame, quality) -> bytes:
+    ok, buffer = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buffer.tobytes()
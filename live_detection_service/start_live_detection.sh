@@ -1,7 +1,8 @@
 #!/bin/bash
 
-# Run lpr.py in background
-/usr/bin/python3 /home/lpr/Desktop/project/live_detection_service/lpr.py &
+# Run lpr.py in background under waitress (see serve.py for the thread/budget settings)
+cd /home/lpr/Desktop/project/live_detection_service
+/usr/bin/python3 /home/lpr/Desktop/project/live_detection_service/serve.py lpr &
 
 # Run gps_tracker.py in background
 /usr/bin/python3 /home/lpr/Desktop/project/live_detection_service/gps_tracker.py &
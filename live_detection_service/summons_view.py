@@ -0,0 +1,124 @@
+from __future__ import annotations
+import json
+import threading
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Incrementally maintained summons queue
+# ──────────────────────────────────────────────────────────────────────────────
+class SummonsView:
+    # Unique summons keyed by noticeNo, each tagged with the location/snapshot
+    # of the plate sighting that produced it. Every change bumps a version
+    # number; readers get a cached JSON snapshot (rebuilt only when the
+    # version moved) or the delta since a version they already hold.
+    def __init__(self, max_tombstones: int = 4096):
+        self._lock = threading.Lock()
+        self._entries = {}       # noticeNo -> (version, summon dict)
+        self._by_plate = {}      # plate -> set(noticeNo)
+        self._tombstones = {}    # noticeNo -> version it was removed at
+        self._max_tombstones = max_tombstones
+        self._reset_version = 0  # deltas older than this need a full reload
+        self.version = 0
+        self._cached_version = -1
+        self._cached_list = []
+        self._cached_json = b"[]"
+
+    def update_plate(self, plate_info: dict, summons) -> bool:
+        # Replaces the summons known for one plate; returns True if anything changed.
+        # Only a list replaces them ([] = the plate has none); anything else,
+        # e.g. None from a failed lookup, leaves the plate's summons as they are.
+        plate = plate_info.get("plate", "")
+        if not plate or not isinstance(summons, list):
+            return False
+        with self._lock:
+            seen = set()
+            changed = False
+            for summon in summons:
+                if not isinstance(summon, dict):
+                    continue
+                nn = summon.get("noticeNo")
+                if not nn or nn in seen:
+                    continue
+                seen.add(nn)
+                current = self._entries.get(nn)
+                if current is None:
+                    enriched = dict(summon)
+                    enriched["latitude"] = plate_info.get("latitude")
+                    enriched["longitude"] = plate_info.get("longitude")
+                    enriched["snapshot"] = plate_info.get("snapshot", "")
+                    enriched["officer_id"] = plate_info.get("officer_id") or "Unknown"
+                else:
+                    # keep the first sighting's location, refresh the summons fields
+                    enriched = dict(current[1])
+                    enriched.update(summon)
+                    if enriched == current[1]:
+                        continue
+                self.version += 1
+                self._entries[nn] = (self.version, enriched)
+                self._tombstones.pop(nn, None)
+                changed = True
+
+            for nn in self._by_plate.get(plate, set()) - seen:
+                if nn in self._entries:
+                    del self._entries[nn]
+                    self.version += 1
+                    self._tombstones[nn] = self.version
+                    changed = True
+            if seen:
+                self._by_plate[plate] = seen
+            else:
+                self._by_plate.pop(plate, None)
+            self._trim_tombstones()
+            return changed
+
+    def plates(self) -> list:
+        with self._lock:
+            return list(self._by_plate)
+
+    def snapshot(self):
+        # (version, list of summons); the list must be treated as read-only.
+        with self._lock:
+            self._refresh_cache()
+            return self.version, self._cached_list
+
+    def snapshot_json(self):
+        with self._lock:
+            self._refresh_cache()
+            return self.version, self._cached_json
+
+    def changes_since(self, since: int) -> dict:
+        with self._lock:
+            if since < self._reset_version or since > self.version:
+                self._refresh_cache()
+                return {"version": self.version, "reset": True, "changes": self._cached_list, "removed": []}
+            changes = [s for v, s in self._entries.values() if v > since]
+            removed = [nn for nn, v in self._tombstones.items() if v > since]
+            return {"version": self.version, "reset": False, "changes": changes, "removed": removed}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_plate.clear()
+            self._tombstones.clear()
+            self.version += 1
+            self._reset_version = self.version
+
+    def __len__(self):
+        return len(self._entries)
+
+    # caller holds self._lock
+    def _refresh_cache(self):
+        if self._cached_version == self.version:
+            return
+        self._cached_list = [s for _, s in self._entries.values()]
+        self._cached_json = json.dumps(self._cached_list, default=str).encode()
+        self._cached_version = self.version
+
+    def _trim_tombstones(self):
+        if len(self._tombstones) <= self._max_tombstones:
+            return
+        # forget the oldest removals; clients that far behind get a full reset
+        ordered = sorted(self._tombstones.items(), key=lambda kv: kv[1])
+        drop = ordered[: len(ordered) - self._max_tombstones]
+        for nn, _ in drop:
+            del self._tombstones[nn]
+        self._reset_version = max(self._reset_version, drop[-1][1])
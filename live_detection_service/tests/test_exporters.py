@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+import re
+import zipfile
+
+import pytest
+
+import exporters
+
+COLUMNS = ["plate", "timestamp", "summons"]
+
+
+def rows(n):
+    return ({"plate": f"P{i}", "timestamp": "2025-08-07 10:15:00", "summons": [{"noticeNo": i}]} for i in range(n))
+
+
+def collect(chunks):
+    return b"".join(chunks)
+
+
+def test_csv_has_header_and_every_row():
+    data = collect(exporters.export_chunks("csv", rows(5000), COLUMNS)).decode()
+    parsed = list(csv.reader(io.StringIO(data)))
+    assert parsed[0] == COLUMNS
+    assert len(parsed) == 5001
+    assert json.loads(parsed[1][2]) == [{"noticeNo": 0}]
+
+
+def test_ndjson_keeps_nested_values():
+    lines = collect(exporters.export_chunks("ndjson", rows(3), COLUMNS)).decode().splitlines()
+    assert [json.loads(line)["summons"] for line in lines] == [[{"noticeNo": i}] for i in range(3)]
+
+
+def load_xlsx(data):
+    # (row count, all text in the workbook) without an xlsx reader dependency
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        sheet = z.read("xl/worksheets/sheet1.xml").decode()
+        text = sheet + "".join(z.read(n).decode() for n in z.namelist() if n.endswith("sharedStrings.xml"))
+    return len(re.findall(r"<row ", sheet)), text
+
+
+def test_xlsx_round_trip(tmp_path):
+    count, text = load_xlsx(collect(exporters.export_chunks("xlsx", rows(10), COLUMNS, tmp_dir=str(tmp_path))))
+    assert count == 11
+    assert all(c in text for c in COLUMNS + ["P9"])
+    assert list(tmp_path.iterdir()) == []  # temp workbook removed
+
+
+def test_xlsx_marks_truncation(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporters, "XLSX_MAX_ROW", 5)
+    count, text = load_xlsx(collect(exporters.export_chunks("xlsx", rows(20), COLUMNS, tmp_dir=str(tmp_path))))
+    assert count == 6
+    assert "TRUNCATED" in text
+    assert "P3" in text and "P4" not in text
+
+
+def test_xlsx_exactly_at_limit_is_not_truncated(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporters, "XLSX_MAX_ROW", 5)
+    count, text = load_xlsx(collect(exporters.export_chunks("xlsx", rows(5), COLUMNS, tmp_dir=str(tmp_path))))
+    assert count == 6
+    assert "P4" in text and "TRUNCATED" not in text
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        exporters.export_chunks("pdf", [], COLUMNS)
@@ -0,0 +1,118 @@
+import json
+
+from offline_journal import FSYNC_NEVER, OfflineJournal
+
+
+def journal(path, **kwargs):
+    kwargs.setdefault("fsync", FSYNC_NEVER)
+    return OfflineJournal(str(path), **kwargs)
+
+
+def segments(path):
+    return sorted(p.name for p in path.glob("*.log"))
+
+
+def test_append_read_ack_round_trip(tmp_path):
+    j = journal(tmp_path)
+    for n in range(5):
+        j.append({"n": n})
+    batch = j.read_batch(max_items=3)
+    assert [item["n"] for item in batch.items] == [0, 1, 2]
+    j.ack(batch)
+    assert j.pending == 2
+    assert [item["n"] for item in j.read_batch().items] == [3, 4]
+    assert j.stats()["acked"] == 3
+
+
+def test_partial_ack_resends_the_rest(tmp_path):
+    j = journal(tmp_path)
+    for n in range(4):
+        j.append({"n": n})
+    batch = j.read_batch()
+    j.ack(batch, count=1)
+    retry = j.read_batch()
+    assert [item["n"] for item in retry.items] == [1, 2, 3]
+    assert retry.key != batch.key
+    assert j.read_batch().key == retry.key
+
+
+def test_pending_and_ack_survive_reopen(tmp_path):
+    j = journal(tmp_path)
+    for n in range(3):
+        j.append({"n": n})
+    j.ack(j.read_batch(max_items=2))
+    j.close()
+    reopened = journal(tmp_path)
+    assert reopened.pending == 1
+    assert reopened.journal_id == j.journal_id
+    assert [item["n"] for item in reopened.read_batch().items] == [2]
+
+
+def test_torn_tail_is_truncated_on_open(tmp_path):
+    j = journal(tmp_path)
+    j.append({"n": 0})
+    j.append({"n": 1})
+    j.close()
+    path = tmp_path / segments(tmp_path)[-1]
+    good = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b'0badc0de\t{"n": 2')  # power cut mid-write
+    reopened = journal(tmp_path)
+    assert path.stat().st_size == good
+    assert reopened.pending == 2
+    assert reopened.stats()["corrupt"] == 0
+    reopened.append({"n": 3})
+    assert [item["n"] for item in reopened.read_batch().items] == [0, 1, 3]
+
+
+def test_corrupt_record_is_skipped_and_counted(tmp_path):
+    j = journal(tmp_path)
+    j.append({"n": 0})
+    j.append({"n": 1})
+    j.close()
+    path = tmp_path / segments(tmp_path)[-1]
+    lines = path.read_bytes().splitlines(keepends=True)
+    lines[0] = lines[0].replace(b'"n":0', b'"n":9')  # crc no longer matches
+    path.write_bytes(b"".join(lines))
+    reopened = journal(tmp_path)
+    assert reopened.stats()["corrupt"] == 1
+    assert reopened.pending == 1
+    assert [item["n"] for item in reopened.read_batch().items] == [1]
+
+
+def test_acked_segments_are_compacted(tmp_path):
+    j = journal(tmp_path, segment_bytes=64)
+    for n in range(10):
+        j.append({"n": n, "pad": "x" * 20})
+    assert len(segments(tmp_path)) > 2
+    while j.pending:
+        j.ack(j.read_batch(max_items=3))
+    assert len(segments(tmp_path)) == 1
+    assert j.stats()["acked"] == 10
+
+
+def test_cap_drops_oldest_segments(tmp_path):
+    j = journal(tmp_path, segment_bytes=100, max_bytes=300)
+    for n in range(30):
+        j.append({"n": n, "pad": "x" * 20})
+    stats = j.stats()
+    assert stats["bytes"] <= 300 + 100
+    assert stats["dropped"] > 0
+    assert stats["pending"] == 30 - stats["dropped"]
+    items = []
+    while j.pending:
+        batch = j.read_batch()
+        items.extend(item["n"] for item in batch.items)
+        j.ack(batch)
+    assert items == list(range(stats["dropped"], 30))
+
+
+def test_import_json_file_migrates_once(tmp_path):
+    legacy = tmp_path / "offline_queue.json"
+    legacy.write_text(json.dumps([{"n": 0}, {"n": 1}]))
+    j = journal(tmp_path / "journal")
+    assert j.import_json_file(legacy) == 2
+    assert j.import_json_file(legacy) == 0
+    assert not legacy.exists()
+    assert (tmp_path / "offline_queue.json.imported").exists()
+    assert j.pending == 2
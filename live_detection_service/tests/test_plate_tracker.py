@@ -0,0 +1,78 @@
+from plate_tracker import PlateTracker, edit_distance, normalize_plate, same_plate
+
+
+def read(plate, score=0.9, candidates=None):
+    return {"plate": plate, "score": score, "candidates": candidates or []}
+
+
+def test_normalize_and_edit_distance():
+    assert normalize_plate(" bph-1200 ") == "BPH1200"
+    assert edit_distance("BPH1200", "BPH120") == 1
+    assert edit_distance("BPH1200", "BPW1200") == 1
+    assert edit_distance("", "ABC") == 3
+
+
+def test_same_plate_rules():
+    assert same_plate("BPH1200", "BPH1200", 1)
+    assert same_plate("BPH1200", "BPH120", 1)       # dropped character
+    assert same_plate("BPH1200", "BPH12O0", 1)      # misread, not a valid plate
+    assert same_plate("BPH1200", "BPH1", 1)         # fragment
+    assert same_plate("BPH1200", "BPH120D", 1)      # 0/D misread, both well-formed
+    assert same_plate("BPH120D", "BPH1200", 1)
+    assert not same_plate("BPH1200", "BPH1208", 1)     # 0/8 is not a confusable pair
+    assert not same_plate("BPH1200", "BPW1200", 1)  # two real plates
+    assert not same_plate("BPH1200", "BPH120D", 0)
+    assert not same_plate("BPH1200", "VMD9454", 1)
+
+
+def test_misreads_vote_into_one_detection():
+    tracker = PlateTracker(idle_seconds=1.0)
+    tracker.observe([read("BPH1200")], now=100.0)
+    tracker.observe([read("BPH12O0", 0.6)], now=100.2)
+    tracker.observe([read("BPH1200")], now=100.4)
+    closed = tracker.observe([], now=102.0)
+    assert len(closed) == 1
+    assert closed[0].plate == "BPH1200"
+    assert closed[0].reads == 3
+
+
+def test_confusable_misread_joins_regardless_of_order():
+    for sequence in (["BPH1200", "BPH120D", "BPH1200", "BPH120", "BPH1"],
+                     ["BPH120D", "BPH1200", "BPH120", "BPH1200", "BPH1"]):
+        tracker = PlateTracker(idle_seconds=1.0)
+        for i, plate in enumerate(sequence):
+            tracker.observe([read(plate, 0.5 if plate == "BPH120D" else 0.9)], now=100.0 + 0.1 * i)
+        closed = tracker.flush()
+        assert [(t.plate, t.reads) for t in closed] == [("BPH1200", 5)]
+
+
+def test_neighbouring_plates_stay_separate():
+    tracker = PlateTracker(idle_seconds=1.0)
+    tracker.observe([read("BPH1200"), read("BPW1200")], now=100.0)
+    tracker.observe([read("BPW1200")], now=100.3)
+    closed = tracker.flush()
+    assert sorted(t.plate for t in closed) == ["BPH1200", "BPW1200"]
+
+
+def test_ocr_alternative_does_not_capture_other_plate():
+    tracker = PlateTracker(idle_seconds=1.0)
+    tracker.observe([read("BPH1200", candidates=[{"plate": "BPW1200", "score": 0.4}])], now=100.0)
+    tracker.observe([read("BPW1200")], now=100.2)
+    assert len(tracker.flush()) == 2
+
+
+def test_gps_gate_and_idle_close():
+    tracker = PlateTracker(idle_seconds=1.0, max_move_m=50.0)
+    tracker.observe([read("VMD9454")], latitude=3.1390, longitude=101.6868, now=100.0)
+    # ~1 km away: another sighting, not the same pass
+    tracker.observe([read("VMD9454")], latitude=3.1480, longitude=101.6868, now=100.5)
+    assert tracker.stats()["open_tracks"] == 2
+    assert tracker.expire(now=101.0) == []
+    assert len(tracker.expire(now=102.0)) == 2
+
+
+def test_min_reads_discards_single_glimpses():
+    tracker = PlateTracker(idle_seconds=1.0, min_reads=2)
+    tracker.observe([read("VMD9454")], now=100.0)
+    assert tracker.flush() == []
+    assert tracker.stats()["tracks_discarded"] == 1
@@ -0,0 +1,44 @@
+import time
+
+from rate_limiter import RateLimiter, TokenBucket
+
+
+def test_burst_then_rejects_without_waiting():
+    bucket = TokenBucket(rate=1, burst=3)
+    assert all(bucket.try_acquire() for _ in range(3))
+    assert not bucket.try_acquire()
+    stats = bucket.stats()
+    assert stats["acquired"] == 3 and stats["rejected"] == 1
+
+
+def test_blocking_acquire_waits_for_the_deficit():
+    bucket = TokenBucket(rate=20, burst=1)
+    assert bucket.acquire()
+    started = time.monotonic()
+    assert bucket.acquire()
+    waited = time.monotonic() - started
+    assert 0.03 <= waited < 0.5
+
+
+def test_timeout_shorter_than_deficit_is_refused():
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket.acquire()
+    started = time.monotonic()
+    assert not bucket.acquire(timeout=0.1)
+    assert time.monotonic() - started < 0.05
+
+
+def test_pause_holds_everyone_off():
+    bucket = TokenBucket(rate=100, burst=5)
+    bucket.pause(1.0)
+    assert not bucket.try_acquire()
+    assert bucket.stats()["throttled"] == 1
+
+
+def test_limiter_passes_unbudgeted_endpoints():
+    limiter = RateLimiter({"summons": (1, 1), "off": (0, 1)})
+    assert set(limiter.buckets) == {"summons"}
+    assert limiter.try_acquire("summons")
+    assert not limiter.try_acquire("summons")
+    assert limiter.try_acquire("off")
+    assert limiter.try_acquire("parking")
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+
+from recognizers import CloudRecognizer
+from snapshot_store import SnapshotStore
+from snapshot_writer import SnapshotWriter
+
+
+def frame():
+    image = np.zeros((120, 160, 3), np.uint8)
+    image[40:80, 50:110] = 255
+    return image
+
+
+class Upload:
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, jpeg):
+        self.sent.append(jpeg)
+        return [{"plate": "BPH1200", "score": 0.9}]
+
+
+def test_full_view_upload_reused_when_quality_qualifies():
+    upload = Upload()
+    cloud = CloudRecognizer(upload, lambda: True, full_quality=70, reuse_min_quality=60)
+    results = cloud.recognize(frame(), None)
+    assert results[0]["jpeg"] == upload.sent[0]
+
+
+def test_no_reuse_at_default_qualities():
+    upload = Upload()
+    cloud = CloudRecognizer(upload, lambda: True, full_quality=25, reuse_min_quality=60)
+    assert "jpeg" not in cloud.recognize(frame(), None)[0]
+    cloud = CloudRecognizer(Upload(), lambda: True, full_quality=70, reuse_min_quality=None)
+    assert "jpeg" not in cloud.recognize(frame(), None)[0]
+
+
+def test_snapshot_writer_stores_reused_bytes_as_is(tmp_path):
+    upload = Upload()
+    cloud = CloudRecognizer(upload, lambda: True, full_quality=70, reuse_min_quality=60)
+    jpeg = cloud.recognize(frame(), None)[0]["jpeg"]
+    store = SnapshotStore(str(tmp_path))
+    writer = SnapshotWriter(store, thumb_width=80)
+    assert writer.submit("BPH1200_1.jpg", jpeg=jpeg, taken_at=time.time())
+    writer.stop()
+    assert open(store.path_for("BPH1200_1.jpg"), "rb").read() == jpeg
+    assert store.path_for("BPH1200_1.jpg", thumb=True)
+    assert writer.stats()["reused_jpeg"] == 1
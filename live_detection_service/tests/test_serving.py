@@ -0,0 +1,78 @@
+from serving import RouteBudgets
+
+
+class Stream:
+    def __init__(self):
+        self.closed = False
+
+    def __iter__(self):
+        return iter([b"frame"])
+
+    def close(self):
+        self.closed = True
+
+
+def app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return Stream()
+
+
+def call(middleware, path):
+    statuses = []
+    result = middleware({"PATH_INFO": path}, lambda status, headers: statuses.append((status, dict(headers))))
+    return statuses[0], result
+
+
+def test_budget_caps_matching_routes_and_answers_503():
+    budgets = RouteBudgets(app, {"stream": (2, ["/video_feed", "/events"])}, wait=0.01, retry_after=7)
+    first = call(budgets, "/video_feed")[1]
+    call(budgets, "/events")
+    (status, headers), body = call(budgets, "/video_feed")
+    assert status.startswith("503")
+    assert headers["Retry-After"] == "7"
+    assert b"busy" in b"".join(body)
+    assert budgets.stats()["stream"]["rejected"] == 1
+
+    first.close()
+    (status, _), _ = call(budgets, "/video_feed")
+    assert status.startswith("200")
+
+
+def test_unmatched_routes_are_not_limited():
+    budgets = RouteBudgets(app, {"download": (1, ["/download/"])}, wait=0.01)
+    call(budgets, "/download/a.xlsx")
+    for _ in range(5):
+        (status, _), result = call(budgets, "/api/status")
+        assert status.startswith("200")
+        assert not hasattr(result, "_budget")
+
+
+def test_slot_released_once_and_inner_close_called():
+    budgets = RouteBudgets(app, {"stream": (1, ["/video_feed"])}, wait=0.01)
+    _, result = call(budgets, "/video_feed")
+    assert list(result) == [b"frame"]
+    result.close()
+    result.close()
+    stats = budgets.stats()["stream"]
+    assert result._result.closed
+    assert stats["active"] == 0 and stats["served"] == 1 and stats["peak"] == 1
+
+
+def test_slot_released_when_app_raises():
+    def broken(environ, start_response):
+        raise RuntimeError("boom")
+
+    budgets = RouteBudgets(broken, {"stream": (1, ["/video_feed"])}, wait=0.01)
+    for _ in range(2):
+        try:
+            budgets({"PATH_INFO": "/video_feed"}, lambda *a: None)
+        except RuntimeError:
+            pass
+    assert budgets.stats()["stream"]["rejected"] == 0
+    assert budgets.stats()["stream"]["active"] == 0
+
+
+def test_zero_limit_budget_is_disabled():
+    budgets = RouteBudgets(app, {"stream": (0, ["/video_feed"]), "download": (2, ["/download/"])})
+    assert list(budgets.stats()) == ["download"]
+    assert budgets.total() == 2
@@ -0,0 +1,68 @@
+import os
+import time
+
+from snapshot_store import SnapshotStore
+
+
+def files(root):
+    return sorted(n for _, _, names in os.walk(root) for n in names if n.endswith(".jpg"))
+
+
+def on_disk_bytes(root):
+    return sum(os.path.getsize(os.path.join(d, n)) for d, _, names in os.walk(root)
+               for n in names if n.endswith(".jpg"))
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    assert store.put("A_1.jpg", b"x" * 100, thumb=b"t" * 10) == 110
+    assert store.put("B_2.jpg", b"x" * 100, thumb=b"t" * 10) == 0
+    assert len(files(tmp_path)) == 2
+    assert store.stats()["snapshots"] == 2
+    assert store.stats()["dedup_hits"] == 1
+    assert open(store.path_for("B_2.jpg", thumb=True), "rb").read() == b"t" * 10
+    assert store.path_for("missing.jpg") is None
+
+
+def test_replacing_a_name_frees_its_old_blob(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.put("A_1.jpg", b"old" * 100)
+    store.put("A_1.jpg", b"new" * 50)
+    assert store.stats()["blobs"] == 1
+    assert store.stats()["bytes"] == on_disk_bytes(tmp_path) == 150
+    assert open(store.path_for("A_1.jpg"), "rb").read() == b"new" * 50
+
+
+def test_replacing_a_name_keeps_shared_blob(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.put("A_1.jpg", b"same" * 10)
+    store.put("B_2.jpg", b"same" * 10)
+    store.put("A_1.jpg", b"other" * 10)
+    assert store.stats()["blobs"] == 2
+    assert open(store.path_for("B_2.jpg"), "rb").read() == b"same" * 10
+
+
+def test_prune_by_age_then_lru_budget(tmp_path):
+    store = SnapshotStore(str(tmp_path), budget_bytes=1000, max_age=3600, prune_interval=10 ** 9)
+    now = time.time()
+    store.put("old.jpg", b"o" * 100, taken_at=now - 7200)
+    for i in range(4):
+        store.put(f"n{i}.jpg", bytes([i]) * 300, taken_at=now)
+    store.prune(now)
+    stats = store.stats()
+    assert store.path_for("old.jpg") is None
+    assert stats["pruned_age"] == 1
+    assert stats["bytes"] <= 900
+    assert stats["bytes"] == on_disk_bytes(tmp_path)
+
+
+def test_delete_range_and_clear(tmp_path):
+    store = SnapshotStore(str(tmp_path), max_age=0)
+    store.put("a.jpg", b"a" * 10, taken_at=100)
+    store.put("b.jpg", b"b" * 10, taken_at=200)
+    assert store.delete_range(50, 150) == 1
+    assert store.path_for("a.jpg") is None
+    assert store.path_for("b.jpg") is not None
+    store.clear()
+    assert files(tmp_path) == []
+    assert store.stats()["bytes"] == 0
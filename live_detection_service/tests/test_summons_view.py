@@ -0,0 +1,95 @@
+import json
+
+from summons_view import SummonsView
+
+
+def sighting(plate, lat=3.1):
+    return {"plate": plate, "latitude": lat, "longitude": 101.6, "snapshot": "s.jpg", "officer_id": "A1"}
+
+
+def summon(nn, status="Not Paid"):
+    return {"noticeNo": nn, "status": status, "offence": "Parking"}
+
+
+def test_update_adds_and_enriches():
+    view = SummonsView()
+    assert view.update_plate(sighting("VMD9454"), [summon("N1")])
+    version, rows = view.snapshot()
+    assert version == 1
+    assert rows[0]["noticeNo"] == "N1"
+    assert rows[0]["latitude"] == 3.1
+    assert rows[0]["officer_id"] == "A1"
+    assert json.loads(view.snapshot_json()[1]) == rows
+
+
+def test_unchanged_update_does_not_bump_version():
+    view = SummonsView()
+    view.update_plate(sighting("VMD9454"), [summon("N1")])
+    assert not view.update_plate(sighting("VMD9454", lat=9.9), [summon("N1")])
+    assert view.version == 1
+    # first sighting's location is kept
+    assert view.snapshot()[1][0]["latitude"] == 3.1
+
+
+def test_failed_lookup_keeps_summons():
+    view = SummonsView()
+    view.update_plate(sighting("VMD9454"), [summon("N1")])
+    assert not view.update_plate(sighting("VMD9454"), None)
+    assert len(view) == 1
+    assert view.plates() == ["VMD9454"]
+
+
+def test_empty_list_removes_and_leaves_tombstone():
+    view = SummonsView()
+    view.update_plate(sighting("VMD9454"), [summon("N1"), summon("N2")])
+    assert view.update_plate(sighting("VMD9454"), [])
+    assert len(view) == 0
+    assert view.plates() == []
+    delta = view.changes_since(2)
+    assert delta["reset"] is False
+    assert sorted(delta["removed"]) == ["N1", "N2"]
+    assert delta["changes"] == []
+
+
+def test_changes_since_returns_only_newer_entries():
+    view = SummonsView()
+    view.update_plate(sighting("AAA1"), [summon("N1")])
+    since = view.version
+    view.update_plate(sighting("BBB2"), [summon("N2")])
+    view.update_plate(sighting("AAA1"), [summon("N1", status="Paid")])
+    delta = view.changes_since(since)
+    assert delta["version"] == view.version
+    assert sorted(s["noticeNo"] for s in delta["changes"]) == ["N1", "N2"]
+    assert delta["removed"] == []
+
+
+def test_duplicate_notices_in_one_answer_count_once():
+    view = SummonsView()
+    view.update_plate(sighting("AAA1"), [summon("N1"), summon("N1"), "junk", {"noticeNo": ""}])
+    assert len(view) == 1
+    assert view.version == 1
+
+
+def test_clear_forces_reset_for_old_versions():
+    view = SummonsView()
+    view.update_plate(sighting("AAA1"), [summon("N1")])
+    old = view.version
+    view.clear()
+    delta = view.changes_since(old)
+    assert delta["reset"] is True
+    assert delta["changes"] == []
+    # a client from the future (e.g. after a restart) also reloads
+    assert view.changes_since(view.version + 5)["reset"] is True
+
+
+def test_trimmed_tombstones_force_reset():
+    view = SummonsView(max_tombstones=2)
+    for i in range(4):
+        view.update_plate(sighting(f"P{i}"), [summon(f"N{i}")])
+    start = view.version
+    for i in range(4):
+        view.update_plate(sighting(f"P{i}"), [])
+    assert view.changes_since(start)["reset"] is True
+    recent = view.changes_since(view.version - 1)
+    assert recent["reset"] is False
+    assert recent["removed"] == ["N3"]
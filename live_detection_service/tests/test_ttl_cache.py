@@ -0,0 +1,73 @@
+import threading
+import time
+
+from ttl_cache import TTLCache
+
+
+def test_entries_expire_and_per_entry_ttl():
+    cache = TTLCache(default_ttl=60)
+    cache.set("paid", 1, ttl=0.05)
+    cache.set("unpaid", 2)
+    cache.set("error", 3, ttl=0)  # ttl <= 0 is never stored
+    assert "paid" in cache and "unpaid" in cache and "error" not in cache
+    time.sleep(0.06)
+    assert cache.get("paid") is None
+    assert cache.get("unpaid") == 2
+    assert cache.stats()["expired"] == 1
+
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_get_or_load_is_single_flight():
+    cache = TTLCache()
+    calls = []
+    release = threading.Event()
+
+    def loader(key):
+        calls.append(key)
+        release.wait(2)
+        return key.lower()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("ABC", loader)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join(2)
+    assert calls == ["ABC"]
+    assert results == ["abc"] * 8
+    assert cache.stats()["loads"] == 1
+
+
+def test_failed_load_is_not_cached_and_releases_waiters():
+    cache = TTLCache()
+
+    def failing(key):
+        raise RuntimeError("upstream down")
+
+    try:
+        cache.get_or_load("k", failing)
+    except RuntimeError:
+        pass
+    assert "k" not in cache
+    assert cache.get_or_load("k", lambda key: "ok") == "ok"
+
+
+def test_ttl_for_picks_ttl_from_value():
+    cache = TTLCache(default_ttl=60)
+    cache.get_or_load("err", lambda key: None, ttl_for=lambda v: 0 if v is None else 60)
+    cache.get_or_load("hit", lambda key: [1], ttl_for=lambda v: 0 if v is None else 60)
+    assert "err" not in cache
+    assert cache.get("hit") == [1]
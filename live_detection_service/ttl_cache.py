@@ -0,0 +1,117 @@
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+
+# ──────────────────────────────────────────────────────────────────────────────
+# In-process TTL + LRU cache
+# ──────────────────────────────────────────────────────────────────────────────
+class TTLCache:
+    # Each entry carries its own expiry, so paid / unpaid / error results can
+    # live for different lengths of time. Least recently used entries are
+    # evicted once max_entries is reached. get_or_load() is single-flight:
+    # concurrent misses for one key share a single upstream call.
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 60.0):
+        self.max_entries = max(1, int(max_entries))
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._inflight = {}         # key -> threading.Event
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.loads = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self._lookup(key, time.time())
+        return value if found else default
+
+    def set(self, key, value, ttl: float | None = None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_or_load(self, key, loader, ttl_for=None):
+        while True:
+            with self._lock:
+                found, value = self._lookup(key, time.time())
+                if found:
+                    return value
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    waiter = self._inflight[key] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                # another thread is loading this key; reuse its result
+                waiter.wait()
+                continue
+            try:
+                value = loader(key)
+                self.loads += 1
+                ttl = ttl_for(value) if ttl_for else None
+                with self._lock:
+                    self._store(key, value, ttl)
+                return value
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                waiter.set()
+
+    # caller holds self._lock
+    def _lookup(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._data[key]
+            self.expired += 1
+            self.misses += 1
+            return False, None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def _store(self, key, value, ttl):
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            self._data.pop(key, None)
+            return
+        self._data[key] = (time.time() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > time.time()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "loads": self.loads,
+        }